@@ -4,8 +4,8 @@ AEra Follow-Reward Worker
 Überwacht neue Follower und vergibt 0.05 AERA pro Follow-Anfrage
 """
 
-import sqlite3
 import time
+import asyncio
 import logging
 import os
 from datetime import datetime
@@ -15,6 +15,7 @@ import sys
 # Optional: Web3 für echte Transfers
 try:
     from web3 import Web3
+    from rpc_pool import PooledHTTPProvider, RPCPool, rpc_urls
     WEB3_AVAILABLE = True
 except ImportError:
     WEB3_AVAILABLE = False
@@ -22,6 +23,10 @@ except ImportError:
 # Load environment variables
 load_dotenv()
 
+# Gemeinsamer Storage (nach load_dotenv, damit DATABASE_URL / DATABASE_PATH greifen)
+from storage import storage
+from fee_oracle import FeeOracle
+
 # Logging Setup
 logging.basicConfig(
     level=os.getenv("LOG_LEVEL", "info").upper(),
@@ -30,7 +35,6 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Configuration
-DB_PATH = os.path.join(os.path.dirname(__file__), "aera.db")
 ADMIN_WALLET = os.getenv("ADMIN_WALLET", "")
 ADMIN_PRIVATE_KEY = os.getenv("ADMIN_PRIVATE_KEY", "")
 SEPOLIA_RPC_URL = os.getenv("SEPOLIA_RPC_URL", "https://eth-sepolia.g.alchemy.com/v2/YOUR_ALCHEMY_KEY")
@@ -52,14 +56,21 @@ ERC20_ABI = [
     }
 ]
 
-def get_db_connection():
-    """Stellt Datenbankverbindung her"""
-    conn = sqlite3.connect(DB_PATH, timeout=10.0, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA synchronous=NORMAL")
-    conn.execute("PRAGMA cache_size=-64000")
-    return conn
+# Eigener Event Loop: Storage ist async, der Worker läuft synchron
+_loop = asyncio.new_event_loop()
+
+def run_storage(coro):
+    """Führt einen Storage-Aufruf auf dem Worker-Loop aus"""
+    return _loop.run_until_complete(coro)
+
+# Fee-Oracle pro Web3-Verbindung (gecachte eth_feeHistory-Fees statt gas_price pro Reward)
+_fee_oracle = None
+
+def fee_oracle(w3) -> FeeOracle:
+    global _fee_oracle
+    if _fee_oracle is None or _fee_oracle.w3 is not w3:
+        _fee_oracle = FeeOracle(w3)
+    return _fee_oracle
 
 def connect_web3():
     """Verbinde zu Sepolia Testnet"""
@@ -68,10 +79,12 @@ def connect_web3():
         return None
     
     try:
-        w3 = Web3(Web3.HTTPProvider(SEPOLIA_RPC_URL))
+        # Mehrere Endpoints: SEPOLIA_RPC_URLS=url1,url2 (Failover + Health-Scoring)
+        urls = rpc_urls("SEPOLIA_RPC_URLS", "SEPOLIA_RPC_URL", SEPOLIA_RPC_URL)
+        w3 = Web3(PooledHTTPProvider(RPCPool(urls)))
         
         if not w3.is_connected():
-            logger.error(f"❌ Kann nicht zu Sepolia verbinden: {SEPOLIA_RPC_URL}")
+            logger.error(f"❌ Kann nicht zu Sepolia verbinden: {', '.join(urls)}")
             return None
         
         logger.info(f"✓ Verbunden zu Sepolia (Block: {w3.eth.block_number})")
@@ -115,7 +128,7 @@ def send_follow_reward(w3, follower_address: str, amount_wei: int) -> dict:
             'from': admin_wallet,
             'nonce': nonce,
             'gas': 100000,
-            'gasPrice': w3.eth.gas_price,
+            **fee_oracle(w3).fees(),
             'chainId': 11155111  # Sepolia
         })
         
@@ -161,23 +174,11 @@ def process_new_followers(w3):
     4. Markiere als follow_confirmed = 1
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         # Finde neue, unbewährte Followers (follow_confirmed = 0)
-        cursor.execute("""
-            SELECT id, owner_wallet, follower_address, follower_score, source_platform, verified_at
-            FROM followers
-            WHERE follow_confirmed = 0 AND verified = 1
-            ORDER BY verified_at ASC
-            LIMIT 10
-        """)
-        
-        new_followers = cursor.fetchall()
+        new_followers = run_storage(storage.followers.pending_rewards(limit=10))
         
         if not new_followers:
             logger.debug("ℹ️ Keine neuen Follow-Anfragen gefunden")
-            conn.close()
             return
         
         logger.info(f"🎯 Verarbeite {len(new_followers)} neue Follower...")
@@ -220,19 +221,12 @@ def process_new_followers(w3):
             # Markiere Follower als belohnt (follow_confirmed = 1)
             current_timestamp = datetime.utcnow().isoformat()
             
-            cursor.execute("""
-                UPDATE followers
-                SET follow_confirmed = 1, confirmed_at = ?
-                WHERE id = ?
-            """, (current_timestamp, follower_id))
-            
-            conn.commit()
+            run_storage(storage.followers.mark_rewarded(follower_id, current_timestamp))
             
             logger.info(f"✓ Reward Status: {reward_status}")
             logger.info(f"   Timestamp: {current_timestamp}")
             logger.info(f"{'=' * 70}")
             
-        conn.close()
         logger.info(f"✅ Follow-Reward Verarbeitung abgeschlossen")
         
     except Exception as e:
@@ -248,6 +242,9 @@ def main():
     logger.info("📊 Überwacht neue Follower und vergibt 0.05 AERA Rewards")
     logger.info("")
     
+    run_storage(storage.open())
+    logger.info(f"✓ Storage: {storage.backend.name} ({storage.backend.location})")
+    
     if not ADMIN_WALLET or not ADMIN_PRIVATE_KEY:
         logger.warning("⚠️ Admin-Credentials nicht konfiguriert")
         logger.warning("   → Läufe im DEMO-MODUS (Rewards werden NICHT versendet)")
@@ -283,6 +280,7 @@ def main():
         logger.info("=" * 80)
         logger.info("⏹️ Worker beendet (SIGINT)")
         logger.info("=" * 80)
+        run_storage(storage.close())
         sys.exit(0)
 
 if __name__ == "__main__":
@@ -0,0 +1,154 @@
+"""
+VEra-Resonance — Login Tokens
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+Tokens returned by /api/verify and checked by /api/verify-token:
+- v1 format: base64url(version | address 20 bytes | expiry uint32 | HMAC-SHA256 32 bytes), 76 chars
+- HMAC from a pre-keyed hmac object (copy() per token, key schedule computed once),
+  signatures compared with hmac.compare_digest
+- LRU of recently verified tokens (TOKEN_CACHE_SIZE): a repeat auto-login only
+  compares the cached expiry with the clock
+- legacy "address:expiry:sha256(data+secret)" tokens are still accepted while
+  TOKEN_ACCEPT_LEGACY=true (migration window), new tokens are always v1
+"""
+
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import struct
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+TOKEN_ACCEPT_LEGACY = os.getenv("TOKEN_ACCEPT_LEGACY", "true").lower() == "true"
+
+TOKEN_VERSION = 1
+# version (1) | address (20) | expiry (4, Sekunden seit Epoch)
+_PAYLOAD = struct.Struct(">B20sI")
+_MAC_SIZE = hashlib.sha256().digest_size
+_TOKEN_SIZE = _PAYLOAD.size + _MAC_SIZE
+_MAX_EXPIRY = 2 ** 32 - 1
+
+
+class TokenError(ValueError):
+    """Token ungültig; die Meldung geht unverändert an den Client"""
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(token: str) -> bytes:
+    return base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+
+
+class TokenSigner:
+    """Erzeugt und prüft Login-Tokens (v1 + Legacy) mit Cache für verifizierte Tokens"""
+
+    def __init__(self, secret: str, cache_size: int = TOKEN_CACHE_SIZE, accept_legacy: bool = TOKEN_ACCEPT_LEGACY):
+        self._secret = secret
+        self._mac = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+        self.cache_size = cache_size
+        self.accept_legacy = accept_legacy
+        # token -> (address, expiry)
+        self._verified: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.issued = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.legacy_verified = 0
+        self.rejected = 0
+
+    def _sign(self, payload: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(payload)
+        return mac.digest()
+
+    def issue(self, address: str, expiry: int) -> str:
+        """v1-Token für address (0x + 40 Hex), gültig bis expiry (Unix-Sekunden, uint32)"""
+        if not 0 <= expiry <= _MAX_EXPIRY:
+            raise ValueError(f"Token expiry out of range: {expiry}")
+        payload = _PAYLOAD.pack(TOKEN_VERSION, bytes.fromhex(address[2:]), expiry)
+        self.issued += 1
+        return _b64encode(payload + self._sign(payload))
+
+    def _verify_v1(self, token: str) -> Tuple[str, float]:
+        try:
+            raw = _b64decode(token)
+        except (binascii.Error, ValueError):
+            raise TokenError("Invalid token format")
+        if len(raw) != _TOKEN_SIZE or raw[0] != TOKEN_VERSION:
+            raise TokenError("Invalid token format")
+        payload, signature = raw[:_PAYLOAD.size], raw[_PAYLOAD.size:]
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            raise TokenError("Invalid signature")
+        _, address, expiry = _PAYLOAD.unpack(payload)
+        return "0x" + address.hex(), float(expiry)
+
+    def _verify_legacy(self, token: str) -> Tuple[str, float]:
+        """Altes Format address:expiry:sha256(address:expiry + secret)"""
+        address, expiry_str, signature = token.split(":")
+        try:
+            expiry = float(expiry_str)
+        except ValueError:
+            raise TokenError("Invalid token format")
+        expected = hashlib.sha256((f"{address}:{expiry_str}" + self._secret).encode()).hexdigest()
+        if not hmac.compare_digest(signature.encode(), expected.encode()):
+            raise TokenError("Invalid signature")
+        # Alte Tokens: Ablauf aus naivem utcnow().timestamp() -> gleiche Uhr zum Vergleich
+        offset = datetime.utcnow().timestamp() - time.time()
+        self.legacy_verified += 1
+        return address, expiry - offset
+
+    def verify(self, token: str) -> Tuple[str, float]:
+        """
+        Returns: (address, expiry als Unix-Sekunden)
+
+        Raises TokenError bei falschem Format, falscher Signatur oder Ablauf.
+        """
+        cached = self._verified.get(token)
+        if cached is not None:
+            self.cache_hits += 1
+            self._verified.move_to_end(token)
+        else:
+            self.cache_misses += 1
+            try:
+                if token.count(":") == 2:
+                    if not self.accept_legacy:
+                        raise TokenError("Token format no longer supported - please sign in again")
+                    cached = self._verify_legacy(token)
+                elif ":" in token:
+                    raise TokenError("Invalid token format")
+                else:
+                    cached = self._verify_v1(token)
+            except TokenError:
+                self.rejected += 1
+                raise
+            self._verified[token] = cached
+            if len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+
+        if cached[1] < time.time():
+            self._verified.pop(token, None)
+            self.rejected += 1
+            raise TokenError("Token expired")
+        return cached
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "version": TOKEN_VERSION,
+            "issued": self.issued,
+            "cached": len(self._verified),
+            "cache_size": self.cache_size,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "hit_rate": round(self.cache_hits / lookups, 4) if lookups else None,
+            "legacy_verified": self.legacy_verified,
+            "accept_legacy": self.accept_legacy,
+            "rejected": self.rejected,
+        }
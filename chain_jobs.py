@@ -0,0 +1,289 @@
+"""
+VEra-Resonance — Background Chain Jobs
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+On-chain follow-up work of a login (score sync, Identity NFT check/mint) runs after
+the HTTP response instead of inside it:
+- /api/verify and /admin/verify-signature enqueue a job in the persistent chain_jobs
+  table right after the database commit and return its id
+- a queued job of the same kind and address is reused, so repeated logins do not
+  pile up work; the payloads are merged (merge_payloads(): newer values win, flags
+  like new_user stay set once any login set them)
+- the runner claims queued jobs in id order and executes up to CHAIN_JOB_CONCURRENCY
+  at once; handlers report progress step by step (stored with the job)
+- failed jobs are retried up to CHAIN_JOB_MAX_ATTEMPTS (after attempts x CHAIN_JOB_RETRY_SECONDS),
+  jobs of a crashed worker
+  (running without progress for CHAIN_JOB_STALE_SECONDS and not held by this runner) are requeued,
+  finished jobs are deleted after CHAIN_JOB_KEEP_SECONDS
+- clients follow a job via GET /api/blockchain/jobs/{id} or server-sent events
+  (GET /api/blockchain/jobs/{id}/events, see events())
+
+Job states: queued -> running -> done | failed (running -> queued on retry).
+Only one process runs the jobs (server.py background lock); every worker may enqueue.
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from logger import blockchain_logger
+
+# ===== KONFIGURATION =====
+CHAIN_JOB_CONCURRENCY = int(os.getenv("CHAIN_JOB_CONCURRENCY", 8))
+CHAIN_JOB_POLL_SECONDS = float(os.getenv("CHAIN_JOB_POLL_SECONDS", 0.5))
+CHAIN_JOB_MAX_ATTEMPTS = int(os.getenv("CHAIN_JOB_MAX_ATTEMPTS", 3))
+CHAIN_JOB_RETRY_SECONDS = int(os.getenv("CHAIN_JOB_RETRY_SECONDS", 10))
+CHAIN_JOB_STALE_SECONDS = int(os.getenv("CHAIN_JOB_STALE_SECONDS", 300))
+CHAIN_JOB_KEEP_SECONDS = int(os.getenv("CHAIN_JOB_KEEP_SECONDS", 86400))
+CHAIN_JOB_EVENTS_POLL_SECONDS = float(os.getenv("CHAIN_JOB_EVENTS_POLL_SECONDS", 0.5))
+CHAIN_JOB_EVENTS_TIMEOUT_SECONDS = float(os.getenv("CHAIN_JOB_EVENTS_TIMEOUT_SECONDS", 120))
+
+FINAL_STATES = ("done", "failed")
+# Wartung (stale Jobs, alte Jobs löschen) höchstens so oft
+_MAINTENANCE_SECONDS = 60
+# Payload-Flags, die beim Zusammenführen wartender Jobs gesetzt bleiben (ODER)
+STICKY_FLAGS = ("new_user",)
+
+_TABLE = """
+    CREATE TABLE IF NOT EXISTS chain_jobs (
+        id {id},
+        kind TEXT NOT NULL,
+        address TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL,
+        steps TEXT NOT NULL DEFAULT '[]',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        run_at {int} NOT NULL,
+        created_at {int} NOT NULL,
+        started_at {int},
+        finished_at {int},
+        updated_at {int} NOT NULL
+    )
+"""
+
+_INDEXES = [
+    # Runner: älteste wartende Jobs zuerst
+    "CREATE INDEX IF NOT EXISTS idx_chain_jobs_status ON chain_jobs(status, id)",
+    # Einreihen: wartender Job derselben Art/Adresse
+    "CREATE INDEX IF NOT EXISTS idx_chain_jobs_address ON chain_jobs(address, kind, status)",
+    # Wartung: hängende bzw. alte abgeschlossene Jobs
+    "CREATE INDEX IF NOT EXISTS idx_chain_jobs_updated ON chain_jobs(status, updated_at)",
+]
+
+# DDL für Migration 11 (SQLite) bzw. PostgreSQL-Migration 7
+SCHEMA = [_TABLE.format(id="INTEGER PRIMARY KEY AUTOINCREMENT", int="INTEGER"), *_INDEXES]
+POSTGRES_SCHEMA = [_TABLE.format(id="BIGSERIAL PRIMARY KEY", int="BIGINT"), *_INDEXES]
+
+
+def job_view(row) -> Dict[str, Any]:
+    """chain_jobs-Zeile -> API-Antwort"""
+    return {
+        "job_id": row["id"],
+        "kind": row["kind"],
+        "address": row["address"],
+        "status": row["status"],
+        "steps": json.loads(row["steps"]),
+        "attempts": row["attempts"],
+        "error": row["error"],
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+        "updated_at": row["updated_at"],
+    }
+
+
+def merge_payloads(queued: str, new: str) -> str:
+    """Payload eines wartenden Jobs + Payload eines neuen Logins -> gemeinsamer Payload (JSON)"""
+    old, merged = json.loads(queued), json.loads(new)
+    for flag in STICKY_FLAGS:
+        if old.get(flag) or merged.get(flag):
+            merged[flag] = True
+    return json.dumps({**old, **merged})
+
+
+class ChainJob:
+    """Ein laufender Job, wie ihn ein Handler sieht"""
+
+    def __init__(self, store, row):
+        self.store = store
+        self.id = row["id"]
+        self.kind = row["kind"]
+        self.address = row["address"]
+        self.payload: Dict[str, Any] = json.loads(row["payload"])
+        self.attempt = row["attempts"]
+        self.steps: List[Dict[str, Any]] = json.loads(row["steps"])
+
+    async def step(self, name: str, status: str = "done", **detail):
+        """Fortschritt festhalten (sofort sichtbar für Status-Endpoint und Events)"""
+        now = int(time.time())
+        self.steps.append({"step": name, "status": status, "attempt": self.attempt, "at": now, **detail})
+        await self.store.chain_jobs.progress(self.id, json.dumps(self.steps), now)
+
+
+Handler = Callable[[ChainJob], Awaitable[None]]
+
+
+class ChainJobs:
+    """Persistente Job-Queue + Runner für Blockchain-Arbeit nach dem Login"""
+
+    def __init__(self, store, concurrency: int = CHAIN_JOB_CONCURRENCY, max_attempts: int = CHAIN_JOB_MAX_ATTEMPTS,
+                 retry_seconds: int = CHAIN_JOB_RETRY_SECONDS, stale_seconds: int = CHAIN_JOB_STALE_SECONDS,
+                 keep_seconds: int = CHAIN_JOB_KEEP_SECONDS):
+        self.store = store
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.stale_seconds = stale_seconds
+        self.keep_seconds = keep_seconds
+        self.handlers: Dict[str, Handler] = {}
+        # Laufende Tasks -> Job-id (werden bei der Wartung nicht als stale neu eingereiht)
+        self._running: Dict[asyncio.Task, int] = {}
+        # Weckt den Runner sofort nach submit() bzw. wenn ein Slot frei wird
+        self._wakeup: Optional[asyncio.Event] = None
+        self._maintained_at = 0.0
+        self.submitted = 0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.requeued_stale = 0
+        self.last_error: Optional[str] = None
+
+    def _event(self) -> asyncio.Event:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    def register(self, kind: str, handler: Handler):
+        self.handlers[kind] = handler
+
+    # ===== QUEUE =====
+
+    async def submit(self, kind: str, address: str, payload: Dict[str, Any]) -> int:
+        """Reiht einen Job ein -> job_id (kehrt ohne RPC-Aufruf zurück)"""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown chain job kind: {kind}")
+        job_id = await self.store.chain_jobs.enqueue(
+            kind, address.lower(), json.dumps(payload), int(time.time()), merge=merge_payloads
+        )
+        self.submitted += 1
+        self._event().set()
+        return job_id
+
+    async def job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        row = await self.store.chain_jobs.get(job_id)
+        return job_view(row) if row else None
+
+    async def events(self, job_id: int, timeout: float = CHAIN_JOB_EVENTS_TIMEOUT_SECONDS,
+                     poll_seconds: float = CHAIN_JOB_EVENTS_POLL_SECONDS) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Job-Ansicht bei jeder Änderung, bis der Job abgeschlossen ist oder timeout abläuft
+
+        Liefert None, solange sich nichts ändert (Keep-alive für Server-Sent Events).
+        Die Abfrage läuft über die Datenbank - funktioniert auf jedem Worker.
+        """
+        deadline = time.monotonic() + timeout
+        last = None
+        while True:
+            view = await self.job(job_id)
+            if view is None:
+                return
+            marker = (view["status"], view["updated_at"], len(view["steps"]))
+            if marker != last:
+                last = marker
+                yield view
+            else:
+                yield None
+            if view["status"] in FINAL_STATES or time.monotonic() >= deadline:
+                return
+            await asyncio.sleep(poll_seconds)
+
+    # ===== RUNNER =====
+
+    async def _execute(self, row):
+        job = ChainJob(self.store, row)
+        handler = self.handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for chain job kind: {job.kind}")
+            await handler(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            now = int(time.time())
+            status = await self.store.chain_jobs.retry(
+                job.id, error, self.max_attempts, now + self.retry_seconds * job.attempt, now
+            )
+            if status == "failed":
+                self.failed += 1
+                blockchain_logger.warning(f"⚠️ Chain job {job.id} ({job.kind}) failed after {job.attempt} attempts: {error}")
+            else:
+                self.retried += 1
+                blockchain_logger.info(f"🔁 Chain job {job.id} ({job.kind}) will be retried: {error}")
+            return
+        await self.store.chain_jobs.finish(job.id, int(time.time()))
+        self.completed += 1
+
+    def _done(self, task: asyncio.Task):
+        self._running.pop(task, None)
+        if not task.cancelled() and task.exception() is not None:
+            # Nur Datenbankfehler beim Abschließen landen hier; der Job wird als stale neu eingereiht
+            self.last_error = str(task.exception())
+        self._event().set()
+
+    async def _maintain(self):
+        now = int(time.time())
+        self.requeued_stale += await self.store.chain_jobs.requeue_stale(
+            now - self.stale_seconds, now, exclude=sorted(self._running.values())
+        )
+        await self.store.chain_jobs.cleanup(now - self.keep_seconds)
+
+    async def run_once(self) -> int:
+        """Startet wartende Jobs bis zur Parallelitäts-Grenze. Returns: Anzahl gestarteter Jobs"""
+        if time.monotonic() - self._maintained_at >= _MAINTENANCE_SECONDS:
+            self._maintained_at = time.monotonic()
+            await self._maintain()
+        free = self.concurrency - len(self._running)
+        if free <= 0:
+            return 0
+        rows = await self.store.chain_jobs.claim(free, int(time.time()))
+        for row in rows:
+            task = asyncio.create_task(self._execute(row))
+            self._running[task] = row["id"]
+            task.add_done_callback(self._done)
+        return len(rows)
+
+    async def run(self):
+        """Runner-Schleife (asyncio.create_task beim Server-Start)"""
+        blockchain_logger.info(f"🧵 Chain job runner started (concurrency={self.concurrency})")
+        while True:
+            wakeup = self._event()
+            wakeup.clear()
+            try:
+                await self.run_once()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                blockchain_logger.warning(f"⚠️ Chain job runner error: {e}")
+            try:
+                await asyncio.wait_for(wakeup.wait(), CHAIN_JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": len(self._running),
+            "concurrency": self.concurrency,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "requeued_stale": self.requeued_stale,
+            "last_error": self.last_error,
+        }
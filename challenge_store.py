@@ -0,0 +1,263 @@
+"""
+VEra-Resonance — Challenge / Nonce Store
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+One-time challenges for signature logins (/api/nonce -> /api/verify, /api/verify-token)
+and the dashboard (/admin/challenge -> /admin/verify-signature):
+- one open challenge per (namespace, address); a new request replaces the old one
+- O(1) issue/take via dict, expiry via a timing wheel (one slot per CHALLENGE_TICK_SECONDS),
+  so expired entries are dropped without scanning or per-entry timers
+- hard cap CHALLENGE_MAX_ENTRIES: when full, the entry closest to expiry is evicted,
+  memory stays flat no matter how many challenges are requested
+- take() is single use and compares in constant time
+
+Backends (CHALLENGE_STORE):
+- shared (default): SharedChallengeStore on the auth_challenges table of the storage
+  backend, so a challenge issued by one worker verifies on any other (SQLite: same
+  host, PostgreSQL: any host); a sweep loop deletes expired rows and enforces the cap
+- memory: ChallengeStore, per process - only for a single uvicorn worker; server.py
+  refuses to start a second worker with it (uvicorn --workers N sets no variable
+  the store could detect, so there is no automatic switch)
+"""
+
+import asyncio
+import hmac
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+CHALLENGE_TTL_SECONDS = float(os.getenv("CHALLENGE_TTL_SECONDS", 300))
+CHALLENGE_MAX_ENTRIES = int(os.getenv("CHALLENGE_MAX_ENTRIES", 100000))
+CHALLENGE_TICK_SECONDS = float(os.getenv("CHALLENGE_TICK_SECONDS", 1))
+CHALLENGE_STORE = os.getenv("CHALLENGE_STORE", "shared")
+CHALLENGE_SWEEP_SECONDS = float(os.getenv("CHALLENGE_SWEEP_SECONDS", 10))
+
+# Ergebnisse von take()
+TAKE_OK = "ok"
+TAKE_MISSING = "missing"      # nie ausgestellt, abgelaufen, verdrängt oder schon benutzt
+TAKE_MISMATCH = "mismatch"    # offene Challenge, aber andere Nonce
+
+_TABLE = """
+    CREATE TABLE IF NOT EXISTS auth_challenges (
+        namespace TEXT NOT NULL,
+        address TEXT NOT NULL,
+        nonce TEXT NOT NULL,
+        expires_at {int} NOT NULL,
+        PRIMARY KEY (namespace, address)
+    )
+"""
+
+_INDEXES = [
+    # Sweep: abgelaufene bzw. bald ablaufende zuerst
+    "CREATE INDEX IF NOT EXISTS idx_auth_challenges_expires ON auth_challenges(expires_at)",
+]
+
+# DDL für Migration 10 (SQLite) bzw. PostgreSQL-Migration 6
+SCHEMA = [_TABLE.format(int="INTEGER"), *_INDEXES]
+POSTGRES_SCHEMA = [_TABLE.format(int="BIGINT"), *_INDEXES]
+
+
+class ChallengeStore:
+    """Begrenzter In-Memory-Store mit Timing Wheel (ein Prozess)"""
+
+    name = "memory"
+
+    def __init__(self, ttl: float = CHALLENGE_TTL_SECONDS, max_entries: int = CHALLENGE_MAX_ENTRIES,
+                 tick: float = CHALLENGE_TICK_SECONDS, clock=time.monotonic):
+        if max_entries < 1:
+            raise ValueError(f"CHALLENGE_MAX_ENTRIES must be >= 1 (got {max_entries})")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.tick = tick
+        self.clock = clock
+        # +2: Slot des aktuellen Ticks und Aufrunden des Ablauf-Ticks
+        self._slot_count = int(math.ceil(ttl / tick)) + 2
+        # OrderedDict: popitem(last=False) bleibt O(1), auch nach vielen Löschungen vorne
+        self._slots: List["OrderedDict[Hashable, None]"] = [OrderedDict() for _ in range(self._slot_count)]
+        # key -> (nonce, expires_at, expiry_tick)
+        self._entries: Dict[Hashable, Tuple[str, float, int]] = {}
+        self._tick_now = self._current_tick()
+        # Frühester möglicherweise belegter Ablauf-Tick (Startpunkt für Verdrängung)
+        self._evict_tick = self._tick_now + 1
+        self.issued = 0
+        self.taken = 0
+        self.mismatches = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def _current_tick(self) -> int:
+        return int(self.clock() // self.tick)
+
+    def _advance(self):
+        """Dreht das Rad bis zum aktuellen Tick und verwirft abgelaufene Slots"""
+        now_tick = self._current_tick()
+        # Nach langer Pause reicht eine Umdrehung
+        start = max(self._tick_now + 1, now_tick - self._slot_count + 1)
+        for tick in range(start, now_tick + 1):
+            slot = self._slots[tick % self._slot_count]
+            if not slot:
+                continue
+            for key in slot:
+                del self._entries[key]
+            self.expired += len(slot)
+            self._slots[tick % self._slot_count] = OrderedDict()
+        self._tick_now = max(self._tick_now, now_tick)
+
+    def _remove(self, key: Hashable) -> Optional[Tuple[str, float, int]]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._slots[entry[2] % self._slot_count].pop(key, None)
+        return entry
+
+    def _evict_one(self) -> bool:
+        """Verdrängt den Eintrag, der als nächstes abliefe (ältester Slot zuerst). Returns: False wenn keiner gefunden"""
+        start = max(self._evict_tick, self._tick_now + 1)
+        for tick in range(start, self._tick_now + self._slot_count):
+            slot = self._slots[tick % self._slot_count]
+            if slot:
+                self._evict_tick = tick
+                key, _ = slot.popitem(last=False)
+                del self._entries[key]
+                self.evicted += 1
+                return True
+        return False
+
+    async def issue(self, namespace: str, address: str, nonce: str, ttl: Optional[float] = None) -> float:
+        """Legt die Challenge an (ersetzt eine offene). Returns: Gültigkeit in Sekunden"""
+        ttl = min(self.ttl, ttl if ttl is not None else self.ttl)
+        self._advance()
+        key = (namespace, address)
+        self._remove(key)
+        while len(self._entries) >= self.max_entries:
+            if not self._evict_one():
+                break
+        expires_at = self.clock() + ttl
+        # Aufrunden: der Slot wird erst geleert, wenn der Eintrag sicher abgelaufen ist
+        expiry_tick = max(int(math.ceil(expires_at / self.tick)), self._tick_now + 1)
+        self._entries[key] = (nonce, expires_at, expiry_tick)
+        self._slots[expiry_tick % self._slot_count][key] = None
+        self._evict_tick = min(self._evict_tick, expiry_tick)
+        self.issued += 1
+        return ttl
+
+    async def take(self, namespace: str, address: str, nonce: str) -> str:
+        """Prüft und verbraucht die Challenge -> TAKE_OK / TAKE_MISSING / TAKE_MISMATCH"""
+        self._advance()
+        key = (namespace, address)
+        entry = self._entries.get(key)
+        if entry is None:
+            return TAKE_MISSING
+        if entry[1] <= self.clock():
+            # Abgelaufen, aber der Slot ist noch nicht dran
+            self._remove(key)
+            self.expired += 1
+            return TAKE_MISSING
+        if not hmac.compare_digest(entry[0].encode(), str(nonce).encode()):
+            self.mismatches += 1
+            return TAKE_MISMATCH
+        self._remove(key)
+        self.taken += 1
+        return TAKE_OK
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "issued": self.issued,
+            "taken": self.taken,
+            "mismatches": self.mismatches,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+class SharedChallengeStore:
+    """Challenges in der Datenbank: alle Worker (und bei PostgreSQL alle Hosts) teilen sie"""
+
+    name = "shared"
+
+    def __init__(self, store, ttl: float = CHALLENGE_TTL_SECONDS, max_entries: int = CHALLENGE_MAX_ENTRIES,
+                 sweep_seconds: float = CHALLENGE_SWEEP_SECONDS):
+        if max_entries < 1:
+            raise ValueError(f"CHALLENGE_MAX_ENTRIES must be >= 1 (got {max_entries})")
+        self.store = store
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sweep_seconds = sweep_seconds
+        self.issued = 0
+        self.taken = 0
+        self.mismatches = 0
+        self.expired = 0
+        self.evicted = 0
+        self.entries: Optional[int] = None
+        self.last_error: Optional[str] = None
+
+    async def issue(self, namespace: str, address: str, nonce: str, ttl: Optional[float] = None) -> float:
+        """Legt die Challenge an (ersetzt eine offene). Returns: Gültigkeit in Sekunden"""
+        ttl = min(self.ttl, ttl if ttl is not None else self.ttl)
+        await self.store.challenges.issue(namespace, address, nonce, int(time.time() + ttl))
+        self.issued += 1
+        return ttl
+
+    async def take(self, namespace: str, address: str, nonce: str) -> str:
+        """Prüft und verbraucht die Challenge -> TAKE_OK / TAKE_MISSING / TAKE_MISMATCH"""
+        taken = await self.store.challenges.take(namespace, address, str(nonce), int(time.time()))
+        if taken:
+            self.taken += 1
+            return TAKE_OK
+        if taken is False:
+            self.mismatches += 1
+            return TAKE_MISMATCH
+        return TAKE_MISSING
+
+    async def sweep_once(self) -> Tuple[int, int]:
+        """Abgelaufene löschen, auf max_entries kappen. Returns: (expired, evicted)"""
+        expired, evicted = await self.store.challenges.sweep(int(time.time()), self.max_entries)
+        self.expired += expired
+        self.evicted += evicted
+        self.entries = await self.store.challenges.count()
+        return expired, evicted
+
+    async def run(self):
+        """Sweep-Schleife für den Server-Start (asyncio.create_task); jeder Worker darf sie laufen lassen"""
+        while True:
+            try:
+                await self.sweep_once()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+            await asyncio.sleep(self.sweep_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        # Zähler gelten für diesen Worker, entries für die ganze Tabelle (letzter Sweep)
+        return {
+            "backend": self.name,
+            "entries": self.entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "issued": self.issued,
+            "taken": self.taken,
+            "mismatches": self.mismatches,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "last_error": self.last_error,
+        }
+
+
+def create_challenge_store(store, kind: str = CHALLENGE_STORE):
+    """CHALLENGE_STORE=shared|memory (leer = shared)"""
+    if not kind or kind == "shared":
+        return SharedChallengeStore(store)
+    if kind == "memory":
+        return ChallengeStore()
+    raise ValueError(f"Unknown CHALLENGE_STORE: {kind}")
@@ -0,0 +1,629 @@
+"""
+VEra-Resonance — SQLite Connection Pool
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+Shared, pre-configured SQLite connections for server.py and airdrop_worker.py:
+- One pooled writer connection (plus overflow) for INSERT/UPDATE paths
+- A pool of read-only connections (mode=ro URI + query_only) for SELECT-only paths;
+  under WAL they never take write locks or queue behind the writer
+- PRAGMAs (WAL, cache_size, busy_timeout) applied once per connection
+- Pool statistics and separate read/write latency metrics for /api/debug
+- AsyncDatabase: awaitable reads/writes executed off the asyncio event loop
+- GroupCommitWriter: single writer thread batching concurrent writes into one commit
+"""
+
+import asyncio
+import bisect
+import functools
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from logger import db_logger
+
+# Datenbank-Konfiguration
+DATABASE_NAME = os.getenv("DATABASE_PATH", "./aera.db")
+DB_PATH = os.path.join(os.path.dirname(__file__), DATABASE_NAME.replace("./", ""))
+
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", 10000))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", 64000))  # 64MB Cache
+# Reader-Pool für Lese-Parallelität dimensioniert (Reads blockieren sich unter WAL nicht gegenseitig)
+DB_READER_POOL_SIZE = int(os.getenv("DB_READER_POOL_SIZE", max(4, os.cpu_count() or 4)))
+DB_WRITER_POOL_SIZE = int(os.getenv("DB_WRITER_POOL_SIZE", 1))
+DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", 8))
+# Writer: FULL = jeder Group Commit ist nach Rückkehr dauerhaft (fsync), NORMAL = schneller
+DB_WRITER_SYNCHRONOUS = os.getenv("DB_WRITER_SYNCHRONOUS", "FULL").upper()
+DB_GROUP_COMMIT_MS = float(os.getenv("DB_GROUP_COMMIT_MS", 2))
+DB_GROUP_COMMIT_MAX_BATCH = int(os.getenv("DB_GROUP_COMMIT_MAX_BATCH", 256))
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no pooled connection became free within the timeout"""
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3.Connection, die weiß ob sie zum festen Pool oder zum Overflow gehört"""
+    overflow = False
+
+
+class ReadOnlyConnection(PooledConnection):
+    """Reader-Verbindung: mode=ro URI + PRAGMA query_only (Schreibversuche -> sqlite3.OperationalError)"""
+    read_only = True
+
+
+class LatencyStats:
+    """Thread-sichere Latenz-Statistik mit festen Histogramm-Buckets (ms) für p50/p95/p99"""
+
+    BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self._total = 0
+        self._errors = 0
+        self._sum_ms = 0.0
+        self._max_ms = 0.0
+
+    def record(self, elapsed_ms: float, ok: bool = True):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.BUCKETS_MS, elapsed_ms)] += 1
+            self._total += 1
+            self._errors += 0 if ok else 1
+            self._sum_ms += elapsed_ms
+            self._max_ms = max(self._max_ms, elapsed_ms)
+
+    def _percentile(self, counts: List[int], total: int, q: float) -> Optional[float]:
+        """Obere Bucket-Grenze, unter der q der Aufrufe liegen (None = über dem größten Bucket)"""
+        threshold = q * total
+        seen = 0
+        for bound, count in zip(self.BUCKETS_MS, counts):
+            seen += count
+            if seen >= threshold:
+                return bound
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts, total = list(self._counts), self._total
+            data = {
+                "count": total,
+                "errors": self._errors,
+                "avg_ms": round(self._sum_ms / total, 3) if total else 0,
+                "max_ms": round(self._max_ms, 3),
+            }
+        for name, q in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+            data[name] = self._percentile(counts, total, q) if total else 0
+        return data
+
+
+class _Pool:
+    """Fixed-size connection pool with bounded overflow"""
+
+    def __init__(self, name: str, factory, size: int, max_overflow: int):
+        self.name = name
+        self._factory = factory
+        self._size = size
+        self._max_overflow = max_overflow
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._overflow = 0
+        self._in_use = 0
+        self._stats = {
+            "acquired": 0,
+            "waited": 0,
+            "wait_ms_total": 0.0,
+            "timeouts": 0,
+            "overflow_opened": 0,
+        }
+
+    def prefill(self):
+        """Open all pooled connections up front"""
+        with self._lock:
+            missing = self._size - self._created
+            self._created += max(missing, 0)
+        for _ in range(max(missing, 0)):
+            self._idle.put(self._factory())
+
+    def acquire(self, timeout: float) -> sqlite3.Connection:
+        # 1. Freie Verbindung aus dem Pool
+        try:
+            conn = self._idle.get_nowait()
+            self._mark_acquired(0.0)
+            return conn
+        except queue.Empty:
+            pass
+
+        # 2. Pool noch nicht voll oder Overflow erlaubt → neue Verbindung
+        with self._lock:
+            if self._created < self._size:
+                self._created += 1
+                overflow = False
+            elif self._overflow < self._max_overflow:
+                self._overflow += 1
+                self._stats["overflow_opened"] += 1
+                overflow = True
+            else:
+                overflow = None
+
+        if overflow is not None:
+            try:
+                conn = self._factory()
+            except Exception:
+                with self._lock:
+                    if overflow:
+                        self._overflow -= 1
+                    else:
+                        self._created -= 1
+                raise
+            conn.overflow = overflow
+            self._mark_acquired(0.0)
+            return conn
+
+        # 3. Warten bis eine Verbindung zurückgegeben wird
+        started = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise PoolTimeout(f"database is locked: no {self.name} connection free after {timeout}s")
+        waited_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._stats["waited"] += 1
+        self._mark_acquired(waited_ms)
+        return conn
+
+    def release(self, conn: PooledConnection):
+        with self._lock:
+            self._in_use -= 1
+        if conn.overflow:
+            conn.close()
+            with self._lock:
+                self._overflow -= 1
+            return
+        self._idle.put(conn)
+
+    def discard(self, conn: PooledConnection):
+        """Drop a broken connection instead of returning it to the pool"""
+        with self._lock:
+            self._in_use -= 1
+            if conn.overflow:
+                self._overflow -= 1
+            else:
+                self._created -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def _mark_acquired(self, waited_ms: float):
+        with self._lock:
+            self._in_use += 1
+            self._stats["acquired"] += 1
+            self._stats["wait_ms_total"] += waited_ms
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+            data.update({
+                "size": self._size,
+                "max_overflow": self._max_overflow,
+                "open": self._created + self._overflow,
+                "idle": self._idle.qsize(),
+                "in_use": self._in_use,
+                "overflow_in_use": self._overflow,
+            })
+        data["wait_ms_total"] = round(data["wait_ms_total"], 2)
+        return data
+
+
+class ConnectionPool:
+    """
+    Pool für SQLite-Verbindungen mit getrennten Reader- und Writer-Verbindungen
+
+    Beispiel:
+        with db_pool.reader() as conn:
+            conn.execute("SELECT ...")
+
+        with db_pool.writer() as conn:
+            conn.execute("UPDATE ...")   # commit beim Verlassen, rollback bei Exception
+    """
+
+    def __init__(
+        self,
+        path: str = DB_PATH,
+        readers: int = DB_READER_POOL_SIZE,
+        writers: int = DB_WRITER_POOL_SIZE,
+        max_overflow: int = DB_POOL_MAX_OVERFLOW,
+        busy_timeout_ms: int = DB_BUSY_TIMEOUT_MS,
+        cache_size_kb: int = DB_CACHE_SIZE_KB,
+    ):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kb = cache_size_kb
+        self._opened = False
+        self._open_lock = threading.Lock()
+        self._readers = _Pool("reader", self._connect_read_only, readers, max_overflow)
+        self._writers = _Pool("writer", functools.partial(self._connect, DB_WRITER_SYNCHRONOUS), writers, max_overflow)
+
+    def _connect(self, synchronous: str = "NORMAL") -> sqlite3.Connection:
+        """Öffnet und konfiguriert eine einzelne Verbindung (read-write)"""
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            timeout=self.busy_timeout_ms / 1000,
+            factory=PooledConnection,
+        )
+        self._configure(conn)
+        conn.execute(f"PRAGMA synchronous = {synchronous}")
+        db_logger.debug(f"DB Connection established: {self.path}")
+        return conn
+
+    def _connect_read_only(self) -> sqlite3.Connection:
+        """Öffnet eine read-only Verbindung (mode=ro URI, query_only)"""
+        uri = pathlib.Path(self.path).absolute().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            timeout=self.busy_timeout_ms / 1000,
+            factory=ReadOnlyConnection,
+        )
+        self._configure(conn)
+        conn.execute("PRAGMA query_only = ON")
+        db_logger.debug(f"DB read-only connection established: {self.path}")
+        return conn
+
+    def _configure(self, conn: sqlite3.Connection):
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA cache_size = -{self.cache_size_kb}")
+        conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms}")
+
+    def open(self):
+        """Setzt WAL-Modus (persistent in der DB-Datei) und füllt die Pools"""
+        with self._open_lock:
+            if self._opened:
+                return
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000)
+            try:
+                # Nur für neue DB-Dateien wirksam (bestehende: retention.py --enable-incremental-vacuum)
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("PRAGMA journal_mode=WAL")
+            finally:
+                conn.close()
+            self._writers.prefill()
+            self._readers.prefill()
+            self._opened = True
+        db_logger.info(f"DB Pool opened: {self.path} (writers={self._writers._size}, readers={self._readers._size})")
+
+    def close(self):
+        """Schließt alle freien Verbindungen (beim Shutdown)"""
+        self._readers.close()
+        self._writers.close()
+        self._opened = False
+
+    @contextmanager
+    def _lease(self, pool: _Pool, commit: bool):
+        if not self._opened:
+            self.open()
+        conn = pool.acquire(self.busy_timeout_ms / 1000)
+        try:
+            yield conn
+            if conn.in_transaction:
+                if commit:
+                    conn.commit()
+                else:
+                    conn.rollback()
+        except BaseException:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                pool.discard(conn)
+                raise
+            pool.release(conn)
+            raise
+        else:
+            pool.release(conn)
+
+    def reader(self):
+        """Leiht eine read-only Reader-Verbindung aus (nur SELECT)"""
+        return self._lease(self._readers, commit=False)
+
+    def writer(self):
+        """Leiht eine Writer-Verbindung aus; commit beim Verlassen des Blocks"""
+        return self._lease(self._writers, commit=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool-Statistiken für Monitoring"""
+        return {
+            "path": self.path,
+            "opened": self._opened,
+            "readers": self._readers.stats(),
+            "writers": self._writers.stats(),
+        }
+
+
+# Global instance
+db_pool = ConnectionPool()
+
+
+class _WriteJob:
+    __slots__ = ("fn", "args", "future", "loop")
+
+    def __init__(self, fn: Callable, args: tuple, future: asyncio.Future, loop: asyncio.AbstractEventLoop):
+        self.fn = fn
+        self.args = args
+        self.future = future
+        self.loop = loop
+
+
+def _resolve(future: asyncio.Future, ok: bool, value):
+    if future.done():
+        return
+    if ok:
+        future.set_result(value)
+    else:
+        future.set_exception(value)
+
+
+class GroupCommitWriter:
+    """
+    Single-Writer-Thread mit Group Commit
+
+    Schreib-Jobs vieler gleichzeitiger Requests werden gesammelt und in EINER
+    Transaktion (ein fsync) geschrieben. Jeder Job läuft in einem eigenen
+    SAVEPOINT - ein fehlerhafter Job wird zurückgerollt, ohne die anderen
+    Jobs der Gruppe zu verwerfen. Das Future eines Jobs wird erst nach dem
+    erfolgreichen COMMIT aufgelöst (Ergebnis = dauerhaft gespeichert).
+
+    Jobs dürfen selbst weder commit() noch rollback() aufrufen.
+    """
+
+    def __init__(self, pool: ConnectionPool, window_ms: float = DB_GROUP_COMMIT_MS,
+                 max_batch: int = DB_GROUP_COMMIT_MAX_BATCH):
+        self.pool = pool
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Optional[_WriteJob]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "jobs": 0,
+            "jobs_failed": 0,
+            "batches": 0,
+            "batches_failed": 0,
+            "max_batch_size": 0,
+            "commit_ms_total": 0.0,
+        }
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="aera-db-writer", daemon=True)
+                    self._thread.start()
+
+    def submit(self, fn: Callable, *args) -> asyncio.Future:
+        """Reiht fn(conn, *args) ein; Future wird nach dem Commit der Gruppe erfüllt"""
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put(_WriteJob(fn, args, future, loop))
+        return future
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _collect(self, first: _WriteJob) -> Tuple[List[_WriteJob], bool]:
+        """Sammelt bis zu max_batch Jobs innerhalb des Group-Commit-Fensters"""
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if job is None:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+            self._commit(batch)
+
+    def _commit(self, batch: List[_WriteJob]):
+        started = time.perf_counter()
+        results: List[Tuple[bool, Any]] = []
+        batch_failed = False
+        try:
+            with self.pool.writer() as conn:
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    for job in batch:
+                        conn.execute("SAVEPOINT job")
+                        try:
+                            value = job.fn(conn, *job.args)
+                        except Exception as e:
+                            conn.execute("ROLLBACK TO job")
+                            conn.execute("RELEASE job")
+                            results.append((False, e))
+                        else:
+                            conn.execute("RELEASE job")
+                            results.append((True, value))
+                    conn.commit()
+                except Exception:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    raise
+        except Exception as e:
+            db_logger.error(f"❌ Group commit failed ({len(batch)} jobs): {e}")
+            results = [(False, e)] * len(batch)
+            batch_failed = True
+
+        commit_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._stats["jobs"] += len(batch)
+            self._stats["jobs_failed"] += sum(1 for ok, _ in results if not ok)
+            self._stats["batches"] += 1
+            self._stats["batches_failed"] += int(batch_failed)
+            self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+            self._stats["commit_ms_total"] += commit_ms
+
+        for job, (ok, value) in zip(batch, results):
+            try:
+                job.loop.call_soon_threadsafe(_resolve, job.future, ok, value)
+            except RuntimeError:
+                pass  # Event Loop bereits geschlossen
+
+    def close(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+        data["queued"] = self.pending()
+        data["avg_batch_size"] = round(data["jobs"] / data["batches"], 2) if data["batches"] else 0
+        data["commit_ms_total"] = round(data["commit_ms_total"], 2)
+        return data
+
+
+class AsyncDatabase:
+    """
+    Awaitable Datenbankzugriffe, die nicht auf dem asyncio Event Loop laufen
+
+    - Lesezugriffe laufen auf einem Reader-Thread-Pool (eine Pool-Verbindung je Aufruf)
+    - Schreibzugriffe laufen über den GroupCommitWriter (ein Writer-Thread, Group Commit)
+
+    Beispiel:
+        user = await db.fetchone("SELECT * FROM users WHERE address=?", (address,))
+        await db.execute("UPDATE users SET score=? WHERE address=?", (score, address))
+        result = await db.transaction(apply_login, address)   # apply_login(conn, address)
+    """
+
+    def __init__(self, pool: ConnectionPool, read_workers: int = DB_READER_POOL_SIZE):
+        self.pool = pool
+        self.writer = GroupCommitWriter(pool)
+        self._read_workers = read_workers
+        self._read_executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending_reads = 0
+        self.read_latency = LatencyStats()
+        self.write_latency = LatencyStats()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._read_executor is None:
+            with self._lock:
+                if self._read_executor is None:
+                    self._read_executor = ThreadPoolExecutor(
+                        max_workers=self._read_workers, thread_name_prefix="aera-db-reader"
+                    )
+        return self._read_executor
+
+    # ----- Lesen -----
+
+    def _read(self, fn: Callable, *args):
+        with self.pool.reader() as conn:
+            return fn(conn, *args)
+
+    async def read(self, fn: Callable, *args):
+        """Führt fn(conn, *args) mit einer Reader-Verbindung im Thread-Pool aus"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._pending_reads += 1
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = await loop.run_in_executor(self._executor(), functools.partial(self._read, fn, *args))
+            ok = True
+            return result
+        finally:
+            # Latenz inkl. Wartezeit auf einen Reader-Thread
+            self.read_latency.record((time.perf_counter() - started) * 1000, ok)
+            with self._lock:
+                self._pending_reads -= 1
+
+    async def fetchone(self, sql: str, params: Sequence = ()) -> Optional[sqlite3.Row]:
+        return await self.read(lambda conn: conn.execute(sql, params).fetchone())
+
+    async def fetchall(self, sql: str, params: Sequence = ()) -> List[sqlite3.Row]:
+        return await self.read(lambda conn: conn.execute(sql, params).fetchall())
+
+    # ----- Schreiben -----
+
+    async def transaction(self, fn: Callable, *args):
+        """
+        Führt fn(conn, *args) atomar auf dem Writer-Thread aus
+
+        Kehrt erst zurück, wenn die Gruppe mit diesem Job committet ist.
+        """
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = await self.writer.submit(fn, *args)
+            ok = True
+            return result
+        finally:
+            # Latenz inkl. Warteschlange und Group-Commit-Fenster
+            self.write_latency.record((time.perf_counter() - started) * 1000, ok)
+
+    async def execute(self, sql: str, params: Sequence = ()) -> int:
+        """Einzelnes INSERT/UPDATE/DELETE; gibt rowcount zurück"""
+        return await self.transaction(lambda conn: conn.execute(sql, params).rowcount)
+
+    def close(self):
+        self.writer.close()
+        with self._lock:
+            executor, self._read_executor = self._read_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending_reads = self._pending_reads
+        return {
+            "pending_reads": pending_reads,
+            "latency": {
+                "read": self.read_latency.snapshot(),
+                "write": self.write_latency.snapshot(),
+            },
+            "group_commit": self.writer.stats(),
+            "pool": self.pool.stats(),
+        }
+
+
+db = AsyncDatabase(db_pool)
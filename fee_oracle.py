@@ -0,0 +1,167 @@
+"""
+VEra-Resonance — EIP-1559 Fee Oracle
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+Cached fee suggestions for transaction builders (Web3Service, airdrop_worker):
+- one eth_feeHistory call over the last FEE_HISTORY_BLOCKS blocks
+- maxPriorityFeePerGas = median of the FEE_PRIORITY_PERCENTILE rewards
+- maxFeePerGas = FEE_BASE_FEE_MULTIPLIER * next base fee + priority fee
+- cached for FEE_CACHE_TTL_SECONDS (about one block), dropped early as soon
+  as a newer block is observed (observe_block)
+- falls back to eth_gasPrice if the node does not support eth_feeHistory
+
+FeeOracle wraps a synchronous Web3 instance, AsyncFeeOracle an AsyncWeb3 one;
+both share the cache and fee calculation. Concurrent callers share one RPC call.
+"""
+
+import asyncio
+import os
+import statistics
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+FEE_HISTORY_BLOCKS = int(os.getenv("FEE_HISTORY_BLOCKS", 10))
+FEE_PRIORITY_PERCENTILE = float(os.getenv("FEE_PRIORITY_PERCENTILE", 50))
+FEE_BASE_FEE_MULTIPLIER = float(os.getenv("FEE_BASE_FEE_MULTIPLIER", 2))
+FEE_CACHE_TTL_SECONDS = float(os.getenv("FEE_CACHE_TTL_SECONDS", 2))
+# Untergrenze für das Trinkgeld (leere Blöcke liefern reward = 0)
+FEE_MIN_PRIORITY_WEI = int(os.getenv("FEE_MIN_PRIORITY_WEI", 1_000_000))
+
+
+def fees_from_history(history, multiplier: float = FEE_BASE_FEE_MULTIPLIER,
+                      min_priority: int = FEE_MIN_PRIORITY_WEI) -> Dict[str, int]:
+    """eth_feeHistory-Ergebnis -> {maxFeePerGas, maxPriorityFeePerGas}"""
+    # baseFeePerGas hat einen Eintrag mehr als reward: der letzte ist der Base Fee des nächsten Blocks
+    next_base_fee = int(history["baseFeePerGas"][-1])
+    rewards = [int(block[0]) for block in history.get("reward") or [] if block]
+    priority = max(int(statistics.median(rewards)) if rewards else 0, min_priority)
+    return {
+        "maxFeePerGas": int(next_base_fee * multiplier) + priority,
+        "maxPriorityFeePerGas": priority,
+    }
+
+
+def fees_from_gas_price(gas_price: int) -> Dict[str, int]:
+    """Fallback ohne eth_feeHistory (bisheriges Verhalten)"""
+    return {"maxFeePerGas": int(gas_price) * 2, "maxPriorityFeePerGas": int(gas_price)}
+
+
+def _latest_block(history) -> Optional[int]:
+    oldest = history.get("oldestBlock")
+    if oldest is None:
+        return None
+    if isinstance(oldest, str):
+        oldest = int(oldest, 16)
+    return int(oldest) + len(history["baseFeePerGas"]) - 2
+
+
+class _FeeCache:
+    """Cache + Statistik, gemeinsam für die sync- und async-Variante"""
+
+    def __init__(self, w3, ttl: float = FEE_CACHE_TTL_SECONDS, blocks: int = FEE_HISTORY_BLOCKS,
+                 percentile: float = FEE_PRIORITY_PERCENTILE):
+        self.w3 = w3
+        self.ttl = ttl
+        self.blocks = blocks
+        self.percentile = percentile
+        self._fees: Optional[Dict[str, int]] = None
+        self._block: Optional[int] = None
+        self._fetched_at = 0.0
+        self._fee_history_supported = True
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self) -> Optional[Dict[str, int]]:
+        if self._fees is not None and time.monotonic() - self._fetched_at < self.ttl:
+            self.hits += 1
+            return dict(self._fees)
+        return None
+
+    def _store(self, fees: Dict[str, int], block: Optional[int]) -> Dict[str, int]:
+        self._fees = fees
+        self._block = block
+        self._fetched_at = time.monotonic()
+        self.misses += 1
+        return dict(fees)
+
+    def _fee_history_failed(self, error: Exception):
+        # Nur "Methode unbekannt" schaltet dauerhaft um, sonst nur dieser Aufruf per gas_price
+        message = str(error).lower()
+        if "-32601" in message or "not found" in message or "not supported" in message or "does not exist" in message:
+            self._fee_history_supported = False
+        logger.warning(f"⚠️ eth_feeHistory failed, falling back to eth_gasPrice: {error}")
+
+    def observe_block(self, block_number: int):
+        """Neuer Block gesehen (z.B. aus einem Receipt) -> Cache verwerfen"""
+        if self._block is not None and block_number > self._block:
+            self._fees = None
+
+    def invalidate(self):
+        self._fees = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "fees": self._fees,
+            "block": self._block,
+            "age_s": round(time.monotonic() - self._fetched_at, 3) if self._fees else None,
+            "fee_history": self._fee_history_supported,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class FeeOracle(_FeeCache):
+    """Fee-Oracle für synchrones Web3 (airdrop_worker)"""
+
+    def __init__(self, w3, **kwargs):
+        super().__init__(w3, **kwargs)
+        self._lock = threading.Lock()
+
+    def fees(self) -> Dict[str, int]:
+        cached = self._cached()
+        if cached is not None:
+            return cached
+        with self._lock:
+            cached = self._cached()
+            if cached is not None:
+                return cached
+            if self._fee_history_supported:
+                try:
+                    history = self.w3.eth.fee_history(self.blocks, "latest", [self.percentile])
+                    return self._store(fees_from_history(history), _latest_block(history))
+                except Exception as e:
+                    self._fee_history_failed(e)
+            return self._store(fees_from_gas_price(self.w3.eth.gas_price), None)
+
+
+class AsyncFeeOracle(_FeeCache):
+    """Fee-Oracle für AsyncWeb3 (Web3Service)"""
+
+    def __init__(self, w3, **kwargs):
+        super().__init__(w3, **kwargs)
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def fees(self) -> Dict[str, int]:
+        cached = self._cached()
+        if cached is not None:
+            return cached
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Wer auf den Lock gewartet hat, bekommt das Ergebnis des Vorgängers
+            cached = self._cached()
+            if cached is not None:
+                return cached
+            if self._fee_history_supported:
+                try:
+                    history = await self.w3.eth.fee_history(self.blocks, "latest", [self.percentile])
+                    return self._store(fees_from_history(history), _latest_block(history))
+                except Exception as e:
+                    self._fee_history_failed(e)
+            return self._store(fees_from_gas_price(await self.w3.eth.gas_price), None)
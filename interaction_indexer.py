@@ -0,0 +1,185 @@
+"""
+VEra-Resonance — InteractionRecorded Indexer
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+Background indexer for ResonanceRegistry.InteractionRecorded events:
+- follows the registry from RESONANCE_REGISTRY_DEPLOY_BLOCK with the adaptive LogScanner
+  (chunks start at INDEXER_BATCH_BLOCKS and shrink/grow with the result density)
+- only indexes blocks at least INDEXER_CONFIRMATIONS deep (no reorg handling needed)
+- decoded events and the checkpoint are written in the same transaction,
+  so a restart continues exactly where it stopped (idempotent inserts)
+- /api/blockchain/interactions reads the interactions table (full history, real totals)
+
+Usage:
+    python interaction_indexer.py   # catch up once and print the checkpoint
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from logger import blockchain_logger
+
+# ===== KONFIGURATION =====
+REGISTRY_DEPLOY_BLOCK = int(os.getenv("RESONANCE_REGISTRY_DEPLOY_BLOCK", 0))
+INDEXER_CONFIRMATIONS = int(os.getenv("INDEXER_CONFIRMATIONS", 12))
+# BASE Sepolia RPC begrenzt eth_getLogs auf 100k Blöcke
+INDEXER_BATCH_BLOCKS = int(os.getenv("INDEXER_BATCH_BLOCKS", 2000))
+INDEXER_POLL_SECONDS = float(os.getenv("INDEXER_POLL_SECONDS", 10))
+INDEXER_ENABLED = os.getenv("INDEXER_ENABLED", "true").lower() == "true"
+
+CHECKPOINT_NAME = "resonance_registry.InteractionRecorded"
+
+_TABLE = """
+    CREATE TABLE IF NOT EXISTS interactions (
+        block_number {int} NOT NULL,
+        log_index INTEGER NOT NULL,
+        tx_hash TEXT NOT NULL,
+        follower TEXT NOT NULL,
+        creator TEXT NOT NULL,
+        link_id TEXT,
+        action_type INTEGER,
+        weight_follower {int},
+        weight_creator {int},
+        timestamp {int},
+        PRIMARY KEY (block_number, log_index)
+    )
+"""
+
+_CHECKPOINTS = """
+    CREATE TABLE IF NOT EXISTS indexer_checkpoints (
+        name TEXT PRIMARY KEY,
+        block {int} NOT NULL,
+        updated_at {int}
+    )
+"""
+
+_INDEXES = [
+    # Keyset-Pagination je Rolle: neueste zuerst
+    "CREATE INDEX IF NOT EXISTS idx_interactions_follower ON interactions(follower, block_number, log_index)",
+    "CREATE INDEX IF NOT EXISTS idx_interactions_creator ON interactions(creator, block_number, log_index)",
+]
+
+# DDL für Migration 8 (SQLite) bzw. PostgreSQL-Migration 4
+SCHEMA = [_TABLE.format(int="INTEGER"), _CHECKPOINTS.format(int="INTEGER"), *_INDEXES]
+POSTGRES_SCHEMA = [_TABLE.format(int="BIGINT"), _CHECKPOINTS.format(int="BIGINT"), *_INDEXES]
+
+
+def decode_log(log) -> Dict[str, Any]:
+    """Dekodiertes InteractionRecorded-Log -> Zeile für die interactions-Tabelle"""
+    args = log["args"]
+    return {
+        "block_number": int(log["blockNumber"]),
+        "log_index": int(log["logIndex"]),
+        "tx_hash": log["transactionHash"].hex(),
+        "follower": args["follower"].lower(),
+        "creator": args["creator"].lower(),
+        "link_id": args["linkId"].hex(),
+        "action_type": int(args["actionType"]),
+        "weight_follower": int(args["weightFollower"]),
+        "weight_creator": int(args["weightCreator"]),
+        "timestamp": int(args["timestamp"]),
+    }
+
+
+class InteractionIndexer:
+    """Folgt der ResonanceRegistry und schreibt bestätigte Events in die Datenbank"""
+
+    def __init__(self, service, store, deploy_block: int = REGISTRY_DEPLOY_BLOCK,
+                 confirmations: int = INDEXER_CONFIRMATIONS, batch_blocks: int = INDEXER_BATCH_BLOCKS,
+                 poll_seconds: float = INDEXER_POLL_SECONDS):
+        self.service = service
+        self.store = store
+        self.deploy_block = deploy_block
+        self.confirmations = confirmations
+        # Import hier: migrations.py lädt dieses Modul nur für das Schema (ohne Web3Service)
+        from web3_service import LogScanner
+        self.scanner = LogScanner(initial_blocks=batch_blocks)
+        self.poll_seconds = poll_seconds
+        self.indexed_block: Optional[int] = None
+        self.head_block: Optional[int] = None
+        self.events_stored = 0
+        self.last_error: Optional[str] = None
+
+    async def _fetch(self, from_block: int, to_block: int) -> List[Dict[str, Any]]:
+        logs = await self.service.resonance_registry.events.InteractionRecorded.get_logs(
+            fromBlock=from_block,
+            toBlock=to_block
+        )
+        return [decode_log(log) for log in logs]
+
+    async def sync_once(self) -> int:
+        """Holt alle bestätigten Blöcke seit dem Checkpoint nach. Returns: Anzahl neuer Events"""
+        await self.service.open()
+        checkpoint = await self.store.interactions.checkpoint(CHECKPOINT_NAME)
+        start = self.deploy_block if checkpoint is None else checkpoint + 1
+        self.head_block = await self.service.w3.eth.block_number
+        safe_block = self.head_block - self.confirmations
+        stored = 0
+
+        async def on_progress(cursor: int, rows: List[Dict[str, Any]]):
+            nonlocal stored
+            # Events + Checkpoint atomar, Cursor = letzter lückenlos gescannter Block
+            stored += await self.store.interactions.store(rows, CHECKPOINT_NAME, cursor)
+            self.indexed_block = cursor
+
+        # Ergebnisse stehen bereits in der DB -> nicht zusätzlich im Speicher sammeln
+        await self.scanner.scan(self._fetch, start, safe_block, on_progress=on_progress, collect=False)
+        if checkpoint is not None and self.indexed_block is None:
+            self.indexed_block = checkpoint
+        self.events_stored += stored
+        return stored
+
+    async def run(self):
+        """Endlosschleife für den Server-Start (asyncio.create_task)"""
+        blockchain_logger.info(
+            f"🔎 Interaction indexer started (from block {self.deploy_block}, {self.confirmations} confirmations)"
+        )
+        while True:
+            try:
+                stored = await self.sync_once()
+                self.last_error = None
+                if stored:
+                    blockchain_logger.info(f"🔎 Indexed {stored} interactions up to block {self.indexed_block}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                blockchain_logger.warning(f"⚠️ Interaction indexer error: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        lag = self.head_block - self.indexed_block if self.head_block is not None and self.indexed_block is not None else None
+        return {
+            "indexed_block": self.indexed_block,
+            "head_block": self.head_block,
+            "lag_blocks": lag,
+            "confirmations": self.confirmations,
+            "events_stored": self.events_stored,
+            "scanner": self.scanner.stats(),
+            "last_error": self.last_error,
+        }
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    from storage import storage
+    from web3_service import web3_service
+
+    async def main():
+        await storage.open()
+        try:
+            indexer = InteractionIndexer(web3_service, storage)
+            started = time.perf_counter()
+            stored = await indexer.sync_once()
+            print(f"✓ {stored} interactions indexed in {time.perf_counter() - started:.1f}s")
+            for key, value in indexer.stats().items():
+                print(f"   {key}: {value}")
+        finally:
+            await web3_service.close()
+            await storage.close()
+
+    asyncio.run(main())
@@ -0,0 +1,161 @@
+"""
+VEra-Resonance — Challenge Store Load Test
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+Measures how /admin/challenge -> /admin/verify-signature scales with uvicorn workers:
+- starts `uvicorn server:app --workers N` per run (fresh SQLite file, CHALLENGE_STORE=shared,
+  no background jobs, SIG_WORKERS=0 so one worker = one core)
+- client processes issue a challenge and immediately verify it with a dummy signature;
+  the server answers "Invalid signature"/"Signature mismatch" when the challenge was found,
+  "No challenge found" when the verifying worker could not see it (cross-worker miss)
+- prints throughput, speedup vs. the first run and cross-worker misses per worker count
+
+What to expect: every issue/take is a write, and on SQLite all workers share one writer
+(group commit, DB_WRITER_SYNCHRONOUS=FULL), so challenge throughput is bounded by the
+writer, not by the worker count - extra workers only help the CPU-bound parts of a login
+(signature recovery, JSON). The number to watch is "cross-worker misses", which must stay 0.
+PostgreSQL (DATABASE_URL) runs the writes concurrently.
+
+Usage:
+    python loadtest_challenges.py                      # workers 1 2 4
+    python loadtest_challenges.py 1 2 4 8 --requests=20000 --concurrency=128 --clients=4
+"""
+
+import asyncio
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+import aiohttp
+
+LOADTEST_PORT = int(os.getenv("LOADTEST_PORT", 8870))
+DUMMY_SIGNATURE = "0x" + "11" * 65
+
+
+def _option(name: str, default: int) -> int:
+    for arg in sys.argv[1:]:
+        if arg.startswith(f"--{name}="):
+            return int(arg.split("=", 1)[1])
+    return default
+
+
+async def _client(url: str, requests: int, concurrency: int) -> Dict[str, Any]:
+    """Ein Client-Prozess: requests Challenge/Verify-Paare mit concurrency parallelen Schleifen"""
+    counts = {"found": 0, "missing": 0, "errors": 0}
+    latencies: List[float] = []
+    remaining = requests
+
+    async def loop(session: aiohttp.ClientSession):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            owner = "0x" + secrets.token_hex(20)
+            started = time.perf_counter()
+            try:
+                async with session.post(f"{url}/admin/challenge", json={"owner": owner}) as resp:
+                    nonce = (await resp.json())["nonce"]
+                async with session.post(f"{url}/admin/verify-signature",
+                                        json={"owner": owner, "nonce": nonce, "signature": DUMMY_SIGNATURE}) as resp:
+                    error = (await resp.json()).get("error", "")
+            except Exception:
+                counts["errors"] += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            if error.startswith("No challenge found"):
+                counts["missing"] += 1
+            elif error.startswith(("Invalid signature", "Signature mismatch")):
+                counts["found"] += 1
+            else:
+                counts["errors"] += 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*[loop(session) for _ in range(concurrency)])
+    return {**counts, "latencies": latencies}
+
+
+def _client_process(url: str, requests: int, concurrency: int) -> Dict[str, Any]:
+    return asyncio.run(_client(url, requests, concurrency))
+
+
+def _start_server(workers: int, db_path: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DATABASE_PATH": db_path,
+        "DATABASE_URL": "",
+        "CHALLENGE_STORE": "shared",
+        "SIG_WORKERS": "0",
+        "TX_PIPELINE_ENABLED": "false",
+        "INDEXER_ENABLED": "false",
+        "BACKGROUND_LOCK_FILE": f"{db_path}.background.lock",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(LOADTEST_PORT),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+async def _wait_ready(url: str, workers: int, timeout: float = 60):
+    """Wartet, bis /api/health antwortet (und gibt den übrigen Workern kurz Zeit)"""
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{url}/api/health") as resp:
+                    if resp.status == 200:
+                        await asyncio.sleep(0.5 * workers)
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"Server not ready after {timeout}s")
+
+
+def run(workers: int, requests: int, concurrency: int, clients: int) -> Dict[str, Any]:
+    url = f"http://127.0.0.1:{LOADTEST_PORT}"
+    with tempfile.TemporaryDirectory() as tmp:
+        server = _start_server(workers, os.path.join(tmp, "loadtest.db"))
+        try:
+            asyncio.run(_wait_ready(url, workers))
+            started = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=clients) as pool:
+                results = list(pool.map(_client_process, [url] * clients,
+                                        [requests // clients] * clients, [concurrency // clients or 1] * clients))
+            elapsed = time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    latencies = sorted(ms for result in results for ms in result["latencies"])
+    total = {key: sum(result[key] for result in results) for key in ("found", "missing", "errors")}
+    return {
+        "workers": workers,
+        **total,
+        "pairs_per_s": round(total["found"] / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2], 1) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)], 1) if latencies else None,
+    }
+
+
+if __name__ == "__main__":
+    worker_counts = [int(arg) for arg in sys.argv[1:] if arg.isdigit()] or [1, 2, 4]
+    requests = _option("requests", 10000)
+    concurrency = _option("concurrency", 64)
+    clients = _option("clients", min(4, os.cpu_count() or 1))
+    print(f"Challenge/verify pairs: {requests}, concurrency {concurrency}, {clients} client processes")
+
+    baseline = None
+    for workers in worker_counts:
+        result = run(workers, requests, concurrency, clients)
+        baseline = baseline or result["pairs_per_s"]
+        speedup = result["pairs_per_s"] / baseline if baseline else 0
+        print(f"   workers={workers:<3} {result['pairs_per_s']:>9}/s  speedup {speedup:4.2f}x "
+              f"(ideal {workers / worker_counts[0]:.0f}x)  p50 {result['p50_ms']}ms  p99 {result['p99_ms']}ms  "
+              f"cross-worker misses {result['missing']}  errors {result['errors']}")
@@ -0,0 +1,534 @@
+"""
+VEra-Resonance — Schema Migrations
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+Versioned, idempotent schema upgrades for the SQLite database:
+- schema_version table records every applied migration
+- each migration runs in its own transaction
+- indexes for the hot query paths of server.py and airdrop_worker.py
+- EXPLAIN QUERY PLAN check that fails when a hot query falls back to a table scan
+
+Usage:
+    python migrations.py            # apply pending migrations
+    python migrations.py --check    # apply + verify query plans (exit code 1 on scan)
+"""
+
+import sqlite3
+import sys
+import time
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+from logger import db_logger
+import chain_jobs
+import challenge_store
+import interaction_indexer
+import retention
+import rollups
+import stats
+import tx_pipeline
+
+Step = Union[str, Callable[[sqlite3.Connection], None]]
+
+
+class QueryPlanError(RuntimeError):
+    """Raised when a hot query is executed with a full table scan"""
+
+
+def add_column(table: str, column: str, definition: str) -> Callable[[sqlite3.Connection], None]:
+    """ALTER TABLE ... ADD COLUMN, nur wenn die Spalte noch nicht existiert"""
+    def step(conn: sqlite3.Connection):
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    step.__name__ = f"add_column_{table}_{column}"
+    return step
+
+
+# ===== MIGRATIONEN =====
+# (version, beschreibung, schritte) - bestehende Einträge niemals ändern, nur neue anhängen!
+MIGRATIONS: List[Tuple[int, str, Sequence[Step]]] = [
+    (1, "Basis-Tabellen (users, events, airdrops, followers)", [
+        # Users-Tabelle (erweitert mit owner_wallet für Follower-Tracking)
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            address TEXT PRIMARY KEY,
+            first_seen INTEGER,
+            last_login INTEGER,
+            score INTEGER DEFAULT 50,
+            login_count INTEGER DEFAULT 0,
+            created_at TEXT,
+            first_referrer TEXT,
+            last_referrer TEXT,
+            owner_wallet TEXT,
+            is_verified_follower INTEGER DEFAULT 0,
+            display_name TEXT
+        )
+        """,
+        # Events-Tabelle für Audit-Trail (erweitert mit referrer)
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            address TEXT,
+            event_type TEXT,
+            score_before INTEGER,
+            score_after INTEGER,
+            timestamp INTEGER,
+            created_at TEXT,
+            referrer TEXT,
+            user_agent TEXT,
+            ip_address TEXT,
+            owner_wallet TEXT
+        )
+        """,
+        # Airdrops-Tabelle für Tracking
+        """
+        CREATE TABLE IF NOT EXISTS airdrops (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            address TEXT UNIQUE,
+            amount REAL,
+            tx_hash TEXT,
+            status TEXT,
+            created_at TEXT
+        )
+        """,
+        # Followers-Tabelle: Link Owner <-> Follower
+        """
+        CREATE TABLE IF NOT EXISTS followers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            owner_wallet TEXT NOT NULL,
+            follower_address TEXT NOT NULL,
+            follower_score INTEGER,
+            follower_display_name TEXT,
+            verified_at TEXT,
+            source_platform TEXT,
+            verified BOOLEAN DEFAULT 1,
+            follow_confirmed BOOLEAN DEFAULT 0,
+            confirmed_at TEXT,
+            UNIQUE(owner_wallet, follower_address),
+            FOREIGN KEY(owner_wallet) REFERENCES users(address),
+            FOREIGN KEY(follower_address) REFERENCES users(address)
+        )
+        """,
+    ]),
+    (2, "Spalten für HYBRID-Score und Blockchain-Integration", [
+        add_column("users", "pending_bonus", "INTEGER DEFAULT 0"),
+        add_column("users", "identity_status", "TEXT DEFAULT 'pending'"),
+        add_column("users", "identity_nft_token_id", "INTEGER"),
+        add_column("users", "identity_minted_at", "TEXT"),
+        add_column("users", "identity_mint_tx_hash", "TEXT"),
+        add_column("users", "blockchain_score", "INTEGER DEFAULT 0"),
+        add_column("users", "blockchain_score_synced_at", "TEXT"),
+        add_column("users", "last_blockchain_sync", "TEXT"),
+    ]),
+    (3, "Indexe für Hot Queries", [
+        # /api/events/{address}: WHERE address=? ORDER BY timestamp DESC
+        "CREATE INDEX IF NOT EXISTS idx_events_address_ts ON events(address, timestamp DESC)",
+        # /api/referrer-stats: WHERE timestamp > ? GROUP BY referrer (24h, covering)
+        # und GROUP BY referrer (gesamt, Index-Scan statt Table-Scan)
+        "CREATE INDEX IF NOT EXISTS idx_events_ts_referrer ON events(timestamp, referrer)",
+        # /api/stats: WHERE event_type='login'
+        "CREATE INDEX IF NOT EXISTS idx_events_type ON events(event_type)",
+        # /api/referrer-stats: GROUP BY first_referrer
+        "CREATE INDEX IF NOT EXISTS idx_users_first_referrer ON users(first_referrer)",
+        # Startup Sync-Scan: WHERE score >= 10 ORDER BY score DESC
+        "CREATE INDEX IF NOT EXISTS idx_users_score ON users(score)",
+        # /api/blockchain/stats: WHERE identity_status='active'
+        "CREATE INDEX IF NOT EXISTS idx_users_identity_status ON users(identity_status)",
+        # /admin/followers: WHERE owner_wallet=? ORDER BY verified_at DESC
+        "CREATE INDEX IF NOT EXISTS idx_followers_owner_verified ON followers(owner_wallet, verified_at DESC)",
+        # airdrop_worker: WHERE follow_confirmed=0 AND verified=1 ORDER BY verified_at
+        """CREATE INDEX IF NOT EXISTS idx_followers_reward_pending ON followers(verified_at)
+           WHERE follow_confirmed = 0 AND verified = 1""",
+        # /api/blockchain/stats: WHERE follow_confirmed=1
+        """CREATE INDEX IF NOT EXISTS idx_followers_confirmed ON followers(follow_confirmed)
+           WHERE follow_confirmed = 1""",
+    ]),
+    (4, "Statistik-Zähler (stats_counters + Trigger)", [
+        *stats.SCHEMA,
+        # Backfill aus den bestehenden Daten
+        stats.rebuild_stats,
+    ]),
+    (5, "Stündliche Referrer-Rollups (Signups + Events)", [
+        *rollups.SCHEMA,
+        # Backfill aus den bestehenden Daten
+        rollups.rebuild_rollups,
+    ]),
+    (6, "Keyset-Indexe für Cursor-Pagination", [
+        # (address, timestamp) + implizite rowid: rückwärts gelesen = ORDER BY timestamp DESC, id DESC
+        "DROP INDEX IF EXISTS idx_events_address_ts",
+        "CREATE INDEX IF NOT EXISTS idx_events_address_keyset ON events(address, timestamp)",
+        # (owner_wallet, verified_at) + implizite rowid: ORDER BY verified_at DESC, id DESC
+        "DROP INDEX IF EXISTS idx_followers_owner_verified",
+        "CREATE INDEX IF NOT EXISTS idx_followers_owner_keyset ON followers(owner_wallet, verified_at)",
+    ]),
+    (7, "Events-Retention (events_daily + Timestamp-Index)", [
+        *retention.SCHEMA,
+    ]),
+    (8, "InteractionRecorded-Index (interactions + indexer_checkpoints)", [
+        *interaction_indexer.SCHEMA,
+    ]),
+    (9, "Transaktions-Outbox (tx_outbox)", [
+        *tx_pipeline.SCHEMA,
+    ]),
+    (10, "Geteilte Login-Nonces und Dashboard-Challenges (auth_challenges)", [
+        *challenge_store.SCHEMA,
+    ]),
+    (11, "Blockchain-Jobs nach dem Login (chain_jobs)", [
+        *chain_jobs.SCHEMA,
+    ]),
+    (12, "Cache-Abgleich der Worker über tx_outbox.updated_at", [
+        *tx_pipeline.FOLLOW_SCHEMA,
+    ]),
+]
+
+
+
+# ===== POSTGRESQL =====
+# Eigene Versionsfolge für das PostgreSQL-Backend (storage.py, DATABASE_URL=postgresql://...)
+# Schema entspricht dem SQLite-Stand; BOOLEAN-Spalten bleiben INTEGER (0/1) wie in SQLite,
+# Foreign Keys werden wie in SQLite nicht erzwungen.
+POSTGRES_MIGRATIONS: List[Tuple[int, str, Sequence[str]]] = [
+    (1, "Basis-Tabellen und Indexe", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            address TEXT PRIMARY KEY,
+            first_seen BIGINT,
+            last_login BIGINT,
+            score INTEGER DEFAULT 50,
+            login_count INTEGER DEFAULT 0,
+            created_at TEXT,
+            first_referrer TEXT,
+            last_referrer TEXT,
+            owner_wallet TEXT,
+            is_verified_follower INTEGER DEFAULT 0,
+            display_name TEXT,
+            pending_bonus INTEGER DEFAULT 0,
+            identity_status TEXT DEFAULT 'pending',
+            identity_nft_token_id BIGINT,
+            identity_minted_at TEXT,
+            identity_mint_tx_hash TEXT,
+            blockchain_score INTEGER DEFAULT 0,
+            blockchain_score_synced_at TEXT,
+            last_blockchain_sync TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            id BIGSERIAL PRIMARY KEY,
+            address TEXT,
+            event_type TEXT,
+            score_before INTEGER,
+            score_after INTEGER,
+            timestamp BIGINT,
+            created_at TEXT,
+            referrer TEXT,
+            user_agent TEXT,
+            ip_address TEXT,
+            owner_wallet TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS airdrops (
+            id BIGSERIAL PRIMARY KEY,
+            address TEXT UNIQUE,
+            amount DOUBLE PRECISION,
+            tx_hash TEXT,
+            status TEXT,
+            created_at TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS followers (
+            id BIGSERIAL PRIMARY KEY,
+            owner_wallet TEXT NOT NULL,
+            follower_address TEXT NOT NULL,
+            follower_score INTEGER,
+            follower_display_name TEXT,
+            verified_at TEXT,
+            source_platform TEXT,
+            verified INTEGER DEFAULT 1,
+            follow_confirmed INTEGER DEFAULT 0,
+            confirmed_at TEXT,
+            UNIQUE(owner_wallet, follower_address)
+        )
+        """,
+        # Keine implizite rowid: id explizit als letzte Keyset-Spalte
+        "CREATE INDEX IF NOT EXISTS idx_events_address_keyset ON events(address, timestamp, id)",
+        "CREATE INDEX IF NOT EXISTS idx_events_ts_referrer ON events(timestamp, referrer)",
+        "CREATE INDEX IF NOT EXISTS idx_events_type ON events(event_type)",
+        "CREATE INDEX IF NOT EXISTS idx_users_first_referrer ON users(first_referrer)",
+        "CREATE INDEX IF NOT EXISTS idx_users_score ON users(score)",
+        "CREATE INDEX IF NOT EXISTS idx_users_identity_status ON users(identity_status)",
+        "CREATE INDEX IF NOT EXISTS idx_followers_owner_keyset ON followers(owner_wallet, verified_at, id)",
+        """CREATE INDEX IF NOT EXISTS idx_followers_reward_pending ON followers(verified_at)
+           WHERE follow_confirmed = 0 AND verified = 1""",
+        """CREATE INDEX IF NOT EXISTS idx_followers_confirmed ON followers(follow_confirmed)
+           WHERE follow_confirmed = 1""",
+    ]),
+    (2, "Statistik-Zähler (stats_counters + Trigger)", [
+        *stats.POSTGRES_SCHEMA,
+        *stats.REBUILD_SQL,
+    ]),
+    (3, "Stündliche Referrer-Rollups (Signups + Events)", [
+        *rollups.POSTGRES_SCHEMA,
+        *rollups.REBUILD_SQL,
+    ]),
+    (4, "InteractionRecorded-Index (interactions + indexer_checkpoints)", [
+        *interaction_indexer.POSTGRES_SCHEMA,
+    ]),
+    (5, "Transaktions-Outbox (tx_outbox)", [
+        *tx_pipeline.POSTGRES_SCHEMA,
+    ]),
+    (6, "Geteilte Login-Nonces und Dashboard-Challenges (auth_challenges)", [
+        *challenge_store.POSTGRES_SCHEMA,
+    ]),
+    (7, "Blockchain-Jobs nach dem Login (chain_jobs)", [
+        *chain_jobs.POSTGRES_SCHEMA,
+    ]),
+    (8, "Cache-Abgleich der Worker über tx_outbox.updated_at", [
+        *tx_pipeline.FOLLOW_SCHEMA,
+    ]),
+]
+
+# Beliebige, feste Lock-ID: mehrere API-Nodes migrieren nie gleichzeitig
+POSTGRES_MIGRATION_LOCK = 0x61657261
+
+
+async def run_postgres_migrations(conn) -> int:
+    """
+    Wendet alle ausstehenden PostgreSQL-Migrationen an (asyncpg-Verbindung)
+
+    Ein Advisory Lock serialisiert parallel startende API-Nodes.
+    Returns: neue Schema-Version
+    """
+    await conn.execute("SELECT pg_advisory_lock($1)", POSTGRES_MIGRATION_LOCK)
+    try:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at BIGINT
+            )
+        """)
+        version = await conn.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        for target, description, steps in POSTGRES_MIGRATIONS:
+            if target <= version:
+                continue
+            started = time.perf_counter()
+            try:
+                async with conn.transaction():
+                    for step in steps:
+                        await conn.execute(step)
+                    await conn.execute(
+                        "INSERT INTO schema_version (version, description, applied_at) VALUES ($1, $2, $3)",
+                        target, description, int(time.time())
+                    )
+            except Exception:
+                db_logger.error(f"❌ PostgreSQL migration {target} failed: {description}")
+                raise
+            version = target
+            db_logger.info(f"✓ PostgreSQL migration {target} applied: {description} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+        return version
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", POSTGRES_MIGRATION_LOCK)
+
+def _ensure_version_table(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at INTEGER
+        )
+    """)
+    conn.commit()
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """Höchste angewendete Migration (0 = leere Datenbank)"""
+    _ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def run_migrations(conn: sqlite3.Connection) -> int:
+    """
+    Wendet alle ausstehenden Migrationen an
+
+    Jede Migration läuft in einer eigenen Transaktion; bei einem Fehler
+    wird nur diese Migration zurückgerollt. Returns: neue Schema-Version
+
+    Mehrere Prozesse (uvicorn-Worker, airdrop_worker) dürfen gleichzeitig starten:
+    die Version wird unter der Schreibsperre (BEGIN IMMEDIATE) erneut gelesen,
+    eine inzwischen von einem anderen Prozess angewendete Migration wird übersprungen.
+    """
+    version = current_version(conn)
+    for target, description, steps in MIGRATIONS:
+        if target <= version:
+            continue
+        started = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            version = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] or 0
+            if target <= version:
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (target, description, int(time.time()))
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            db_logger.error(f"❌ Migration {target} failed: {description}")
+            raise
+        version = target
+        db_logger.info(f"✓ Migration {target} applied: {description} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+    return version
+
+
+# ===== QUERY PLAN CHECK =====
+# Hot Queries aus server.py / airdrop_worker.py mit Beispielparametern
+HOT_QUERIES: Dict[str, Tuple[str, Sequence]] = {
+    "events_by_address": (
+        """SELECT * FROM events WHERE address=? AND (timestamp, id) < (?, ?)
+           ORDER BY timestamp DESC, id DESC LIMIT 51""",
+        ("0x0", 0, 0),
+    ),
+    "followers_by_owner": (
+        """SELECT f.id, f.follower_address, u.login_count
+           FROM followers f LEFT JOIN users u ON f.follower_address = u.address
+           WHERE f.owner_wallet = ? AND (f.verified_at, f.id) < (?, ?)
+           ORDER BY f.verified_at DESC, f.id DESC LIMIT 51""",
+        ("0x0", "", 0),
+    ),
+    "followers_by_platform": (
+        """SELECT COALESCE(source_platform, 'unknown') AS platform, COUNT(*), SUM(COALESCE(follower_score, 0))
+           FROM followers WHERE owner_wallet = ? GROUP BY COALESCE(source_platform, 'unknown')""",
+        ("0x0",),
+    ),
+    "follow_rewards_pending": (
+        """SELECT id, owner_wallet, follower_address FROM followers
+           WHERE follow_confirmed = 0 AND verified = 1
+           ORDER BY verified_at ASC LIMIT 10""",
+        (),
+    ),
+    "referrer_top_24h": (
+        """SELECT referrer, SUM(count) AS count FROM (
+               SELECT referrer, count FROM referrer_events_hourly WHERE bucket >= ?
+               UNION ALL
+               SELECT referrer, COUNT(*) FROM events
+               WHERE referrer IS NOT NULL AND timestamp > ? AND timestamp < ?
+               GROUP BY referrer
+           ) GROUP BY referrer ORDER BY count DESC LIMIT 10""",
+        (3600, 0, 3600),
+    ),
+    "events_expired": (
+        retention.SELECT_EXPIRED_SQL,
+        (0, 2000),
+    ),
+    "interactions_by_address": (
+        """SELECT * FROM (
+               SELECT * FROM interactions WHERE follower = ? AND (block_number, log_index) < (?, ?)
+               ORDER BY block_number DESC, log_index DESC LIMIT 51
+           ) UNION SELECT * FROM (
+               SELECT * FROM interactions WHERE creator = ? AND (block_number, log_index) < (?, ?)
+               ORDER BY block_number DESC, log_index DESC LIMIT 51
+           ) ORDER BY block_number DESC, log_index DESC LIMIT 51""",
+        ("0x0", 0, 0, "0x0", 0, 0),
+    ),
+    "interactions_total": (
+        "SELECT COUNT(*) FROM interactions WHERE follower = ? OR creator = ?",
+        ("0x0", "0x0"),
+    ),
+    "tx_outbox_queued": (
+        "SELECT * FROM tx_outbox WHERE status = 'queued' ORDER BY id LIMIT 50",
+        (),
+    ),
+    "tx_outbox_open_by_address": (
+        """SELECT id FROM tx_outbox WHERE address = ? AND kind = ? AND status IN ('queued', 'sent')
+           ORDER BY id DESC LIMIT 1""",
+        ("0x0", "mint_identity"),
+    ),
+    "tx_outbox_changed": (
+        "SELECT address FROM tx_outbox WHERE updated_at >= ? AND kind IN ('mint_identity', 'score')",
+        (0,),
+    ),
+    "auth_challenges_evict": (
+        "SELECT namespace, address FROM auth_challenges ORDER BY expires_at LIMIT ?",
+        (100,),
+    ),
+    "chain_jobs_queued": (
+        "SELECT id FROM chain_jobs WHERE status = 'queued' AND run_at <= ? ORDER BY id LIMIT ?",
+        (0, 8),
+    ),
+    "chain_jobs_queued_by_address": (
+        "SELECT id FROM chain_jobs WHERE address = ? AND kind = ? AND status = 'queued'",
+        ("0x0", "login"),
+    ),
+    "logins_total": (
+        "SELECT COUNT(*) FROM events WHERE event_type='login'",
+        (),
+    ),
+    "follows_confirmed": (
+        "SELECT COUNT(*) FROM followers WHERE follow_confirmed=1",
+        (),
+    ),
+    "sync_candidates": (
+        "SELECT address, score, blockchain_score FROM users WHERE score >= 10 ORDER BY score DESC",
+        (),
+    ),
+}
+
+
+def _is_table_scan(detail: str) -> bool:
+    """
+    'SCAN events' ist ein Full Table Scan, 'SCAN events USING COVERING INDEX ...'
+    und 'SCAN (subquery-N)' (Scan über ein Zwischenergebnis) nicht
+    """
+    return detail.startswith("SCAN ") and " USING " not in detail and not detail.startswith("SCAN (")
+
+
+def explain(conn: sqlite3.Connection, sql: str, params: Sequence = ()) -> List[str]:
+    """EXPLAIN QUERY PLAN als Liste von Detail-Zeilen"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def check_query_plans(conn: sqlite3.Connection, queries: Dict[str, Tuple[str, Sequence]] = None) -> Dict[str, List[str]]:
+    """
+    Prüft alle Hot Queries per EXPLAIN QUERY PLAN
+
+    Raises QueryPlanError wenn eine Query einen Full Table Scan benötigt.
+    Returns: {query_name: [plan details]}
+    """
+    plans = {}
+    offenders = []
+    for name, (sql, params) in (queries or HOT_QUERIES).items():
+        details = explain(conn, sql, params)
+        plans[name] = details
+        scans = [d for d in details if _is_table_scan(d)]
+        if scans:
+            offenders.append(f"{name}: {'; '.join(scans)}")
+    if offenders:
+        raise QueryPlanError("Hot queries fall back to table scans: " + " | ".join(offenders))
+    return plans
+
+
+if __name__ == "__main__":
+    from database import db_pool
+
+    with db_pool.writer() as conn:
+        version = run_migrations(conn)
+        print(f"✓ Schema version: {version}")
+        if "--check" in sys.argv:
+            try:
+                for name, details in check_query_plans(conn).items():
+                    print(f"   ✓ {name}: {' | '.join(details)}")
+            except QueryPlanError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
@@ -0,0 +1,181 @@
+"""
+VEra-Resonance — Batched On-Chain Reads
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+Aggregates many view calls (eth_call) into a few round trips:
+- Multicall3.aggregate3 with allowFailure=true, MULTICALL_CHUNK_SIZE calls per eth_call
+- fallback: JSON-RPC batch requests (RPC_BATCH_SIZE calls per HTTP request, sent
+  through the RPC endpoint pool) when Multicall3 is not deployed or a multicall
+  chunk fails as a whole
+- chunks run with bounded concurrency (MULTICALL_CONCURRENCY)
+- partial failures: a failed or undecodable call yields None, the rest of the chunk is kept
+
+Used by Web3Service.get_scores() / get_identity_status().
+"""
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from eth_abi import decode as abi_decode
+from web3 import Web3
+
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Multicall3 ist auf allen großen Chains unter derselben Adresse deployed (inkl. BASE Sepolia)
+MULTICALL3_ADDRESS = os.getenv("MULTICALL3_ADDRESS", "0xcA11bde05977b3631167028862bE2a173976CA11")
+MULTICALL_CHUNK_SIZE = int(os.getenv("MULTICALL_CHUNK_SIZE", 500))
+MULTICALL_CONCURRENCY = int(os.getenv("MULTICALL_CONCURRENCY", 4))
+RPC_BATCH_SIZE = int(os.getenv("RPC_BATCH_SIZE", 100))
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+
+class Call(NamedTuple):
+    """Ein einzelner View-Call: Ziel-Contract, ABI-kodierte Calldata, Rückgabetypen"""
+    target: str
+    data: bytes
+    output_types: Tuple[str, ...]
+
+
+def encode_call(contract, fn_name: str, args: Sequence[Any], output_types: Tuple[str, ...]) -> Call:
+    data = contract.encodeABI(fn_name=fn_name, args=list(args))
+    return Call(contract.address, bytes.fromhex(data[2:]), output_types)
+
+
+def decode_result(call: Call, data: Optional[bytes]) -> Optional[tuple]:
+    """Rückgabedaten -> Tupel, None bei leerem/ungültigem Ergebnis (z.B. Revert)"""
+    if not data:
+        return None
+    try:
+        return tuple(abi_decode(list(call.output_types), bytes(data)))
+    except Exception:
+        return None
+
+
+def chunked(items: Sequence, size: int) -> List[Sequence]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class BatchReader:
+    """Führt viele eth_calls per Multicall3 (oder JSON-RPC Batch) aus"""
+
+    def __init__(self, w3, rpc_batch: Callable[[List[Dict[str, Any]]], Awaitable[Dict[int, Any]]],
+                 address: str = MULTICALL3_ADDRESS, chunk_size: int = MULTICALL_CHUNK_SIZE,
+                 batch_size: int = RPC_BATCH_SIZE, concurrency: int = MULTICALL_CONCURRENCY):
+        """rpc_batch(requests) -> {id: result}, z.B. AsyncRPCPool.batch"""
+        self.w3 = w3
+        self.rpc_batch = rpc_batch
+        self.multicall = w3.eth.contract(address=Web3.to_checksum_address(address), abi=MULTICALL3_ABI)
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._multicall_available: Optional[bool] = None
+        self.multicall_requests = 0
+        self.batch_requests = 0
+        self.failed_calls = 0
+
+    async def _check_multicall(self):
+        try:
+            code = await self.w3.eth.get_code(self.multicall.address)
+            self._multicall_available = len(code) > 0
+            if not self._multicall_available:
+                logger.warning(f"⚠️ Multicall3 not deployed at {self.multicall.address} - using JSON-RPC batches")
+        except Exception as e:
+            # Beim nächsten Aufruf erneut prüfen
+            logger.warning(f"⚠️ Multicall3 check failed: {e}")
+
+    async def _via_multicall(self, chunk: Sequence[Call]) -> List[Optional[tuple]]:
+        self.multicall_requests += 1
+        results = await self.multicall.functions.aggregate3(
+            [(call.target, True, call.data) for call in chunk]
+        ).call()
+        return [decode_result(call, data) if success else None for call, (success, data) in zip(chunk, results)]
+
+    async def _via_batch(self, chunk: Sequence[Call]) -> List[Optional[tuple]]:
+        results: List[Optional[tuple]] = []
+        for part in chunked(chunk, self.batch_size):
+            requests = [
+                {
+                    "jsonrpc": "2.0",
+                    "id": i,
+                    "method": "eth_call",
+                    "params": [{"to": call.target, "data": "0x" + call.data.hex()}, "latest"],
+                }
+                for i, call in enumerate(part)
+            ]
+            self.batch_requests += 1
+            try:
+                raw = await self.rpc_batch(requests)
+            except Exception as e:
+                logger.warning(f"⚠️ JSON-RPC batch failed ({len(part)} calls): {e}")
+                raw = {}
+            for i, call in enumerate(part):
+                value = raw.get(i)
+                results.append(decode_result(call, bytes.fromhex(value[2:])) if value else None)
+        return results
+
+    async def _run_chunk(self, chunk: Sequence[Call]) -> List[Optional[tuple]]:
+        if self._multicall_available:
+            try:
+                return await self._via_multicall(chunk)
+            except Exception as e:
+                logger.warning(f"⚠️ Multicall chunk failed ({len(chunk)} calls), retrying as JSON-RPC batch: {e}")
+        return await self._via_batch(chunk)
+
+    async def call(self, calls: Sequence[Call]) -> List[Optional[tuple]]:
+        """Ergebnisse in derselben Reihenfolge wie calls; None = dieser Call ist fehlgeschlagen"""
+        if not calls:
+            return []
+        if self._multicall_available is None:
+            await self._check_multicall()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(chunk):
+            async with semaphore:
+                return await self._run_chunk(chunk)
+
+        parts = await asyncio.gather(*[run(chunk) for chunk in chunked(list(calls), self.chunk_size)])
+        results = [result for part in parts for result in part]
+        self.failed_calls += sum(1 for result in results if result is None)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "multicall_available": self._multicall_available,
+            "multicall_requests": self.multicall_requests,
+            "batch_requests": self.batch_requests,
+            "failed_calls": self.failed_calls,
+        }
@@ -0,0 +1,155 @@
+"""
+VEra-Resonance — Nonce Manager
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+In-process nonce allocator for the backend signing wallet:
+- syncs from the chain's pending transaction count at startup and after errors
+- hands out nonces atomically to concurrent senders (no get_transaction_count per tx)
+- a failed send of the newest nonce is handed back; a failure in the middle
+  leaves a gap, which is filled by the next allocation (lowest gap first)
+- nonce errors from the node (too low, already known, ...) trigger a resync
+- while idle, periodically compares with the pending count and resyncs on drift
+  (e.g. transactions sent from the same wallet by another process)
+
+Usage:
+    async with nonce_manager.reserve() as nonce:
+        tx_hash = await send(build(nonce))
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Set
+
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+NONCE_RESYNC_SECONDS = float(os.getenv("NONCE_RESYNC_SECONDS", 30))
+
+# RPC-Fehler, nach denen der lokale Zähler nicht mehr zur Chain passt
+NONCE_ERRORS = (
+    "nonce too low",
+    "nonce too high",
+    "replacement transaction underpriced",
+    "already known",
+    "known transaction",
+    "invalid nonce",
+)
+
+
+def is_nonce_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in NONCE_ERRORS)
+
+
+class NonceManager:
+    """Vergibt Nonces für eine Adresse lokal und atomar"""
+
+    def __init__(self, w3, address: str, resync_seconds: float = NONCE_RESYNC_SECONDS):
+        self.w3 = w3
+        self.address = address
+        self.resync_seconds = resync_seconds
+        self._lock: Optional[asyncio.Lock] = None
+        self._next: Optional[int] = None
+        self._in_flight: Set[int] = set()
+        # Freigegebene Nonces unterhalb von _next (Lücken, werden zuerst wiedervergeben)
+        self._gaps: Set[int] = set()
+        self._needs_resync = False
+        self._synced_at = 0.0
+        self._allocated = 0
+        self._resyncs = 0
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _pending_count(self) -> int:
+        return await self.w3.eth.get_transaction_count(self.address, "pending")
+
+    async def _sync_locked(self, reason: str):
+        pending = await self._pending_count()
+        if self._next is not None and pending != self._next:
+            logger.warning(f"🔢 Nonce resync ({reason}): local={self._next} chain={pending}")
+        self._next = pending
+        self._gaps.clear()
+        self._needs_resync = False
+        self._synced_at = time.monotonic()
+        self._resyncs += 1
+
+    async def sync(self, reason: str = "startup"):
+        """Übernimmt den pending transaction count der Chain"""
+        async with self._get_lock():
+            await self._sync_locked(reason)
+        logger.info(f"🔢 Nonce synced: {self.address} -> {self._next}")
+
+    async def allocate(self) -> int:
+        """Nächste freie Nonce (atomar)"""
+        async with self._get_lock():
+            if self._next is None:
+                await self._sync_locked("initial")
+            elif self._needs_resync and not self._in_flight:
+                await self._sync_locked("gap")
+            elif not self._in_flight and time.monotonic() - self._synced_at > self.resync_seconds:
+                # Nur im Leerlauf prüfen - laufende Sends würden den Vergleich verfälschen
+                await self._sync_locked("drift check")
+            if self._gaps:
+                nonce = min(self._gaps)
+                self._gaps.discard(nonce)
+            else:
+                nonce = self._next
+                self._next += 1
+            self._in_flight.add(nonce)
+            self._allocated += 1
+            return nonce
+
+    def confirm(self, nonce: int):
+        """Transaktion mit dieser Nonce wurde vom Node angenommen"""
+        self._in_flight.discard(nonce)
+
+    def release(self, nonce: int, error: Optional[Exception] = None):
+        """
+        Transaktion wurde nicht gesendet
+
+        Die jüngste Nonce wird zurückgegeben; eine Nonce aus der Mitte hinterlässt
+        eine Lücke, die die nächste allocate() füllt. Nonce-Fehler des Nodes erzwingen
+        einen Resync, sobald keine Sends mehr laufen.
+        """
+        self._in_flight.discard(nonce)
+        if error is not None and is_nonce_error(error):
+            self._needs_resync = True
+        elif self._next is None or nonce >= self._next:
+            self._needs_resync = True
+        elif nonce == self._next - 1:
+            self._next = nonce
+            # Angrenzende Lücken ebenfalls zurücknehmen
+            while self._next - 1 in self._gaps:
+                self._next -= 1
+                self._gaps.discard(self._next)
+        else:
+            self._gaps.add(nonce)
+
+    @asynccontextmanager
+    async def reserve(self):
+        """Reserviert eine Nonce für genau einen Send; bei Exception wird sie freigegeben"""
+        nonce = await self.allocate()
+        try:
+            yield nonce
+        except BaseException as e:
+            self.release(nonce, e if isinstance(e, Exception) else None)
+            raise
+        self.confirm(nonce)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "address": self.address,
+            "next_nonce": self._next,
+            "in_flight": len(self._in_flight),
+            "gaps": len(self._gaps),
+            "needs_resync": self._needs_resync,
+            "allocated": self._allocated,
+            "resyncs": self._resyncs,
+        }
@@ -0,0 +1,47 @@
+"""
+VEra-Resonance — Keyset Pagination
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+Opaque cursors for keyset (seek) pagination:
+- the cursor encodes the sort key of the last row of a page, e.g. (timestamp, id)
+- the next page continues with WHERE (key, id) < (?, ?) on the index,
+  so page N costs the same as page 1 (no OFFSET)
+"""
+
+import base64
+import json
+import os
+from typing import Any, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+MAX_PAGE_SIZE = int(os.getenv("PAGE_SIZE_MAX", "200"))
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded"""
+
+
+def page_size(limit: Optional[int]) -> int:
+    """Begrenzt die angefragte Seitengröße auf 1..MAX_PAGE_SIZE"""
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def encode_cursor(*key: Any) -> str:
+    """Sortierschlüssel der letzten Zeile -> base64url-String ohne Padding"""
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int = 2) -> Tuple:
+    """base64url-String -> Sortierschlüssel (InvalidCursor bei Manipulation)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(key, list) or len(key) != size:
+        raise InvalidCursor("Invalid cursor")
+    return tuple(key)
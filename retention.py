@@ -0,0 +1,303 @@
+"""
+VEra-Resonance — Events Retention & Archival
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+Retention job for the events audit table (SQLite backend):
+- events older than EVENTS_RETENTION_DAYS are rolled into events_daily
+  (one row per day, event_type and referrer)
+- the raw rows are written to gzip-compressed JSON-lines files in
+  RETENTION_ARCHIVE_DIR and copied into a separate archive database
+- then deleted from events in small batches (one short write transaction each)
+- freed pages are returned with PRAGMA incremental_vacuum in small steps,
+  followed by a WAL checkpoint that truncates the -wal file
+
+stats_counters and the referrer rollups are not touched: events are history,
+archived logins keep counting. A rebuild (stats.py / rollups.py --rebuild) adds the
+events_daily sums back; archived referrer hits land in the first hourly bucket of their day.
+
+Archive file and archive DB are written before the rows are deleted, with
+INSERT OR IGNORE on the event id, so an interrupted run can simply be repeated.
+
+Usage:
+    python retention.py                  # archive + prune + reclaim space
+    python retention.py --dry-run        # only show what would be archived
+    python retention.py --enable-incremental-vacuum
+                                         # one-time VACUUM for databases created
+                                         # before auto_vacuum=INCREMENTAL (exclusive lock!)
+"""
+
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, List
+
+from logger import db_logger
+
+# ===== KONFIGURATION =====
+EVENTS_RETENTION_DAYS = int(os.getenv("EVENTS_RETENTION_DAYS", 90))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", 2000))
+# Pause zwischen zwei Batches, damit API-Writes dazwischen drankommen
+RETENTION_BATCH_PAUSE_MS = int(os.getenv("RETENTION_BATCH_PAUSE_MS", 50))
+# Seiten pro incremental_vacuum-Schritt (4 KB Seiten -> 4 MB pro Schritt)
+RETENTION_VACUUM_PAGES = int(os.getenv("RETENTION_VACUUM_PAGES", 1000))
+RETENTION_ARCHIVE_DIR = os.path.join(
+    os.path.dirname(__file__), os.getenv("RETENTION_ARCHIVE_DIR", "./archive").replace("./", "")
+)
+ARCHIVE_DB_PATH = os.path.join(
+    os.path.dirname(__file__), os.getenv("ARCHIVE_DATABASE_PATH", "./aera_archive.db").replace("./", "")
+)
+
+DAY_SECONDS = 86400
+
+EVENT_COLUMNS = (
+    "id", "address", "event_type", "score_before", "score_after", "timestamp",
+    "created_at", "referrer", "user_agent", "ip_address", "owner_wallet",
+)
+
+# DDL für Migration 7
+SCHEMA = [
+    # referrer '' statt NULL, damit der Primärschlüssel eindeutig bleibt
+    """
+    CREATE TABLE IF NOT EXISTS events_daily (
+        day INTEGER NOT NULL,
+        event_type TEXT NOT NULL,
+        referrer TEXT NOT NULL DEFAULT '',
+        count INTEGER NOT NULL DEFAULT 0,
+        score_delta INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, event_type, referrer)
+    ) WITHOUT ROWID
+    """,
+    # Auswahl der abgelaufenen Events ohne Table Scan
+    "CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp)",
+]
+
+# Archiv-Datenbank: gleiche Spalten wie events, id bleibt erhalten
+ARCHIVE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS events_archive (
+        id INTEGER PRIMARY KEY,
+        address TEXT,
+        event_type TEXT,
+        score_before INTEGER,
+        score_after INTEGER,
+        timestamp INTEGER,
+        created_at TEXT,
+        referrer TEXT,
+        user_agent TEXT,
+        ip_address TEXT,
+        owner_wallet TEXT,
+        archived_at INTEGER
+    )
+"""
+
+SELECT_EXPIRED_SQL = f"""
+    SELECT {", ".join(EVENT_COLUMNS)} FROM events
+    WHERE timestamp < ?
+    ORDER BY timestamp, id
+    LIMIT ?
+"""
+
+EVENTS_DAILY_EXISTS_SQL = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events_daily'"
+
+COUNT_EXPIRED_SQL = "SELECT COUNT(*), MIN(timestamp), MAX(timestamp) FROM events WHERE timestamp < ?"
+
+# Aggregation und Löschen in derselben Transaktion - ein Event wird nie doppelt gezählt
+AGGREGATE_SQL = f"""
+    INSERT INTO events_daily (day, event_type, referrer, count, score_delta)
+    SELECT (COALESCE(timestamp, 0) / {DAY_SECONDS}) * {DAY_SECONDS}, COALESCE(event_type, ''), COALESCE(referrer, ''),
+           COUNT(*), COALESCE(SUM(score_after - score_before), 0)
+    FROM events
+    WHERE id IN (SELECT value FROM json_each(?))
+    GROUP BY 1, 2, 3
+    ON CONFLICT(day, event_type, referrer) DO UPDATE SET
+        count = count + excluded.count,
+        score_delta = score_delta + excluded.score_delta
+"""
+
+DELETE_SQL = "DELETE FROM events WHERE id IN (SELECT value FROM json_each(?))"
+
+
+def cutoff_timestamp(days: int = EVENTS_RETENTION_DAYS, now: int = None) -> int:
+    """Events mit timestamp < cutoff werden archiviert"""
+    return int(now if now is not None else time.time()) - days * DAY_SECONDS
+
+
+def has_events_daily(conn: sqlite3.Connection) -> bool:
+    """events_daily existiert erst ab Migration 7 (Rebuilds in Migration 4/5 laufen davor)"""
+    return conn.execute(EVENTS_DAILY_EXISTS_SQL).fetchone() is not None
+
+
+# ===== ARCHIV =====
+
+def open_archive_db(path: str = ARCHIVE_DB_PATH) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(ARCHIVE_SCHEMA)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_archive_address ON events_archive(address, timestamp)")
+    conn.commit()
+    return conn
+
+
+def write_archive_file(rows: List[Dict[str, Any]], directory: str = RETENTION_ARCHIVE_DIR) -> str:
+    """
+    Schreibt einen Batch als gzip-JSON-Lines-Datei (events_<erste id>_<letzte id>.jsonl.gz)
+
+    Erst in eine .tmp-Datei, dann atomar umbenannt - ein Abbruch hinterlässt keine halben Archive.
+    """
+    os.makedirs(directory, exist_ok=True)
+    ids = [row["id"] for row in rows]
+    path = os.path.join(directory, f"events_{min(ids):012d}_{max(ids):012d}.jsonl.gz")
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, separators=(",", ":")) + "\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+def copy_to_archive_db(archive: sqlite3.Connection, rows: List[Dict[str, Any]]):
+    archived_at = int(time.time())
+    with archive:
+        archive.executemany(
+            f"INSERT OR IGNORE INTO events_archive ({', '.join(EVENT_COLUMNS)}, archived_at) "
+            f"VALUES ({', '.join('?' * len(EVENT_COLUMNS))}, ?)",
+            [tuple(row[c] for c in EVENT_COLUMNS) + (archived_at,) for row in rows],
+        )
+
+
+# ===== PRUNE =====
+
+def prune_batch(conn: sqlite3.Connection, ids: List[int]) -> int:
+    """Aggregiert + löscht einen Batch in einer kurzen Schreib-Transaktion"""
+    id_list = json.dumps(ids)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(AGGREGATE_SQL, (id_list,))
+        deleted = conn.execute(DELETE_SQL, (id_list,)).rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return deleted
+
+
+def reclaim_space(conn: sqlite3.Connection, pages: int = RETENTION_VACUUM_PAGES) -> Dict[str, Any]:
+    """
+    Gibt freie Seiten schrittweise an das Dateisystem zurück und kürzt die WAL-Datei
+
+    Jeder incremental_vacuum-Schritt ist eine eigene kurze Transaktion.
+    """
+    auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    freed = 0
+    if auto_vacuum == 2:  # INCREMENTAL
+        while True:
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free_pages == 0:
+                break
+            # executescript steppt das PRAGMA bis zum Ende (execute gibt nur eine Seite frei)
+            conn.executescript(f"PRAGMA incremental_vacuum({pages});")
+            step = free_pages - conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if step <= 0:
+                break
+            freed += step
+            time.sleep(RETENTION_BATCH_PAUSE_MS / 1000)
+    else:
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free_pages:
+            db_logger.warning(
+                f"⚠️ auto_vacuum is not INCREMENTAL - {free_pages} free pages stay in the file "
+                f"(run 'python retention.py --enable-incremental-vacuum' once during maintenance)"
+            )
+    busy, wal_pages, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    return {
+        "incremental_vacuum": auto_vacuum == 2,
+        "freed_pages": freed,
+        "wal_checkpoint": {"busy": bool(busy), "wal_pages": wal_pages, "checkpointed": checkpointed},
+    }
+
+
+def run_retention(days: int = EVENTS_RETENTION_DAYS, batch_size: int = RETENTION_BATCH_SIZE,
+                  dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Archiviert und löscht alle Events älter als `days` Tage
+
+    Returns: Zusammenfassung (Anzahl, Archiv-Dateien, Speicherrückgewinnung)
+    """
+    from database import db_pool
+
+    cutoff = cutoff_timestamp(days)
+    with db_pool.reader() as conn:
+        expired, oldest, newest = conn.execute(COUNT_EXPIRED_SQL, (cutoff,)).fetchone()
+    summary: Dict[str, Any] = {
+        "cutoff": cutoff,
+        "expired": expired,
+        "oldest": oldest,
+        "newest": newest,
+        "archived": 0,
+        "deleted": 0,
+        "files": [],
+    }
+    if dry_run or not expired:
+        return summary
+
+    db_logger.info(f"🗄️ Retention: archiving {expired} events older than {days} days")
+    started = time.perf_counter()
+    archive = open_archive_db()
+    try:
+        while True:
+            # Lesen ohne Schreib-Lock, Archiv schreiben, dann kurz löschen
+            with db_pool.reader() as conn:
+                rows = [dict(row) for row in conn.execute(SELECT_EXPIRED_SQL, (cutoff, batch_size))]
+            if not rows:
+                break
+            summary["files"].append(write_archive_file(rows))
+            copy_to_archive_db(archive, rows)
+            summary["archived"] += len(rows)
+            with db_pool.writer() as conn:
+                summary["deleted"] += prune_batch(conn, [row["id"] for row in rows])
+            if len(rows) < batch_size:
+                break
+            time.sleep(RETENTION_BATCH_PAUSE_MS / 1000)
+    finally:
+        archive.close()
+
+    with db_pool.writer() as conn:
+        summary["reclaim"] = reclaim_space(conn)
+    summary["duration_ms"] = round((time.perf_counter() - started) * 1000)
+    db_logger.info(
+        f"✓ Retention: {summary['deleted']} events archived in {len(summary['files'])} files "
+        f"({summary['duration_ms']} ms, freed {summary['reclaim']['freed_pages']} pages)"
+    )
+    return summary
+
+
+def enable_incremental_vacuum():
+    """Einmalig: auto_vacuum=INCREMENTAL für bestehende Datenbanken (VACUUM, exklusiver Lock)"""
+    from database import db_pool
+
+    with db_pool.writer() as conn:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    return True
+
+
+if __name__ == "__main__":
+    if os.getenv("DATABASE_URL", "").startswith(("postgres://", "postgresql://")):
+        print("❌ retention.py only supports the SQLite backend")
+        sys.exit(1)
+
+    if "--enable-incremental-vacuum" in sys.argv:
+        changed = enable_incremental_vacuum()
+        print("✓ auto_vacuum = INCREMENTAL" + ("" if changed else " (already enabled)"))
+        sys.exit(0)
+
+    result = run_retention(dry_run="--dry-run" in sys.argv)
+    for key, value in result.items():
+        if key == "files":
+            value = f"{len(value)} files in {RETENTION_ARCHIVE_DIR}"
+        print(f"   {key}: {value}")
@@ -0,0 +1,254 @@
+"""
+VEra-Resonance — Referrer Rollups
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+Hourly rollup tables for /api/referrer-stats:
+- referrer_signups_hourly: new users per first_referrer and hour (users.first_seen)
+- referrer_events_hourly: events per referrer and hour (events.timestamp)
+- maintained by triggers on insert (SCHEMA for SQLite, POSTGRES_SCHEMA for PostgreSQL),
+  rebuild_rollups() recomputes them (archived events from events_daily, see retention.py)
+
+Queries sum buckets instead of scanning users/events, so the cost depends on
+the number of (hour, referrer) buckets, not on the number of events.
+
+Usage:
+    python rollups.py --rebuild   # recompute rollups from scratch
+"""
+
+import sqlite3
+import sys
+import time
+from typing import Dict, List
+
+import retention
+
+BUCKET_SECONDS = 3600
+
+
+def _upsert(table: str, bucket: str, referrer: str, delta: str) -> str:
+    return f"""INSERT INTO {table} (bucket, referrer, count)
+               VALUES (({bucket} / {BUCKET_SECONDS}) * {BUCKET_SECONDS}, {referrer}, {delta})
+               ON CONFLICT(bucket, referrer) DO UPDATE SET count = count + excluded.count;"""
+
+
+# DDL für Migration 5
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS referrer_signups_hourly (
+        bucket INTEGER NOT NULL,
+        referrer TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (bucket, referrer)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS referrer_events_hourly (
+        bucket INTEGER NOT NULL,
+        referrer TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (bucket, referrer)
+    ) WITHOUT ROWID
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_users_insert AFTER INSERT ON users
+    WHEN NEW.first_referrer IS NOT NULL
+    BEGIN
+        {_upsert("referrer_signups_hourly", "COALESCE(NEW.first_seen, 0)", "NEW.first_referrer", "1")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_users_update AFTER UPDATE OF first_referrer, first_seen ON users
+    WHEN NEW.first_referrer IS NOT OLD.first_referrer OR NEW.first_seen IS NOT OLD.first_seen
+    BEGIN
+        UPDATE referrer_signups_hourly SET count = count - 1
+        WHERE OLD.first_referrer IS NOT NULL
+          AND bucket = (COALESCE(OLD.first_seen, 0) / {BUCKET_SECONDS}) * {BUCKET_SECONDS}
+          AND referrer = OLD.first_referrer;
+        INSERT INTO referrer_signups_hourly (bucket, referrer, count)
+        SELECT (COALESCE(NEW.first_seen, 0) / {BUCKET_SECONDS}) * {BUCKET_SECONDS}, NEW.first_referrer, 1
+        WHERE NEW.first_referrer IS NOT NULL
+        ON CONFLICT(bucket, referrer) DO UPDATE SET count = count + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_users_delete AFTER DELETE ON users
+    WHEN OLD.first_referrer IS NOT NULL
+    BEGIN
+        UPDATE referrer_signups_hourly SET count = count - 1
+        WHERE bucket = (COALESCE(OLD.first_seen, 0) / {BUCKET_SECONDS}) * {BUCKET_SECONDS}
+          AND referrer = OLD.first_referrer;
+    END
+    """,
+    # Events sind historisch: Löschen/Archivieren ändert die Rollups nicht
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_events_insert AFTER INSERT ON events
+    WHEN NEW.referrer IS NOT NULL
+    BEGIN
+        {_upsert("referrer_events_hourly", "COALESCE(NEW.timestamp, 0)", "NEW.referrer", "1")}
+    END
+    """,
+]
+
+# DDL für das PostgreSQL-Backend (gleiche Tabellen, PL/pgSQL statt SQLite-Trigger)
+POSTGRES_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS referrer_signups_hourly (
+        bucket BIGINT NOT NULL,
+        referrer TEXT NOT NULL,
+        count BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (bucket, referrer)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS referrer_events_hourly (
+        bucket BIGINT NOT NULL,
+        referrer TEXT NOT NULL,
+        count BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (bucket, referrer)
+    )
+    """,
+    f"""
+CREATE OR REPLACE FUNCTION trg_rollup_users() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' AND OLD.first_referrer IS NOT NULL THEN
+        UPDATE referrer_signups_hourly SET count = count - 1
+        WHERE bucket = (COALESCE(OLD.first_seen, 0) / {BUCKET_SECONDS}) * {BUCKET_SECONDS}
+          AND referrer = OLD.first_referrer;
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.first_referrer IS NOT NULL THEN
+        INSERT INTO referrer_signups_hourly AS h (bucket, referrer, count)
+        VALUES ((COALESCE(NEW.first_seen, 0) / {BUCKET_SECONDS}) * {BUCKET_SECONDS}, NEW.first_referrer, 1)
+        ON CONFLICT (bucket, referrer) DO UPDATE SET count = h.count + 1;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""",
+    "DROP TRIGGER IF EXISTS trg_rollup_users ON users",
+    """CREATE TRIGGER trg_rollup_users AFTER INSERT OR DELETE OR UPDATE OF first_referrer, first_seen ON users
+       FOR EACH ROW EXECUTE FUNCTION trg_rollup_users()""",
+    # Events sind historisch: nur INSERT
+    f"""
+CREATE OR REPLACE FUNCTION trg_rollup_events() RETURNS trigger AS $$
+BEGIN
+    IF NEW.referrer IS NOT NULL THEN
+        INSERT INTO referrer_events_hourly AS h (bucket, referrer, count)
+        VALUES ((COALESCE(NEW.timestamp, 0) / {BUCKET_SECONDS}) * {BUCKET_SECONDS}, NEW.referrer, 1)
+        ON CONFLICT (bucket, referrer) DO UPDATE SET count = h.count + 1;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""",
+    "DROP TRIGGER IF EXISTS trg_rollup_events ON events",
+    "CREATE TRIGGER trg_rollup_events AFTER INSERT ON events FOR EACH ROW EXECUTE FUNCTION trg_rollup_events()",
+]
+
+# Neuberechnung aus users/events (SQLite + PostgreSQL)
+REBUILD_SQL = [
+    "DELETE FROM referrer_signups_hourly",
+    f"""INSERT INTO referrer_signups_hourly (bucket, referrer, count)
+        SELECT (COALESCE(first_seen, 0) / {BUCKET_SECONDS}) * {BUCKET_SECONDS}, first_referrer, COUNT(*)
+        FROM users
+        WHERE first_referrer IS NOT NULL
+        GROUP BY 1, 2""",
+    "DELETE FROM referrer_events_hourly",
+    f"""INSERT INTO referrer_events_hourly (bucket, referrer, count)
+        SELECT (COALESCE(timestamp, 0) / {BUCKET_SECONDS}) * {BUCKET_SECONDS}, referrer, COUNT(*)
+        FROM events
+        WHERE referrer IS NOT NULL
+        GROUP BY 1, 2""",
+]
+
+# Nach REBUILD_SQL, sobald events_daily existiert (SQLite): archivierte Events pro Tag und
+# Referrer in die erste Stunde des Tages ('' = ohne Referrer, siehe retention.AGGREGATE_SQL)
+ARCHIVE_REBUILD_SQL = [
+    f"""INSERT INTO referrer_events_hourly (bucket, referrer, count)
+        SELECT (day / {BUCKET_SECONDS}) * {BUCKET_SECONDS}, referrer, SUM(count)
+        FROM events_daily
+        WHERE referrer <> ''
+        GROUP BY 1, 2
+        ON CONFLICT(bucket, referrer) DO UPDATE SET count = count + excluded.count""",
+]
+
+# Abfragen für /api/referrer-stats
+SIGNUPS_BY_REFERRER_SQL = """
+    SELECT referrer AS first_referrer, SUM(count) AS count
+    FROM referrer_signups_hourly
+    GROUP BY referrer
+    HAVING SUM(count) > 0
+    ORDER BY count DESC
+"""
+
+EVENTS_BY_REFERRER_SQL = """
+    SELECT referrer, SUM(count) AS count
+    FROM referrer_events_hourly
+    GROUP BY referrer
+    ORDER BY count DESC
+"""
+
+# Volle Stunden aus den Buckets, die angebrochene erste Stunde exakt aus events
+# (maximal eine Stunde Rohdaten). Parameter: siehe top_referrers_params()
+TOP_REFERRERS_SINCE_SQL = """
+    SELECT referrer, SUM(count) AS count FROM (
+        SELECT referrer, count FROM referrer_events_hourly
+        WHERE bucket >= ?
+        UNION ALL
+        SELECT referrer, COUNT(*) AS count FROM events
+        WHERE referrer IS NOT NULL AND timestamp > ? AND timestamp < ?
+        GROUP BY referrer
+    ) AS recent
+    GROUP BY referrer
+    ORDER BY count DESC
+    LIMIT ?
+"""
+
+
+def top_referrers_params(since: int, limit: int = 10) -> tuple:
+    first_full_bucket = (since // BUCKET_SECONDS + 1) * BUCKET_SECONDS
+    return (first_full_bucket, since, first_full_bucket, limit)
+
+
+def rebuild_rollups(conn: sqlite3.Connection):
+    """
+    Berechnet beide Rollup-Tabellen aus users/events neu (O(Tabellengröße))
+
+    Läuft in der Transaktion des Aufrufers. Archivierte Events (events_daily) zählen mit.
+    """
+    for sql in REBUILD_SQL:
+        conn.execute(sql)
+    if retention.has_events_daily(conn):
+        for sql in ARCHIVE_REBUILD_SQL:
+            conn.execute(sql)
+
+
+def referrer_stats_from_rows(signups, events, top) -> Dict[str, List[Dict]]:
+    """Zeilen der drei Rollup-Abfragen -> Response-Felder für /api/referrer-stats"""
+    return {
+        "new_users_by_source": [{"first_referrer": r[0], "count": int(r[1])} for r in signups],
+        "total_events_by_source": [{"referrer": r[0], "count": int(r[1])} for r in events],
+        "top_sources_24h": [{"referrer": r[0], "count": int(r[1])} for r in top],
+    }
+
+
+def referrer_stats(conn: sqlite3.Connection, window_seconds: int = 24 * 3600) -> Dict[str, List[Dict]]:
+    """Alle Zahlen für /api/referrer-stats in einem Read"""
+    return referrer_stats_from_rows(
+        conn.execute(SIGNUPS_BY_REFERRER_SQL).fetchall(),
+        conn.execute(EVENTS_BY_REFERRER_SQL).fetchall(),
+        conn.execute(TOP_REFERRERS_SINCE_SQL, top_referrers_params(int(time.time()) - window_seconds)).fetchall(),
+    )
+
+
+if __name__ == "__main__":
+    from database import db_pool
+
+    if "--rebuild" in sys.argv:
+        with db_pool.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rebuild_rollups(conn)
+        print("✓ Referrer rollups rebuilt")
+    with db_pool.reader() as conn:
+        for name, rows in referrer_stats(conn).items():
+            print(f"   {name}: {rows}")
@@ -0,0 +1,418 @@
+"""
+VEra-Resonance — RPC Endpoint Pool
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+Several JSON-RPC endpoints behind one Web3 provider:
+- per-endpoint latency (EWMA) and error rate, reads go to the fastest healthy endpoint
+  (RPC_EXPLORE_RATE of the reads probe another endpoint so recovered ones are noticed)
+- writes (eth_sendRawTransaction, pending nonce) stick to one endpoint and only
+  move when it is ejected - the mempool view stays consistent for our nonces
+- transport errors, HTTP 429/5xx and rate-limit responses fail over to the next
+  endpoint; RPC_EJECT_ERRORS consecutive failures eject an endpoint for
+  RPC_EJECT_SECONDS (doubling up to RPC_EJECT_MAX_SECONDS), after that it is
+  re-admitted on probation: one success clears it, one failure ejects it again
+- JSON-RPC errors such as "execution reverted" are answers, not endpoint failures
+
+PooledAsyncHTTPProvider (AsyncWeb3, Web3Service) and PooledHTTPProvider (Web3,
+airdrop_worker) share the scoring; URLs come from comma-separated env lists
+(BASE_SEPOLIA_RPC_URLS, SEPOLIA_RPC_URLS) with the single-URL variables as fallback.
+
+Usage:
+    python rpc_pool.py           # probe the configured BASE Sepolia endpoints
+    python rpc_pool.py --stubs   # run against local stub JSON-RPC servers (fast / slow / flaky)
+"""
+
+import asyncio
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import aiohttp
+import requests
+from web3.providers.async_base import AsyncJSONBaseProvider
+from web3.providers.base import JSONBaseProvider
+
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+RPC_EJECT_ERRORS = int(os.getenv("RPC_EJECT_ERRORS", 3))
+RPC_EJECT_SECONDS = float(os.getenv("RPC_EJECT_SECONDS", 30))
+RPC_EJECT_MAX_SECONDS = float(os.getenv("RPC_EJECT_MAX_SECONDS", 300))
+RPC_LATENCY_ALPHA = float(os.getenv("RPC_LATENCY_ALPHA", 0.2))
+RPC_EXPLORE_RATE = float(os.getenv("RPC_EXPLORE_RATE", 0.05))
+RPC_FAILOVER_ATTEMPTS = int(os.getenv("RPC_FAILOVER_ATTEMPTS", 3))
+RPC_SYNC_TIMEOUT_SECONDS = float(os.getenv("RPC_TIMEOUT_SECONDS", 15))
+
+# Diese Methoden laufen immer über denselben Endpoint (Mempool/Nonce-Sicht)
+STICKY_METHODS = frozenset({
+    "eth_sendRawTransaction",
+    "eth_sendTransaction",
+    "eth_getTransactionCount",
+})
+
+# JSON-RPC-Fehler, die das Endpoint betreffen (nicht die Anfrage)
+RATE_LIMIT_ERRORS = (
+    "rate limit",
+    "too many requests",
+    "exceeded the quota",
+    "daily request count",
+    "capacity exceeded",
+    "over rate",
+)
+
+
+class EndpointError(Exception):
+    """Endpoint hat nicht (sinnvoll) geantwortet - Failover auf das nächste"""
+
+
+def _describe(error: BaseException) -> str:
+    # asyncio.TimeoutError hat keine Meldung
+    return str(error) or type(error).__name__
+
+
+def rpc_urls(list_var: str, single_var: str, default: str) -> List[str]:
+    """Komma-getrennte URL-Liste aus list_var, sonst die einzelne URL aus single_var"""
+    raw = os.getenv(list_var) or os.getenv(single_var) or default
+    return [url.strip() for url in raw.split(",") if url.strip()]
+
+
+def rate_limit_message(body: Any) -> Optional[str]:
+    """Fehlermeldung, wenn die Antwort ein Rate-Limit des Endpoints ist"""
+    errors = body if isinstance(body, list) else [body]
+    for item in errors:
+        error = item.get("error") if isinstance(item, dict) else None
+        if isinstance(error, dict):
+            message = str(error.get("message", "")).lower()
+            if any(marker in message for marker in RATE_LIMIT_ERRORS):
+                return error.get("message")
+    return None
+
+
+class Endpoint:
+    """Ein RPC-Endpoint mit Latenz-/Fehlerstatistik"""
+
+    def __init__(self, url: str, alpha: float = RPC_LATENCY_ALPHA):
+        self.url = url
+        self.alpha = alpha
+        self.latency_ms: Optional[float] = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.requests = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def score(self) -> float:
+        # Unbekannte Latenz = 0 -> neue Endpoints werden zuerst gemessen
+        return (self.latency_ms or 0.0) * (1 + 4 * self.error_rate)
+
+    def record_success(self, elapsed_ms: float):
+        self.requests += 1
+        self.latency_ms = elapsed_ms if self.latency_ms is None else (
+            self.alpha * elapsed_ms + (1 - self.alpha) * self.latency_ms
+        )
+        self.error_rate *= 1 - self.alpha
+        self.consecutive_failures = 0
+        self.ejections = 0
+
+    def record_failure(self, error: Any, eject_after: int, eject_seconds: float, eject_max: float) -> bool:
+        """Returns: True wenn das Endpoint dadurch ausgeworfen wurde"""
+        self.requests += 1
+        self.failures += 1
+        self.last_error = str(error)[:200]
+        self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+        self.consecutive_failures += 1
+        if self.consecutive_failures < eject_after:
+            return False
+        # Bleibt auf eject_after: nach der Wiederaufnahme reicht ein Fehler für den nächsten Auswurf
+        self.ejections += 1
+        self.ejected_until = time.monotonic() + min(eject_seconds * 2 ** (self.ejections - 1), eject_max)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "url": self.url,
+            "healthy": self.available(now),
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejected_for_s": round(self.ejected_until - now, 1) if not self.available(now) else None,
+            "last_error": self.last_error,
+        }
+
+
+class _PoolBase:
+    """Endpoint-Auswahl und Statistik, gemeinsam für die sync- und async-Variante"""
+
+    def __init__(self, urls: Sequence[str], attempts: int = RPC_FAILOVER_ATTEMPTS,
+                 explore_rate: float = RPC_EXPLORE_RATE, eject_after: int = RPC_EJECT_ERRORS,
+                 eject_seconds: float = RPC_EJECT_SECONDS, eject_max: float = RPC_EJECT_MAX_SECONDS):
+        if not urls:
+            raise ValueError("RPC pool needs at least one URL")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.attempts = attempts
+        self.explore_rate = explore_rate
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.eject_max = eject_max
+        self._write_endpoint: Optional[Endpoint] = None
+        self.failovers = 0
+
+    def _candidates(self, method: str) -> List[Endpoint]:
+        """Endpoints in Versuchsreihenfolge"""
+        now = time.monotonic()
+        available = [e for e in self.endpoints if e.available(now)]
+        if not available:
+            # Alle ausgeworfen: das Endpoint zuerst, das am frühesten zurückkommt
+            return sorted(self.endpoints, key=lambda e: e.ejected_until)[:self.attempts]
+        ordered = sorted(available, key=lambda e: e.score())
+        if method in STICKY_METHODS:
+            write = self._write_endpoint
+            if write is None or write not in available:
+                write = ordered[0]
+            return [write, *[e for e in ordered if e is not write]][:self.attempts]
+        if len(ordered) > 1 and random.random() < self.explore_rate:
+            # Gelegentlich ein anderes Endpoint messen, damit erholte Endpoints wieder Traffic bekommen
+            ordered.insert(0, ordered.pop(random.randrange(1, len(ordered))))
+        return ordered[:self.attempts]
+
+    def _succeeded(self, endpoint: Endpoint, method: str, elapsed_ms: float):
+        endpoint.record_success(elapsed_ms)
+        if method in STICKY_METHODS and endpoint is not self._write_endpoint:
+            if self._write_endpoint is not None:
+                logger.warning(f"🔀 RPC writes moved: {self._write_endpoint.url} -> {endpoint.url}")
+            self._write_endpoint = endpoint
+
+    def _failed(self, endpoint: Endpoint, error: Any):
+        if endpoint.record_failure(error, self.eject_after, self.eject_seconds, self.eject_max):
+            logger.warning(
+                f"⛔ RPC endpoint ejected for {endpoint.ejected_until - time.monotonic():.0f}s: {endpoint.url} ({error})"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "endpoints": [endpoint.stats() for endpoint in self.endpoints],
+            "write_endpoint": self._write_endpoint.url if self._write_endpoint else None,
+            "failovers": self.failovers,
+        }
+
+
+class AsyncRPCPool(_PoolBase):
+    """Endpoint-Pool auf einer aiohttp-Session (Web3Service)"""
+
+    def __init__(self, urls: Sequence[str], **kwargs):
+        super().__init__(urls, **kwargs)
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    def use_session(self, session: aiohttp.ClientSession):
+        self.session = session
+
+    async def _post(self, endpoint: Endpoint, method: str, payload: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            async with self.session.post(endpoint.url, json=payload) as response:
+                if response.status == 429 or response.status >= 500:
+                    raise EndpointError(f"HTTP {response.status}")
+                response.raise_for_status()
+                body = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, EndpointError, ValueError) as e:
+            self._failed(endpoint, _describe(e))
+            raise EndpointError(f"{endpoint.url}: {_describe(e)}") from e
+        message = rate_limit_message(body)
+        if message:
+            self._failed(endpoint, message)
+            raise EndpointError(f"{endpoint.url}: {message}")
+        self._succeeded(endpoint, method, (time.perf_counter() - started) * 1000)
+        return body
+
+    async def _send(self, method: str, payload: Any) -> Any:
+        if self.session is None:
+            raise RuntimeError("AsyncRPCPool has no session (call Web3Service.open() first)")
+        last_error: Optional[Exception] = None
+        for attempt, endpoint in enumerate(self._candidates(method)):
+            if attempt:
+                self.failovers += 1
+            try:
+                return await self._post(endpoint, method, payload)
+            except EndpointError as e:
+                last_error = e
+        raise ConnectionError(f"All RPC endpoints failed for {method}: {last_error}")
+
+    async def request(self, method: str, params: Any, request_id: int = 0) -> Dict[str, Any]:
+        """Einzelner JSON-RPC Call -> Antwort-Dict (inkl. "error" bei JSON-RPC-Fehlern)"""
+        return await self._send(method, {"jsonrpc": "2.0", "method": method, "params": params, "id": request_id})
+
+    async def batch(self, batch_requests: List[Dict[str, Any]]) -> Dict[int, Any]:
+        """
+        JSON-RPC Batch -> {id: result} (fehlgeschlagene Einträge fehlen)
+
+        Raises wenn kein Endpoint antwortet oder der Node keine Batches unterstützt.
+        """
+        body = await self._send("batch", batch_requests)
+        if not isinstance(body, list):
+            raise ValueError(f"RPC batch not supported: {body}")
+        return {item["id"]: item["result"] for item in body if "result" in item}
+
+
+class RPCPool(_PoolBase):
+    """Endpoint-Pool für synchrones Web3 (airdrop_worker)"""
+
+    def __init__(self, urls: Sequence[str], timeout: float = RPC_SYNC_TIMEOUT_SECONDS, **kwargs):
+        super().__init__(urls, **kwargs)
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _post(self, endpoint: Endpoint, method: str, payload: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            response = self.session.post(endpoint.url, json=payload, timeout=self.timeout)
+            if response.status_code == 429 or response.status_code >= 500:
+                raise EndpointError(f"HTTP {response.status_code}")
+            response.raise_for_status()
+            body = response.json()
+        except (requests.RequestException, EndpointError, ValueError) as e:
+            self._failed(endpoint, _describe(e))
+            raise EndpointError(f"{endpoint.url}: {_describe(e)}") from e
+        message = rate_limit_message(body)
+        if message:
+            self._failed(endpoint, message)
+            raise EndpointError(f"{endpoint.url}: {message}")
+        self._succeeded(endpoint, method, (time.perf_counter() - started) * 1000)
+        return body
+
+    def request(self, method: str, params: Any, request_id: int = 0) -> Dict[str, Any]:
+        payload = {"jsonrpc": "2.0", "method": method, "params": params, "id": request_id}
+        last_error: Optional[Exception] = None
+        for attempt, endpoint in enumerate(self._candidates(method)):
+            if attempt:
+                self.failovers += 1
+            try:
+                return self._post(endpoint, method, payload)
+            except EndpointError as e:
+                last_error = e
+        raise ConnectionError(f"All RPC endpoints failed for {method}: {last_error}")
+
+
+class PooledAsyncHTTPProvider(AsyncJSONBaseProvider):
+    """AsyncWeb3-Provider über einen AsyncRPCPool"""
+
+    def __init__(self, pool: AsyncRPCPool):
+        super().__init__()
+        self.pool = pool
+
+    async def make_request(self, method, params) -> Dict[str, Any]:
+        return await self.pool.request(method, params, next(self.request_counter))
+
+    async def is_connected(self, show_traceback: bool = False) -> bool:
+        try:
+            return "result" in await self.make_request("eth_chainId", [])
+        except Exception:
+            if show_traceback:
+                raise
+            return False
+
+
+class PooledHTTPProvider(JSONBaseProvider):
+    """Web3-Provider über einen RPCPool"""
+
+    def __init__(self, pool: RPCPool):
+        super().__init__()
+        self.pool = pool
+
+    def make_request(self, method, params) -> Dict[str, Any]:
+        return self.pool.request(method, params, next(self.request_counter))
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        try:
+            return "result" in self.make_request("eth_chainId", [])
+        except Exception:
+            if show_traceback:
+                raise
+            return False
+
+
+# ===== STUB-SERVER (lokale Tests ohne echten Node) =====
+
+async def start_stub_server(latency_ms: float = 0, error_rate: float = 0.0, block_number: int = 1, port: int = 0):
+    """
+    Minimaler JSON-RPC-Server auf 127.0.0.1 (port=0: freier Port) -> (runner, url)
+
+    Beantwortet eth_blockNumber / eth_chainId (auch als Batch); error_rate der
+    Anfragen bekommt HTTP 503. runner.cleanup() beendet den Server.
+    """
+    from aiohttp import web
+
+    def answer(request: Dict[str, Any]) -> Dict[str, Any]:
+        results = {"eth_blockNumber": hex(block_number), "eth_chainId": hex(84532)}
+        if request.get("method") in results:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "result": results[request["method"]]}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32601, "message": "method not found"}}
+
+    async def handle(http_request):
+        await asyncio.sleep(latency_ms / 1000)
+        if random.random() < error_rate:
+            return web.Response(status=503)
+        body = await http_request.json()
+        return web.json_response([answer(item) for item in body] if isinstance(body, list) else answer(body))
+
+    app = web.Application()
+    app.router.add_post("/", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/"
+
+
+async def _exercise(pool: AsyncRPCPool, count: int, concurrency: int = 10):
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            try:
+                await pool.request("eth_blockNumber", [], i)
+            except ConnectionError:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(count)])
+    print(f"✓ {count} requests in {time.perf_counter() - started:.2f}s, {failures} failed, {pool.failovers} failovers")
+    for endpoint in pool.stats()["endpoints"]:
+        print(f"   {endpoint}")
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    async def main():
+        runners, urls = [], []
+        if "--stubs" in sys.argv:
+            for latency, error_rate in ((10, 0.0), (120, 0.0), (5, 0.5)):
+                runner, url = await start_stub_server(latency, error_rate)
+                runners.append(runner)
+                urls.append(url)
+                print(f"Stub {url}: latency={latency}ms errors={error_rate:.0%}")
+        else:
+            urls = rpc_urls("BASE_SEPOLIA_RPC_URLS", "BASE_SEPOLIA_RPC_URL", "https://sepolia.base.org")
+        pool = AsyncRPCPool(urls)
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=RPC_SYNC_TIMEOUT_SECONDS)) as session:
+            pool.use_session(session)
+            await _exercise(pool, 300 if runners else 20)
+        for runner in runners:
+            await runner.cleanup()
+
+    asyncio.run(main())
@@ -10,17 +10,16 @@ Verifies wallet addresses and manages Resonance Scores
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-import sqlite3
 import time
 import json
 import os
 import asyncio
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
+from typing import Optional
 from dotenv import load_dotenv
-import hashlib
 import secrets
 
 # Load environment variables FIRST!
@@ -29,9 +28,54 @@ load_dotenv()
 # ===== IMPORT CUSTOM LOGGER =====
 from logger import logger, api_logger, db_logger, wallet_logger, airdrop_logger, log_activity
 
+# ===== IMPORT STORAGE (SQLite oder PostgreSQL, siehe DATABASE_URL) =====
+from storage import storage
+from database import DB_PATH
+from pagination import page_size, encode_cursor, decode_cursor
+
 # ===== IMPORT BLOCKCHAIN SERVICE (after load_dotenv!) =====
 from web3_service import web3_service
-from blockchain_sync import sync_score_after_update
+from blockchain_sync import should_sync_score
+from interaction_indexer import InteractionIndexer, INDEXER_ENABLED, CHECKPOINT_NAME
+from tx_pipeline import TxPipeline, TX_PIPELINE_ENABLED
+from signature_service import signature_verifier
+from challenge_store import create_challenge_store, TAKE_OK, TAKE_MISMATCH
+from auth_tokens import TokenSigner, TokenError
+from chain_jobs import ChainJobs
+
+# InteractionRecorded-Events -> interactions-Tabelle (für /api/blockchain/interactions)
+interaction_indexer = InteractionIndexer(web3_service, storage)
+
+# Transaktions-Outbox: Mint/Score/Interaktion -> job_id, Senden + Receipts im Hintergrund
+tx_pipeline = TxPipeline(web3_service, storage)
+
+# Blockchain-Arbeit nach dem Login (Score-Sync, Identity NFT) - läuft nach der HTTP-Antwort
+chain_jobs = ChainJobs(storage)
+
+# Login-Nonces + Dashboard-Challenges (memory: ein Prozess, shared: alle uvicorn-Worker)
+challenge_store = create_challenge_store(storage)
+
+# Mehrere uvicorn-Worker: Outbox-Sender, Chain-Jobs und Indexer laufen nur im Prozess mit diesem Lock
+BACKGROUND_LOCK_FILE = os.getenv("BACKGROUND_LOCK_FILE", f"{DB_PATH}.background.lock")
+_background_lock = None
+
+
+def _acquire_background_lock() -> bool:
+    """Nicht-blockierender Datei-Lock (gilt pro Host); True = dieser Worker führt die Hintergrund-Jobs"""
+    global _background_lock
+    try:
+        import fcntl
+    except ImportError:
+        return True
+    handle = open(BACKGROUND_LOCK_FILE, "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    # Offen halten: der Lock endet mit dem Prozess
+    _background_lock = handle
+    return True
 
 # Config
 HOST = os.getenv("HOST", "0.0.0.0")
@@ -52,6 +96,9 @@ MAX_SCORE = int(os.getenv("MAX_SCORE", 100))
 SCORE_INCREMENT = int(os.getenv("SCORE_INCREMENT", 1))
 TOKEN_SECRET = os.getenv("TOKEN_SECRET", "aera-secret-key-change-in-production")
 TOKEN_EXPIRY_MINUTES = int(os.getenv("TOKEN_EXPIRY_MINUTES", 2))  # 2 Minuten Standard
+TOKEN_MAX_MINUTES = 525600  # 1 Jahr als Maximum
+# v1-Tokens (HMAC-SHA256, base64url) + Cache verifizierter Tokens; alte Tokens während der Migration
+token_signer = TokenSigner(TOKEN_SECRET)
 
 # Airdrop Configuration
 ADMIN_WALLET = os.getenv("ADMIN_WALLET", "")
@@ -93,10 +140,6 @@ except Exception as e:
 # Templates für dynamische Landing Pages
 templates = Jinja2Templates(directory=static_dir)
 
-# Datenbank-Konfiguration
-DATABASE_NAME = os.getenv("DATABASE_PATH", "./aera.db")
-DB_PATH = os.path.join(os.path.dirname(__file__), DATABASE_NAME.replace("./", ""))
-
 # Platform-Konfiguration für dynamisches Styling
 PLATFORM_CONFIG = {
     "twitter": {
@@ -171,16 +214,6 @@ PLATFORM_CONFIG = {
     }
 }
 
-def get_db_connection():
-    """Erstelle Datenbankverbindung mit WAL-Modus für Concurrency"""
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=10)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA cache_size = -64000")  # 64MB Cache
-    conn.execute("PRAGMA busy_timeout=10000")  # 10s Timeout
-    db_logger.debug(f"DB Connection established: {DB_PATH}")
-    return conn
-
 def extract_referrer_source(referrer: str) -> str:
     """
     Extrahiert die Quelle aus dem Referrer (z.B. 'twitter', 'telegram', 'direct')
@@ -232,132 +265,65 @@ def extract_referrer_source(referrer: str) -> str:
     else:
         return "other"
 
-def init_db():
-    """Initialisiert Datenbank mit notwendigen Tabellen"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Users-Tabelle (erweitert mit owner_wallet für Follower-Tracking)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        address TEXT PRIMARY KEY,
-        first_seen INTEGER,
-        last_login INTEGER,
-        score INTEGER DEFAULT 50,
-        login_count INTEGER DEFAULT 0,
-        created_at TEXT,
-        first_referrer TEXT,
-        last_referrer TEXT,
-        owner_wallet TEXT,
-        is_verified_follower INTEGER DEFAULT 0,
-        display_name TEXT
-    )
-    """)
-    
-    # Events-Tabelle für Audit-Trail (erweitert mit referrer)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS events (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        address TEXT,
-        event_type TEXT,
-        score_before INTEGER,
-        score_after INTEGER,
-        timestamp INTEGER,
-        created_at TEXT,
-        referrer TEXT,
-        user_agent TEXT,
-        ip_address TEXT,
-        owner_wallet TEXT
-    )
-    """)
-    
-    # Airdrops-Tabelle für Tracking
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS airdrops (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        address TEXT UNIQUE,
-        amount REAL,
-        tx_hash TEXT,
-        status TEXT,
-        created_at TEXT
-    )
-    """)
-    
-    # Followers-Tabelle: Link Owner <-> Follower
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS followers (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        owner_wallet TEXT NOT NULL,
-        follower_address TEXT NOT NULL,
-        follower_score INTEGER,
-        follower_display_name TEXT,
-        verified_at TEXT,
-        source_platform TEXT,
-        verified BOOLEAN DEFAULT 1,
-        follow_confirmed BOOLEAN DEFAULT 0,
-        confirmed_at TEXT,
-        UNIQUE(owner_wallet, follower_address),
-        FOREIGN KEY(owner_wallet) REFERENCES users(address),
-        FOREIGN KEY(follower_address) REFERENCES users(address)
-    )
-    """)
-    
-    conn.commit()
-    conn.close()
-    print(f"✓ Datenbank initialisiert: {DB_PATH}")
+def token_duration(duration_minutes = None) -> int:
+    """
+    Token-Gültigkeit vom Client -> Minuten im Bereich 1..TOKEN_MAX_MINUTES
+
+    None = Standard TOKEN_EXPIRY_MINUTES, 0 = Maximum (bis manuelles Abmelden).
+    Raises ValueError für Werte, die keine ganze Zahl sind.
+    """
+    if duration_minutes is None:
+        return TOKEN_EXPIRY_MINUTES
+    if isinstance(duration_minutes, float) and duration_minutes.is_integer():
+        duration_minutes = int(duration_minutes)
+    if isinstance(duration_minutes, bool) or not isinstance(duration_minutes, int):
+        raise ValueError("token_duration_minutes must be an integer")
+    if duration_minutes == 0:
+        # 0 = kein Ablaufdatum, Token gilt bis manuelles Abmelden
+        return TOKEN_MAX_MINUTES
+    return max(1, min(int(duration_minutes), TOKEN_MAX_MINUTES))
 
 def generate_token(address: str, duration_minutes = None) -> str:
     """
-    Generiert einen JWT-ähnlichen Token
+    Generiert einen v1-Token (auth_tokens.py: base64url, HMAC-SHA256)
     
     Args:
         address: Wallet-Adresse
-        duration_minutes: Token-Gültigkeitsdauer in Minuten (None = Standard TOKEN_EXPIRY_MINUTES = 2 Min)
+        duration_minutes: Token-Gültigkeitsdauer in Minuten, siehe token_duration()
     """
-    if duration_minutes is None:
-        duration_minutes = TOKEN_EXPIRY_MINUTES
-    elif duration_minutes == 0:
-        # 0 = kein Ablaufdatum, Token gilt bis manuelles Abmelden
-        duration_minutes = 525600  # 1 Jahr als Maximum
+    duration_minutes = token_duration(duration_minutes)
     
-    expiry = (datetime.utcnow() + timedelta(minutes=int(duration_minutes))).timestamp()
-    token_data = f"{address}:{expiry}"
-    signature = hashlib.sha256((token_data + TOKEN_SECRET).encode()).hexdigest()
-    token = f"{token_data}:{signature}"
+    expiry = int(time.time()) + duration_minutes * 60
+    token = token_signer.issue(address, expiry)
     
     log_activity("DEBUG", "TOKEN", "Generated new token", address=address[:10], duration_minutes=duration_minutes, expiry_timestamp=expiry)
     return token
 
 def verify_token(token: str) -> dict:
-    """Verifiziert und dekodiert einen Token"""
+    """Verifiziert und dekodiert einen Token (v1 oder altes Format, wiederholte Tokens aus dem Cache)"""
     try:
-        parts = token.split(":")
-        if len(parts) != 3:
-            wallet_logger.warning(f"Invalid token format received")
-            return {"valid": False, "error": "Invalid token format"}
-        
-        address, expiry_str, signature = parts
-        expected_sig = hashlib.sha256((f"{address}:{expiry_str}" + TOKEN_SECRET).encode()).hexdigest()
-        
-        if signature != expected_sig:
-            wallet_logger.warning(f"Token signature mismatch for {address[:10]}")
-            return {"valid": False, "error": "Invalid signature"}
-        
-        expiry = float(expiry_str)
-        if datetime.utcfromtimestamp(expiry) < datetime.utcnow():
-            wallet_logger.warning(f"Token expired for {address[:10]}")
-            return {"valid": False, "error": "Token expired"}
-        
+        address, expiry = token_signer.verify(token)
         log_activity("DEBUG", "TOKEN", "Token verified", address=address[:10])
         return {"valid": True, "address": address, "expiry": expiry}
+    except TokenError as e:
+        wallet_logger.warning(f"Token rejected: {e}")
+        return {"valid": False, "error": str(e)}
     except Exception as e:
         wallet_logger.error(f"Token verification error: {str(e)}")
         return {"valid": False, "error": str(e)}
 
+def _airdrop_status(address: str) -> str:
+    """Bestimmt den Airdrop-Status basierend auf Admin-Credentials"""
+    if not ADMIN_WALLET or not ADMIN_PRIVATE_KEY:
+        logger.warning(f"⚠️ Airdrop pending (waiting for admin approval): {address}")
+        return "pending_admin"
+    logger.info(f"✓ Airdrop queued for execution: {address}")
+    return "pending_execution"
+
 async def trigger_airdrop(address: str) -> dict:
     """
     Trigger Airdrop via Telegram Bot API mit Retry-Logik
-    Die echte Ausführung passiert im Telegram Bot Service
+    (eigene Transaktion - /api/verify registriert den Airdrop direkt im Login-Commit)
     """
     address = address.lower()
     max_retries = 3
@@ -365,48 +331,11 @@ async def trigger_airdrop(address: str) -> dict:
     
     for attempt in range(max_retries):
         try:
-            # Prüfe ob Wallet bereits Airdrop bekommen hat
-            conn = get_db_connection()
-            conn.execute("PRAGMA busy_timeout=5000")  # 5 Sekunden Timeout
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT * FROM airdrops WHERE address=?", (address,))
-            existing_airdrop = cursor.fetchone()
-            
-            if existing_airdrop:
-                conn.close()
-                logger.info(f"⚠️ Airdrop already received for {address}")
-                return {"triggered": False, "message": "Airdrop already received"}
-            
-            # Bestimme Status basierend auf Admin-Credentials
-            if not ADMIN_WALLET or not ADMIN_PRIVATE_KEY:
-                status = "pending_admin"
-                logger.warning(f"⚠️ Airdrop pending (waiting for admin approval): {address}")
-            else:
-                status = "pending_execution"
-                logger.info(f"✓ Airdrop queued for execution: {address}")
-            
-            # Registriere Airdrop in Datenbank
-            cursor.execute(
-                """INSERT INTO airdrops (address, amount, status, created_at)
-                   VALUES (?, ?, ?, ?)""",
-                (address, AIRDROP_AMOUNT, status, datetime.utcnow().isoformat())
+            return await storage.airdrops.register(
+                address, AIRDROP_AMOUNT, _airdrop_status(address), datetime.utcnow().isoformat()
             )
-            conn.commit()
-            conn.close()
-            
-            return {
-                "triggered": True,
-                "address": address,
-                "amount": AIRDROP_AMOUNT,
-                "status": status,
-                "message": f"Airdrop of {AIRDROP_AMOUNT} AERA registered with status: {status}"
-            }
             
         except Exception as e:
-            if 'conn' in locals():
-                conn.close()
-            
             if attempt < max_retries - 1 and "database is locked" in str(e):
                 logger.warning(f"⏳ Airdrop retry {attempt + 1}/{max_retries}: {str(e)}")
                 await asyncio.sleep(retry_delay * (attempt + 1))  # Exponential backoff
@@ -420,14 +349,18 @@ async def trigger_airdrop(address: str) -> dict:
 @app.on_event("startup")
 async def startup_event():
     """App-Start: Initialisiere Datenbank und Blockchain Services"""
-    init_db()
+    version = await storage.open()
+    await web3_service.open()
+    # Signatur-Recovery im Prozess-Pool (Worker vorwärmen)
+    signature_verifier.start()
+    print(f"✓ Datenbank initialisiert: {storage.backend.location} ({storage.backend.name}, Schema v{version})")
     logger.info("🚀 VEra-Resonance Server gestartet")
     logger.info(f"   🌐 Öffentliche URL: {PUBLIC_URL}")
     logger.info(f"   📍 Host: {HOST}:{PORT}")
     logger.info(f"   🔐 CORS Origins: {CORS_ORIGINS}")
     
     # Starte Blockchain Sync Queue Processor
-    from blockchain_sync import start_sync_queue_processor, add_to_sync_queue, should_sync_score
+    from blockchain_sync import start_sync_queue_processor, add_to_sync_queue
     asyncio.create_task(start_sync_queue_processor())
     logger.info("   ⛓️  Blockchain Sync Queue gestartet")
     
@@ -436,18 +369,44 @@ async def startup_event():
     asyncio.create_task(start_nft_confirmation_checker())
     logger.info("   🎨 NFT Mint Confirmation Checker gestartet")
     
+    # Geteilter Challenge-Store: abgelaufene Einträge löschen, Obergrenze halten
+    if challenge_store.name == "shared":
+        asyncio.create_task(challenge_store.run())
+    logger.info(f"   🔑 Challenge Store: {challenge_store.name}")
+    
+    # Nur ein Worker sendet Transaktionen (eine Nonce-Folge pro Backend-Wallet) und indexiert
+    background_leader = _acquire_background_lock()
+    
+    # Zweiter Worker auf diesem Host mit Prozess-lokalen Challenges -> Nonces würden zwischen
+    # den Workern verloren gehen; lieber gar nicht starten
+    if not background_leader and challenge_store.name == "memory":
+        logger.error("❌ CHALLENGE_STORE=memory with several uvicorn workers - use CHALLENGE_STORE=shared")
+        raise RuntimeError("CHALLENGE_STORE=memory only supports a single uvicorn worker (use CHALLENGE_STORE=shared)")
+    
+    # Starte Chain-Job-Runner (alle Worker reihen ein, einer arbeitet ab)
+    if background_leader:
+        asyncio.create_task(chain_jobs.run())
+        logger.info("   🧵 Chain Job Runner gestartet")
+    
+    # Starte Transaktions-Pipeline (Outbox-Sender + Receipt-Poller)
+    if TX_PIPELINE_ENABLED and web3_service.nonces is not None:
+        # Alle Worker reihen in die gemeinsame Outbox ein
+        web3_service.outbox = tx_pipeline
+        if background_leader:
+            asyncio.create_task(tx_pipeline.run())
+            logger.info("   📮 Transaction Pipeline gestartet")
+        else:
+            # Bestätigungen laufen im Pipeline-Worker: Web3-Cache hier über die Outbox abgleichen
+            asyncio.create_task(tx_pipeline.follow())
+    
+    # Starte InteractionRecorded Indexer
+    if INDEXER_ENABLED and web3_service.resonance_registry and background_leader:
+        asyncio.create_task(interaction_indexer.run())
+        logger.info("   🔎 Interaction Indexer gestartet")
+    
     # Initial Scan: Füge alle User mit Score ≥10 zur Sync-Queue hinzu
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT address, score, blockchain_score
-            FROM users
-            WHERE score >= 10
-            ORDER BY score DESC
-        """)
-        users = cursor.fetchall()
-        conn.close()
+        users = await storage.users.sync_candidates(min_score=10)
         
         added_count = 0
         for address, db_score, blockchain_score in users:
@@ -461,6 +420,14 @@ async def startup_event():
     except Exception as e:
         logger.error(f"   ❌ Failed to scan users for initial sync: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """App-Stop: Schließe gepoolte Datenbank- und RPC-Verbindungen"""
+    await web3_service.close()
+    await storage.close()
+    signature_verifier.close()
+    logger.info("⏹️ VEra-Resonance Server gestoppt")
+
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     """
@@ -539,8 +506,9 @@ async def health_check():
         "status": "healthy",
         "service": "VEra-Resonance v0.1",
         "timestamp": int(time.time()),
-        "database": "connected" if os.path.exists(DB_PATH) else "disconnected",
-        "database_path": DB_PATH,
+        "database": "connected" if storage.backend.name != "sqlite" or os.path.exists(DB_PATH) else "disconnected",
+        "database_backend": storage.backend.name,
+        "database_path": storage.backend.location,
         "deployment": {
             "mode": DEPLOYMENT_MODE,
             "local_url": f"http://localhost:{PORT}",
@@ -561,8 +529,17 @@ async def debug_info(req: Request):
         "database": {
             "path": DB_PATH,
             "exists": os.path.exists(DB_PATH),
-            "size_mb": os.path.getsize(DB_PATH) / (1024 * 1024) if os.path.exists(DB_PATH) else 0
+            "size_mb": os.path.getsize(DB_PATH) / (1024 * 1024) if os.path.exists(DB_PATH) else 0,
+            "storage": storage.describe(),
+            "pool": storage.backend.stats()
         },
+        "web3_cache": web3_service.cache.stats(),
+        "interaction_indexer": interaction_indexer.stats(),
+        "tx_pipeline": tx_pipeline.stats(),
+        "signature_verifier": signature_verifier.stats(),
+        "challenge_store": challenge_store.stats(),
+        "tokens": token_signer.stats(),
+        "chain_jobs": chain_jobs.stats(),
         "cors": "enabled",
         "endpoints": {
             "health": "/api/health",
@@ -573,11 +550,17 @@ async def debug_info(req: Request):
         }
     }
 
+def login_message(nonce: str) -> str:
+    """Login-Nachricht, die der Client per personal_sign signiert"""
+    return f"Signiere diese Nachricht um dich bei AEra anzumelden:\nNonce: {nonce}"
+
+
 @app.post("/api/nonce")
 async def get_nonce(req: Request):
     """
     Generiert eine Nonce für Message-Signing
     Diese Nonce muss vom Client mit MetaMask signiert werden
+    Gespeichert im challenge_store (einmalig, CHALLENGE_TTL_SECONDS gültig)
     """
     try:
         data = await req.json()
@@ -589,18 +572,175 @@ async def get_nonce(req: Request):
         
         # Generiere zufällige Nonce
         nonce = secrets.token_hex(16)
+        expires_in = await challenge_store.issue("login", address, nonce)
         log_activity("DEBUG", "AUTH", "Nonce generated", address=address[:10], nonce=nonce[:16])
         
         return {
             "success": True,
             "address": address,
             "nonce": nonce,
-            "message": f"Signiere diese Nachricht um dich bei AEra anzumelden:\nNonce: {nonce}"
+            "message": login_message(nonce),
+            "expires_in": int(expires_in)
         }
     except Exception as e:
         log_activity("ERROR", "AUTH", f"Nonce error: {str(e)}")
         return {"error": str(e), "success": False}
 
+async def _record_mint_result(address: str, result: dict, minted_at: str) -> str:
+    """
+    Ergebnis von web3_service.mint_identity_nft() in der DB festhalten -> Referenz für Logs
+
+    Direkt gesendet: 'minting' + tx_hash; Outbox-Job: der Sender setzt 'minting' + tx_hash
+    nach dem Broadcast (bis dahin liefert ein erneuter Mint denselben Job)
+    """
+    if result.get("token_id") is not None:
+        await storage.users.set_identity_active(address, result["token_id"])
+        return f"token #{result['token_id']}"
+    if result.get("tx_hash"):
+        await storage.users.set_identity_minting(address, result["tx_hash"], minted_at)
+        return result["tx_hash"][:16] + "..."
+    return f"job {result['job_id']}"
+
+
+async def _sync_score(job, address: str, score: int):
+    """
+    BLOCKCHAIN: Score-Sync (every 10 points / initial score 50)
+    Erst der RPC-Aufruf, dann das Ergebnis in einer kurzen Transaktion speichern -
+    keine Datenbankverbindung (und keine Schreibsperre) über den Chain-Round-Trip
+    """
+    user = await storage.users.get(address)
+    blockchain_score = (user['blockchain_score'] if user else 0) or 0
+    if not should_sync_score(score, blockchain_score):
+        await job.step("score_sync", status="skipped", score=score, blockchain_score=blockchain_score)
+        return
+    
+    success, result = await web3_service.update_blockchain_score(address, score)
+    if success:
+        await storage.users.set_blockchain_score(address, score, datetime.now(timezone.utc).isoformat())
+        log_activity("INFO", "BLOCKCHAIN", "📊 Score sync submitted", address=address[:10], score=score)
+        await job.step("score_sync", score=score, tx_job_id=result.get("job_id"))
+    else:
+        # Nicht-kritischer Fehler - nächster Login bzw. die Sync-Queue versucht es erneut
+        error_msg = result.get("error")
+        log_activity("WARNING", "BLOCKCHAIN", f"Score sync failed: {error_msg}", address=address[:10])
+        await job.step("score_sync", status="failed", score=score, error=error_msg)
+
+
+async def _mint_identity(job, address: str, identity: Optional[dict], minted_at: str):
+    """Identity NFT minten und Ergebnis in DB + Job-Fortschritt festhalten"""
+    success, result = await web3_service.mint_identity_nft(address, identity)
+    if success:
+        # 'minting' + tx_hash - background task will confirm later
+        mint_ref = await _record_mint_result(address, result, minted_at)
+        log_activity("INFO", "BLOCKCHAIN", "📤 Identity NFT mint submitted", address=address[:10], tx=mint_ref)
+        await job.step("identity_mint", tx=mint_ref, tx_job_id=result.get("job_id"))
+    else:
+        error_msg = result.get("error")
+        log_activity("WARNING", "BLOCKCHAIN", f"NFT minting failed: {error_msg}", address=address[:10])
+        # Nicht-kritischer Fehler - nächster Login versucht es erneut
+        await storage.users.set_identity_failed(address)
+        await job.step("identity_mint", status="failed", error=error_msg)
+
+
+async def _check_identity(job, address: str, user) -> dict:
+    """
+    Identity NFT prüfen (resolve_identity) und als Job-Schritt festhalten
+    RPC-Fehler -> Exception: ChainJobs wiederholt den Job, statt ohne gesicherten Status zu minten
+    """
+    identity = await web3_service.resolve_identity(address, user)
+    if identity["source"] == "error":
+        await job.step("identity_check", status="failed", error="RPC error")
+        raise RuntimeError("Identity NFT check failed (RPC error)")
+    await job.step("identity_check", has_identity=identity["has_identity"], token_id=identity["token_id"])
+    return identity
+
+
+async def _login_chain_job(job):
+    """
+    Chain-Job nach /api/verify: Score-Sync + Identity NFT prüfen/minten
+    (lief früher vor der Login-Antwort; RPC-Fehler -> Job wird wiederholt)
+    """
+    address = job.address
+    
+    # BLOCKCHAIN: Check if score sync needed (every 10 points / initial score 50)
+    await _sync_score(job, address, job.payload["score"])
+    
+    # ===== BLOCKCHAIN: IDENTITY NFT INTEGRATION =====
+    # Check current identity status from DB
+    identity_result = await storage.users.get(address)
+    db_identity_status = identity_result['identity_status'] if identity_result else 'pending'
+    
+    # Prüfe ob User bereits Identity NFT hat (DB 'active' -> kein RPC, sonst ein Multicall)
+    identity = await _check_identity(job, address, identity_result)
+    
+    # RETRY LOGIC: If status is 'failed' or 'pending' (old users), try minting again
+    if not identity["has_identity"] and db_identity_status in ['failed', 'pending']:
+        log_activity("INFO", "BLOCKCHAIN", "🎨 Starting Identity NFT mint", address=address[:10])
+        await _mint_identity(job, address, identity, job.payload["login_at"])
+    elif identity["source"] != "db" and identity["token_id"] is not None:
+        # User hat bereits NFT - Token ID kam im selben Multicall; Update DB falls noch nicht gespeichert
+        await storage.users.set_identity_active(address, identity["token_id"], only_if_missing=True)
+        log_activity("INFO", "BLOCKCHAIN", "✓ Identity NFT verified", address=address[:10], token_id=identity["token_id"])
+
+
+async def _dashboard_chain_job(job):
+    """
+    Chain-Job nach /admin/verify-signature: neuer User -> Initial-Score + Mint,
+    bestehender User -> Mint-Retry (failed/pending oder minting ohne tx_hash)
+    """
+    owner = job.address
+    current_iso = datetime.now(timezone.utc).isoformat()
+    
+    if job.payload.get("new_user"):
+        # Sync initial score to blockchain
+        log_activity("INFO", "BLOCKCHAIN", "🔄 Syncing initial score", address=owner[:10])
+        await _sync_score(job, owner, INITIAL_SCORE)
+        
+        log_activity("INFO", "BLOCKCHAIN", "🎨 Starting Identity NFT mint for new dashboard user", address=owner[:10])
+        await _mint_identity(job, owner, None, current_iso)
+        return
+    
+    # ===== EXISTING USER: Check for retry =====
+    result = await storage.users.get(owner)
+    if not result:
+        return
+    db_identity_status = result['identity_status']
+    tx_hash = result['identity_mint_tx_hash']
+    
+    # RETRY if status is 'minting' without tx_hash OR 'failed'
+    if db_identity_status in ['failed', 'pending'] or (db_identity_status == 'minting' and not tx_hash):
+        log_activity("INFO", "BLOCKCHAIN", "🔄 Retry: NFT mint for dashboard login", address=owner[:10])
+        
+        # Check if user already has NFT on-chain (balanceOf + Token ID in einem Multicall)
+        identity = await _check_identity(job, owner, result)
+        
+        if not identity["has_identity"]:
+            await _mint_identity(job, owner, identity, current_iso)
+        elif identity["token_id"] is not None:
+            # User already has NFT - update status
+            await storage.users.set_identity_active(owner, identity["token_id"])
+            log_activity("INFO", "BLOCKCHAIN", "✓ NFT already minted, status updated", 
+                        address=owner[:10], token_id=identity["token_id"])
+
+
+chain_jobs.register("login", _login_chain_job)
+chain_jobs.register("dashboard_login", _dashboard_chain_job)
+
+
+async def _submit_chain_job(kind: str, address: str, payload: dict) -> Optional[dict]:
+    """Chain-Job einreihen -> Verweise für die Antwort (None, falls das Einreihen scheitert)"""
+    try:
+        job_id = await chain_jobs.submit(kind, address, payload)
+    except Exception as e:
+        log_activity("WARNING", "BLOCKCHAIN", f"Could not queue chain job (non-critical): {str(e)}", address=address[:10])
+        return None
+    return {
+        "job_id": job_id,
+        "status_url": f"/api/blockchain/jobs/{job_id}",
+        "events_url": f"/api/blockchain/jobs/{job_id}/events",
+    }
+
+
 @app.post("/api/verify")
 async def verify(req: Request):
     """
@@ -652,6 +792,13 @@ async def verify(req: Request):
             log_activity("ERROR", "AUTH", "Invalid owner wallet format", address=address[:10])
             return {"error": "Invalid owner wallet format", "is_human": False}
         
+        # Token-Dauer vor dem Verbrauchen der Nonce prüfen (kein Login ohne Token)
+        try:
+            token_duration_minutes = token_duration(token_duration_minutes)
+        except ValueError as e:
+            log_activity("ERROR", "AUTH", "Invalid token duration", address=address[:10])
+            return {"error": str(e), "is_human": False}
+        
         # ===== KRITISCH: SIGNATURE VALIDIERUNG =====
         if not signature:
             log_activity("ERROR", "AUTH", "No signature provided - REJECTING", address=address[:10])
@@ -666,16 +813,15 @@ async def verify(req: Request):
             log_activity("ERROR", "AUTH", "Invalid address format", address=address[:10])
             return {"error": "Invalid address format", "is_human": False}
         
-        # ===== VALIDIERE SIGNATURE MIT web3.py =====
+        # ===== NONCE EINMALIG VERBRAUCHEN (von /api/nonce ausgestellt) =====
+        if await challenge_store.take("login", address, nonce) != TAKE_OK:
+            log_activity("WARNING", "AUTH", "Unknown or expired nonce", address=address[:10])
+            return {"error": "Invalid or expired nonce - request a new one", "is_human": False}
+        
+        # ===== VALIDIERE SIGNATURE (Prozess-Pool, blockiert den Event Loop nicht) =====
         try:
-            from eth_account.messages import encode_defunct
-            from eth_account import Account
-            
-            message_text = f"Signiere diese Nachricht um dich bei AEra anzumelden:\nNonce: {nonce}"
-            message = encode_defunct(text=message_text)
-            
             # Verifiziere Signature
-            recovered_address = Account.recover_message(message, signature=signature)
+            recovered_address = await signature_verifier.recover(login_message(nonce), signature)
             
             if recovered_address.lower() != address:
                 log_activity("ERROR", "AUTH", "Signature verification FAILED", address=address[:10], recovered=recovered_address[:10])
@@ -690,241 +836,26 @@ async def verify(req: Request):
             return {"error": f"Signature error: {str(e)}", "is_human": False}
         
         # ===== BENUTZER-LOGIN (nach Signature-Verifizierung) =====
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Benutzer suchen
-        cursor.execute("SELECT * FROM users WHERE address=?", (address,))
-        user = cursor.fetchone()
-        
         current_timestamp = int(time.time())
         current_iso = datetime.utcnow().isoformat()
         
-        if user:
-            # Benutzer existiert bereits
-            old_score = user['score']
-            # sqlite3.Row unterstützt kein .get() - verwende try/except
-            try:
-                pending_bonus = user['pending_bonus'] if user['pending_bonus'] is not None else 0
-            except (KeyError, IndexError):
-                pending_bonus = 0
-            
-            # HYBRID-SYSTEM: Score erhöhen + pending_bonus aktivieren
-            new_score = min(user['score'] + 1 + pending_bonus, 100)
-            login_count = user['login_count'] + 1
-            
-            cursor.execute(
-                """UPDATE users 
-                   SET last_login=?, score=?, login_count=?, last_referrer=?, pending_bonus=0
-                   WHERE address=?""",
-                (current_timestamp, new_score, login_count, referrer_source, address)
-            )
-            
-            if pending_bonus > 0:
-                log_activity("INFO", "BONUS", "✓ Follow-Bonus activated",
-                            address=address[:10],
-                            bonus=f"+{pending_bonus}",
-                            new_score=new_score)
-            
-            cursor.execute(
-                """INSERT INTO events 
-                   (address, event_type, score_before, score_after, timestamp, created_at, referrer, user_agent, ip_address)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (address, "login", old_score, new_score, current_timestamp, current_iso, referrer_source, user_agent[:200], client_ip)
-            )
-            
-            # BLOCKCHAIN: Check if score sync needed (every 10 points)
-            await sync_score_after_update(address, new_score, conn)
-            
-            first_seen = user['first_seen']
-            message = f"Welcome back! Score increased to {new_score}/100"
-            log_activity("INFO", "AUTH", "Existing user login", 
-                        address=address[:10], 
-                        old_score=old_score, 
-                        new_score=new_score, 
-                        login_count=login_count,
-                        referrer=referrer_source)
-            
-            # NEW: Auch bei existierenden User-Logins: Follower-Eintrag erstellen wenn owner_wallet vorhanden
-            if owner_wallet:
-                try:
-                    # Prüfe ob dieser Follower auf dieser Plattform bereits existiert
-                    cursor.execute(
-                        """SELECT id FROM followers 
-                           WHERE owner_wallet = ? AND follower_address = ? AND source_platform = ?""",
-                        (owner_wallet, address, referrer_source)
-                    )
-                    existing = cursor.fetchone()
-                    
-                    if existing:
-                        # Update: Nur Score und Timestamp aktualisieren
-                        cursor.execute(
-                            """UPDATE followers 
-                               SET follower_score = ?, verified_at = ?
-                               WHERE owner_wallet = ? AND follower_address = ? AND source_platform = ?""",
-                            (new_score, current_iso, owner_wallet, address, referrer_source)
-                        )
-                        log_activity("INFO", "FOLLOWER", "✓ Follower score updated", 
-                                    owner=owner_wallet[:10], 
-                                    follower=address[:10], 
-                                    source=referrer_source)
-                    else:
-                        # Insert: Neuer Follower-Eintrag für diese Plattform
-                        cursor.execute(
-                            """INSERT INTO followers 
-                               (owner_wallet, follower_address, follower_score, follower_display_name, verified_at, source_platform, verified)
-                               VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                            (owner_wallet, address, new_score, display_name or None, current_iso, referrer_source, 1)
-                        )
-                        log_activity("INFO", "FOLLOWER", "✓ New follower registered (multi-platform)", 
-                                    owner=owner_wallet[:10], 
-                                    follower=address[:10], 
-                                    source=referrer_source)
-                        
-                        # HYBRID-SYSTEM: Owner bekommt Follow-Bonus (pending)
-                        try:
-                            cursor.execute(
-                                "UPDATE users SET pending_bonus = pending_bonus + 1 WHERE address = ?",
-                                (owner_wallet,)
-                            )
-                            log_activity("INFO", "BONUS", "✓ Follow-Bonus added (pending)",
-                                        owner=owner_wallet[:10],
-                                        bonus="+1",
-                                        activation="next_login")
-                        except Exception as bonus_err:
-                            log_activity("WARNING", "BONUS", f"Could not add pending bonus: {str(bonus_err)}")
-                except Exception as e:
-                    log_activity("WARNING", "FOLLOWER", f"Could not create/update follower entry: {str(e)}")
-            
-        else:
-            # Neuer Benutzer
-            initial_score = 50
-            cursor.execute(
-                """INSERT INTO users 
-                   (address, first_seen, last_login, score, login_count, created_at, first_referrer, last_referrer, owner_wallet, is_verified_follower, display_name)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (address, current_timestamp, current_timestamp, initial_score, 1, current_iso, referrer_source, referrer_source, owner_wallet or None, 1 if owner_wallet else 0, display_name or None)
-            )
-            
-            cursor.execute(
-                """INSERT INTO events 
-                   (address, event_type, score_before, score_after, timestamp, created_at, referrer, user_agent, ip_address, owner_wallet)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (address, "signup", 0, initial_score, current_timestamp, current_iso, referrer_source, user_agent[:200], client_ip, owner_wallet or None)
-            )
-            
-            # NEW: Wenn Owner vorhanden, registriere als Follower
-            if owner_wallet:
-                try:
-                    cursor.execute(
-                        """INSERT INTO followers 
-                           (owner_wallet, follower_address, follower_score, follower_display_name, verified_at, source_platform, verified)
-                           VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                        (owner_wallet, address, initial_score, display_name or None, current_iso, referrer_source, 1)
-                    )
-                    log_activity("INFO", "FOLLOWER", "✓ Follower registered", 
-                                owner=owner_wallet[:10], 
-                                follower=address[:10], 
-                                source=referrer_source)
-                    
-                    # HYBRID-SYSTEM: Owner bekommt Follow-Bonus (pending)
-                    try:
-                        cursor.execute(
-                            "UPDATE users SET pending_bonus = pending_bonus + 1 WHERE address = ?",
-                            (owner_wallet,)
-                        )
-                        log_activity("INFO", "BONUS", "✓ Follow-Bonus added (pending)",
-                                    owner=owner_wallet[:10],
-                                    bonus="+1",
-                                    activation="next_login")
-                    except Exception as bonus_err:
-                        log_activity("WARNING", "BONUS", f"Could not add pending bonus: {str(bonus_err)}")
-                except Exception as e:
-                    log_activity("WARNING", "FOLLOWER", f"Could not register follower: {str(e)}")
-            
-            first_seen = current_timestamp
-            new_score = initial_score
-            message = f"Welcome! Your initial Resonance Score is {initial_score}/100"
-            if owner_wallet:
-                message += f" | Registered as follower"
-            log_activity("INFO", "AUTH", "New user registered", 
-                        address=address[:10], 
-                        initial_score=initial_score,
-                        referrer=referrer_source,
-                        owner=owner_wallet[:10] if owner_wallet else "none")
-            
-            # BLOCKCHAIN: Check if score sync needed (initial score 50)
-            await sync_score_after_update(address, new_score, conn)
-            
-            # DELAY: Wait 2 seconds to prevent nonce conflict between score sync and NFT mint
-            await asyncio.sleep(2)
-        
-        # ===== BLOCKCHAIN: IDENTITY NFT INTEGRATION =====
-        try:
-            # Check current identity status from DB
-            cursor.execute("SELECT identity_status, identity_nft_token_id FROM users WHERE address=?", (address,))
-            identity_result = cursor.fetchone()
-            db_identity_status = identity_result[0] if identity_result else 'pending'
-            db_token_id = identity_result[1] if identity_result else None
-            
-            # Prüfe ob User bereits Identity NFT hat
-            has_identity = await web3_service.has_identity_nft(address)
-            
-            # RETRY LOGIC: If status is 'failed' or 'pending' (old users), try minting again
-            if not has_identity and db_identity_status in ['failed', 'pending']:
-                log_activity("INFO", "BLOCKCHAIN", "🎨 Starting Identity NFT mint", address=address[:10])
-                success, result = await web3_service.mint_identity_nft(address)
-                
-                if success:
-                    tx_hash = result
-                    # Set status to 'minting' with tx_hash - background task will confirm later
-                    cursor.execute(
-                        """UPDATE users 
-                           SET identity_status='minting', identity_mint_tx_hash=?, identity_minted_at=?
-                           WHERE address=?""",
-                        (tx_hash, current_iso, address)
-                    )
-                    
-                    log_activity("INFO", "BLOCKCHAIN", "📤 Identity NFT mint transaction sent", 
-                                address=address[:10], 
-                                tx_hash=tx_hash[:16] + "...")
-                    message += f" | Identity NFT minting (TX: {tx_hash[:10]}...)"
-                else:
-                    error_msg = result
-                    log_activity("WARNING", "BLOCKCHAIN", f"NFT minting failed: {error_msg}", address=address[:10])
-                    # Nicht-kritischer Fehler - fahre fort
-                    cursor.execute(
-                        """UPDATE users 
-                           SET identity_status='failed'
-                           WHERE address=?""",
-                        (address,)
-                    )
-            else:
-                # User hat bereits NFT - hole Token ID
-                token_id = await web3_service.get_identity_token_id(address)
-                if token_id is not None:
-                    # Update DB falls noch nicht gespeichert
-                    cursor.execute(
-                        """UPDATE users 
-                           SET identity_nft_token_id=?, identity_status='active'
-                           WHERE address=? AND identity_nft_token_id IS NULL""",
-                        (token_id, address)
-                    )
-                    log_activity("INFO", "BLOCKCHAIN", "✓ Identity NFT verified", 
-                                address=address[:10], 
-                                token_id=token_id)
-        
-        except Exception as e:
-            log_activity("WARNING", "BLOCKCHAIN", f"Identity NFT error (non-critical): {str(e)}", address=address[:10])
-            # Nicht-kritischer Fehler - System funktioniert weiter ohne Blockchain
+        login = await storage.users.record_login(
+            address, referrer_source, user_agent, client_ip,
+            owner_wallet, display_name, current_timestamp, current_iso,
+            AIRDROP_AMOUNT, _airdrop_status(address)
+        )
+        new_score = login["new_score"]
+        first_seen = login["first_seen"]
+        message = login["message"]
         
-        conn.commit()
-        conn.close()
+        # ===== BLOCKCHAIN: Score-Sync + Identity NFT im Hintergrund (chain_jobs) =====
+        chain_job = await _submit_chain_job("login", address, {"score": new_score, "login_at": current_iso})
+        if chain_job:
+            message += f" | On-chain sync queued (job {chain_job['job_id']})"
         
-        # Trigger Airdrop NACH Commit
-        if not user:
-            airdrop_result = await trigger_airdrop(address)
-            message += f" | {airdrop_result['message']}"
+        # Airdrop wurde im Login-Commit registriert
+        if login["airdrop"]:
+            message += f" | {login['airdrop']['message']}"
         
         # Generiere Token
         token = generate_token(address, token_duration_minutes)
@@ -937,9 +868,10 @@ async def verify(req: Request):
             "resonance_score": new_score,
             "first_seen": first_seen,
             "last_login": current_timestamp,
-            "login_count": user['login_count'] + 1 if user else 1,
+            "login_count": login["login_count"],
             "message": message,
-            "token": token
+            "token": token,
+            "chain_job": chain_job
         }
         
     except Exception as e:
@@ -956,12 +888,7 @@ async def get_user(address: str):
     """
     try:
         address = address.lower()
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM users WHERE address=?", (address,))
-        user = cursor.fetchone()
-        conn.close()
+        user = await storage.users.get(address)
         
         if not user:
             return {"error": "User not found"}
@@ -984,24 +911,15 @@ async def get_stats():
     Gibt Statistiken aus (öffentlich)
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) as total FROM users")
-        total_users = cursor.fetchone()['total']
-        
-        cursor.execute("SELECT AVG(score) as avg_score FROM users")
-        avg_score = cursor.fetchone()['avg_score']
-        
-        cursor.execute("SELECT COUNT(*) as total FROM events WHERE event_type='login'")
-        total_logins = cursor.fetchone()['total']
-        
-        conn.close()
+        # O(1): Zähler werden per Trigger in stats_counters gepflegt (siehe stats.py)
+        counters = await storage.stats.counters()
+        total_users = counters["user_count"]
+        avg_score = counters["score_sum"] / total_users if total_users else 0
         
         return {
             "total_users": total_users,
-            "average_score": round(avg_score, 2) if avg_score else 0,
-            "total_logins": total_logins,
+            "average_score": round(avg_score, 2),
+            "total_logins": counters["login_count"],
             "timestamp": int(time.time())
         }
         
@@ -1009,28 +927,28 @@ async def get_stats():
         return {"error": str(e)}
 
 @app.get("/api/events/{address}")
-async def get_user_events(address: str):
+async def get_user_events(address: str, cursor: str = None, limit: int = None):
     """
-    Ruft Login-Ereignisse eines Benutzers ab
+    Ruft Login-Ereignisse eines Benutzers ab (Keyset-Pagination, neueste zuerst)
+    
+    Query Parameters:
+        cursor: next_cursor der vorherigen Seite (optional)
+        limit: Seitengröße (Standard PAGE_SIZE_DEFAULT, max PAGE_SIZE_MAX)
     """
     try:
         address = address.lower()
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            """SELECT * FROM events 
-               WHERE address=? 
-               ORDER BY timestamp DESC 
-               LIMIT 50""",
-            (address,)
-        )
-        events = cursor.fetchall()
-        conn.close()
+        size = page_size(limit)
+        
+        after = decode_cursor(cursor) if cursor else None
+        events, total = await storage.events.page(address, after, size)
+        has_more = len(events) > size
+        events = events[:size]
         
         return {
             "address": address,
-            "events": [dict(event) for event in events]
+            "events": [dict(event) for event in events],
+            "total": total,
+            "next_cursor": encode_cursor(events[-1]['timestamp'], events[-1]['id']) if has_more else None
         }
         
     except Exception as e:
@@ -1042,47 +960,11 @@ async def get_referrer_stats():
     Gibt Statistiken über Referrer-Quellen zurück
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Neue User pro Referrer
-        cursor.execute("""
-            SELECT first_referrer, COUNT(*) as count
-            FROM users
-            WHERE first_referrer IS NOT NULL
-            GROUP BY first_referrer
-            ORDER BY count DESC
-        """)
-        new_users_by_referrer = cursor.fetchall()
-        
-        # Alle Events pro Referrer
-        cursor.execute("""
-            SELECT referrer, COUNT(*) as count
-            FROM events
-            WHERE referrer IS NOT NULL
-            GROUP BY referrer
-            ORDER BY count DESC
-        """)
-        events_by_referrer = cursor.fetchall()
-        
-        # Top Referrer letzte 24h
-        yesterday = int(time.time()) - (24 * 3600)
-        cursor.execute("""
-            SELECT referrer, COUNT(*) as count
-            FROM events
-            WHERE referrer IS NOT NULL AND timestamp > ?
-            GROUP BY referrer
-            ORDER BY count DESC
-            LIMIT 10
-        """, (yesterday,))
-        top_24h = cursor.fetchall()
-        
-        conn.close()
+        # Summiert stündliche Buckets statt users/events zu scannen (siehe rollups.py)
+        sources = await storage.stats.referrers(int(time.time()) - 24 * 3600)
         
         return {
-            "new_users_by_source": [dict(r) for r in new_users_by_referrer],
-            "total_events_by_source": [dict(r) for r in events_by_referrer],
-            "top_sources_24h": [dict(r) for r in top_24h],
+            **sources,
             "timestamp": int(time.time())
         }
         
@@ -1111,15 +993,7 @@ async def get_blockchain_identity(address: str):
         address = address.lower()
         
         # Get DB info
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT identity_nft_token_id, identity_status, identity_minted_at, identity_mint_tx_hash
-               FROM users WHERE address=?""",
-            (address,)
-        )
-        user = cursor.fetchone()
-        conn.close()
+        user = await storage.users.get(address)
         
         if not user:
             return {
@@ -1142,9 +1016,10 @@ async def get_blockchain_identity(address: str):
             has_identity = True
             token_id = db_token_id
         else:
-            # Check blockchain for pending/failed cases
-            has_identity = await web3_service.has_identity_nft(address)
-            token_id = await web3_service.get_identity_token_id(address) if has_identity else db_token_id
+            # Check blockchain for pending/failed cases (ein Multicall)
+            identity = await web3_service.resolve_identity(address)
+            has_identity = identity["has_identity"]
+            token_id = identity["token_id"] if has_identity else db_token_id
         
         contract_address = os.getenv("IDENTITY_NFT_ADDRESS", "")
         tx_hash = user['identity_mint_tx_hash']
@@ -1188,23 +1063,19 @@ async def get_blockchain_score(address: str):
         address = address.lower()
         
         # Get DB info
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            """SELECT score, blockchain_score, blockchain_score_synced_at, last_blockchain_sync
-               FROM users WHERE address=?""",
-            (address,)
-        )
-        user = cursor.fetchone()
+        user = await storage.users.get(address)
         
         if not user:
-            conn.close()
             return {"error": "User not found"}
         
         # Calculate Resonance Score (Own + Avg Follower)
+        # resonance_calculator arbeitet direkt auf einer sqlite3-Verbindung - nur mit dem SQLite-Backend
+        if storage.backend.name != "sqlite":
+            return {"error": "Resonance score calculation requires the SQLite backend"}
         from resonance_calculator import calculate_resonance_score
-        own_score, avg_follower_score, follower_count, total_resonance = calculate_resonance_score(address, conn)
-        conn.close()
+        own_score, avg_follower_score, follower_count, total_resonance = await storage.backend.db.read(
+            lambda conn: calculate_resonance_score(address, conn)
+        )
         
         # Get blockchain score
         blockchain_score = await web3_service.get_blockchain_score(address)
@@ -1238,13 +1109,87 @@ async def get_blockchain_score(address: str):
         return {"error": str(e)}
 
 
+@app.get("/api/blockchain/tx/{job_id}")
+async def get_blockchain_tx(job_id: int):
+    """
+    Status eines Transaktions-Jobs (job_id aus Mint / Score-Update / Interaktion)
+    
+    Returns:
+        {
+            "job_id": 42,
+            "kind": "mint_identity",
+            "status": "queued" | "sent" | "confirmed" | "reverted" | "failed",
+            "tx_hash": "0x..." | null,
+            "block_number": 123 | null,
+            "basescan_url": "https://sepolia.basescan.org/tx/0x..." | null,
+            ...
+        }
+    """
+    job = await tx_pipeline.job(job_id)
+    if job is None:
+        return {"error": "Job not found"}
+    return job
+
+
+@app.get("/api/blockchain/jobs/{job_id}")
+async def get_chain_job(job_id: int):
+    """
+    Status eines Chain-Jobs (chain_job.job_id aus /api/verify bzw. /admin/verify-signature)
+    
+    Returns:
+        {
+            "job_id": 7,
+            "kind": "login",
+            "status": "queued" | "running" | "done" | "failed",
+            "steps": [{"step": "score_sync", "status": "done", ...}, {"step": "identity_mint", "tx_job_id": 42, ...}],
+            ...
+        }
+    """
+    job = await chain_jobs.job(job_id)
+    if job is None:
+        return {"error": "Job not found"}
+    return job
+
+
+@app.get("/api/blockchain/jobs/{job_id}/events")
+async def stream_chain_job(job_id: int):
+    """
+    Server-Sent Events für einen Chain-Job: "progress" bei jeder Änderung,
+    abschließend "done" bzw. "failed" (oder "error", falls der Job unbekannt ist)
+    
+    Client: new EventSource(`/api/blockchain/jobs/${id}/events`)
+    """
+    async def _events():
+        sent = False
+        keepalive_at = time.monotonic()
+        async for view in chain_jobs.events(job_id):
+            if view is None:
+                # Kommentarzeile hält Proxies/Browser-Verbindung offen
+                if time.monotonic() - keepalive_at >= 15:
+                    keepalive_at = time.monotonic()
+                    yield ": keep-alive\n\n"
+                continue
+            sent = True
+            keepalive_at = time.monotonic()
+            event = view["status"] if view["status"] in ("done", "failed") else "progress"
+            yield f"event: {event}\ndata: {json.dumps(view)}\n\n"
+        if not sent:
+            yield f"event: error\ndata: {json.dumps({'error': 'Job not found'})}\n\n"
+    
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/api/blockchain/interactions/{address}")
-async def get_blockchain_interactions(address: str, offset: int = 0, limit: int = 10):
+async def get_blockchain_interactions(address: str, cursor: str = None, limit: int = 10):
     """
-    Get user's interaction history from blockchain
+    Get user's interaction history (indexed InteractionRecorded events, full history)
     
     Query Parameters:
-        offset: Pagination offset (default 0)
+        cursor: next_cursor of the previous page (optional)
         limit: Results per page (default 10, max 50)
     
     Returns:
@@ -1262,16 +1207,40 @@ async def get_blockchain_interactions(address: str, offset: int = 0, limit: int
                 }
             ],
             "total": 5,
-            "offset": 0,
-            "limit": 10
+            "next_cursor": "...",
+            "limit": 10,
+            "indexed_block": 12345678
         }
     """
     try:
         address = address.lower()
-        limit = min(limit, 50)  # Max 50 per request
+        limit = max(1, min(limit, 50))  # Max 50 per request
         
-        # Get interactions from blockchain
-        interactions = await web3_service.get_user_interactions(address, offset, limit)
+        # Indexer noch nie gelaufen (z.B. INDEXER_ENABLED=false): Live-Abfrage der letzten Blöcke
+        indexed_block = await storage.interactions.checkpoint(CHECKPOINT_NAME)
+        if indexed_block is None:
+            interactions = await web3_service.get_user_interactions(address, 0, limit)
+            total, next_cursor = len(interactions), None
+        else:
+            after = decode_cursor(cursor) if cursor else None
+            rows, total = await storage.interactions.page(address, after, limit)
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["block_number"], rows[-1]["log_index"]) if has_more else None
+            interactions = [
+                {
+                    "initiator": row["follower"],
+                    "responder": row["creator"],
+                    "interaction_type": row["action_type"],
+                    "timestamp": row["timestamp"],
+                    "link_id": row["link_id"],
+                    "weight_follower": row["weight_follower"],
+                    "weight_creator": row["weight_creator"],
+                    "tx_hash": row["tx_hash"],
+                    "block_number": row["block_number"],
+                }
+                for row in rows
+            ]
         
         # Map interaction types
         type_names = {
@@ -1300,9 +1269,10 @@ async def get_blockchain_interactions(address: str, offset: int = 0, limit: int
         return {
             "address": address,
             "interactions": enhanced_interactions,
-            "total": len(interactions),
-            "offset": offset,
-            "limit": limit
+            "total": total,
+            "next_cursor": next_cursor,
+            "limit": limit,
+            "indexed_block": indexed_block
         }
         
     except Exception as e:
@@ -1340,28 +1310,14 @@ async def get_blockchain_stats():
         # Get blockchain health
         health = await web3_service.get_blockchain_health()
         
-        # Get DB stats
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) as count FROM users WHERE identity_status='active'")
-        total_identities = cursor.fetchone()['count']
-        
-        cursor.execute("SELECT COUNT(*) as count FROM users WHERE blockchain_score > 0")
-        users_with_score = cursor.fetchone()['count']
-        
-        cursor.execute("SELECT SUM(blockchain_score) as total FROM users")
-        total_score_synced = cursor.fetchone()['total'] or 0
-        
-        conn.close()
-        
+        # Get DB stats (O(1) aus stats_counters)
+        counters = await storage.stats.counters()
+        total_identities = counters["active_identities"]
+        users_with_score = counters["users_with_blockchain_score"]
+        total_score_synced = counters["synced_score_total"]
         # Get interaction count (estimate from blockchain if available)
         # For now use DB follower count as proxy
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) as count FROM followers WHERE follow_confirmed=1")
-        total_interactions = cursor.fetchone()['count']
-        conn.close()
+        total_interactions = counters["confirmed_follows"]
         
         return {
             "blockchain_health": health,
@@ -1433,15 +1389,20 @@ async def verify_token_endpoint(req: Request):
             log_activity("ERROR", "AUTH", "Auto-login: Invalid address format", address=address[:10])
             return {"valid": False, "error": "Invalid address format"}
         
-        # ===== VALIDIERE SIGNATURE MIT web3.py =====
+        # ===== NONCE EINMALIG VERBRAUCHEN (von /api/nonce ausgestellt) =====
+        if await challenge_store.take("login", address, nonce) != TAKE_OK:
+            log_activity("WARNING", "AUTH", "Auto-login: Unknown or expired nonce", address=address[:10])
+            return {"valid": False, "error": "Invalid or expired nonce - request a new one"}
+        
+        # ===== VALIDIERE SIGNATURE (Prozess-Pool, blockiert den Event Loop nicht) =====
         try:
-            from eth_account.messages import encode_defunct
-            from eth_account import Account
-            
-            message = encode_defunct(text=message_to_verify)
+            # Signiert wird die Nachricht zur ausgestellten Nonce (nicht ein beliebiger Client-Text)
+            if message_to_verify and message_to_verify != login_message(nonce):
+                log_activity("ERROR", "AUTH", "Auto-login: Message does not match nonce", address=address[:10])
+                return {"valid": False, "error": "Message does not match nonce", "is_human": False}
             
             # Verifiziere Signature
-            recovered_address = Account.recover_message(message, signature=signature)
+            recovered_address = await signature_verifier.recover(login_message(nonce), signature)
             
             if recovered_address.lower() != address:
                 log_activity("ERROR", "AUTH", "Auto-login: Signature verification FAILED", address=address[:10], recovered=recovered_address[:10])
@@ -1467,11 +1428,7 @@ async def verify_token_endpoint(req: Request):
             return {"valid": False, "error": "Address mismatch"}
         
         # Hole aktuelle Daten aus Datenbank
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE address=?", (address,))
-        user = cursor.fetchone()
-        conn.close()
+        user = await storage.users.get(address)
         
         if not user:
             return {"valid": False, "error": "User not found"}
@@ -1497,12 +1454,7 @@ async def get_airdrop_status(address: str):
     """
     try:
         address = address.lower()
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM airdrops WHERE address=?", (address,))
-        airdrop = cursor.fetchone()
-        conn.close()
+        airdrop = await storage.airdrops.get(address)
         
         if not airdrop:
             return {
@@ -1524,7 +1476,7 @@ async def get_airdrop_status(address: str):
 
 # 🔐 SECURITY: Challenge-Response Authentication for Dashboard
 # Requires ACTIVE MetaMask confirmation via personal_sign
-dashboard_challenges = {}  # {address: {nonce, timestamp}}
+# Challenges live in challenge_store (namespace "dashboard", 5 min expiry, bounded)
 
 @app.post("/admin/challenge")
 async def get_dashboard_challenge(data: dict):
@@ -1550,12 +1502,8 @@ async def get_dashboard_challenge(data: dict):
         # Generate unique nonce
         nonce = secrets.token_hex(16)
         
-        # Store challenge with timestamp (5 min expiry)
-        dashboard_challenges[owner] = {
-            "nonce": nonce,
-            "timestamp": time.time(),
-            "expiry": 300
-        }
+        # Store challenge (5 min expiry, replaces an open one)
+        await challenge_store.issue("dashboard", owner, nonce, ttl=300)
         
         log_activity("INFO", "AUTH", "Dashboard challenge created", owner=owner[:10], nonce=nonce[:10])
         
@@ -1588,9 +1536,6 @@ async def verify_dashboard_signature(data: dict):
         }
     """
     try:
-        from eth_account.messages import encode_defunct
-        from eth_account import Account
-        
         owner = data.get("owner", "").lower()
         signature = data.get("signature", "")
         nonce = data.get("nonce", "")
@@ -1598,29 +1543,19 @@ async def verify_dashboard_signature(data: dict):
         if not owner or not signature or not nonce:
             return {"success": False, "error": "owner, signature, and nonce required"}
         
-        # Get stored challenge
-        if owner not in dashboard_challenges:
-            log_activity("WARNING", "AUTH", "No challenge found", owner=owner[:10])
-            return {"success": False, "error": "No challenge found. Request a new one."}
-        
-        challenge_data = dashboard_challenges[owner]
-        
-        # Verify nonce matches
-        if challenge_data["nonce"] != nonce:
+        # Consume stored challenge (one-time use, expired ones are already gone)
+        taken = await challenge_store.take("dashboard", owner, nonce)
+        if taken == TAKE_MISMATCH:
             log_activity("WARNING", "AUTH", "Nonce mismatch", owner=owner[:10])
             return {"success": False, "error": "Invalid nonce"}
-        
-        # Check if challenge expired (5 minutes)
-        if time.time() - challenge_data["timestamp"] > challenge_data["expiry"]:
-            del dashboard_challenges[owner]
-            log_activity("WARNING", "AUTH", "Challenge expired", owner=owner[:10])
-            return {"success": False, "error": "Challenge expired"}
+        if taken != TAKE_OK:
+            log_activity("WARNING", "AUTH", "No challenge found", owner=owner[:10])
+            return {"success": False, "error": "No challenge found or expired. Request a new one."}
         
         # Verify signature
         try:
             messageToSign = f"VEra-Resonance Dashboard Access\n\nNonce: {nonce}\n\nBitte bestätigen Sie in MetaMask um auf Ihr Dashboard zuzugreifen."
-            message = encode_defunct(text=messageToSign)
-            recovered_address = Account.recover_message(message, signature=signature).lower()
+            recovered_address = (await signature_verifier.recover(messageToSign, signature)).lower()
         except Exception as e:
             log_activity("ERROR", "AUTH", "Signature recovery failed", owner=owner[:10], error=str(e))
             return {"success": False, "error": f"Invalid signature: {str(e)}"}
@@ -1630,18 +1565,12 @@ async def verify_dashboard_signature(data: dict):
             log_activity("WARNING", "AUTH", "Signature mismatch", expected=owner[:10], got=recovered_address[:10])
             return {"success": False, "error": "Signature mismatch"}
         
-        # Verified! Delete challenge (one-time use)
-        del dashboard_challenges[owner]
-        
         log_activity("INFO", "AUTH", "✓ Dashboard signature verified", owner=owner[:10])
         
-        # ===== NFT RETRY LOGIC + NEW USER REGISTRATION =====
+        # ===== NEW USER REGISTRATION + NFT RETRY (Blockchain-Teil im Hintergrund) =====
+        chain_job = None
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT identity_status, identity_mint_tx_hash, score FROM users WHERE address=?", (owner,))
-            result = cursor.fetchone()
+            result = await storage.users.get(owner)
             
             if not result:
                 # ===== NEW USER: First-time Dashboard access =====
@@ -1649,90 +1578,14 @@ async def verify_dashboard_signature(data: dict):
                 
                 # Create user with initial score
                 current_iso = datetime.now(timezone.utc).isoformat()
-                cursor.execute(
-                    """INSERT INTO users (address, score, created_at, identity_status)
-                       VALUES (?, ?, ?, ?)""",
-                    (owner, INITIAL_SCORE, current_iso, 'pending')
-                )
-                conn.commit()
-                
-                # Sync initial score to blockchain
-                log_activity("INFO", "BLOCKCHAIN", "🔄 Syncing initial score", address=owner[:10])
-                await sync_score_after_update(owner, INITIAL_SCORE, conn)
-                
-                # Wait 2 seconds (nonce conflict prevention)
-                await asyncio.sleep(2)
-                
-                # Mint NFT for new user
-                log_activity("INFO", "BLOCKCHAIN", "🎨 Starting Identity NFT mint for new dashboard user", address=owner[:10])
-                success, mint_result = await web3_service.mint_identity_nft(owner)
-                
-                if success:
-                    new_tx_hash = mint_result
-                    cursor.execute(
-                        """UPDATE users 
-                           SET identity_status='minting', identity_mint_tx_hash=?, identity_minted_at=?
-                           WHERE address=?""",
-                        (new_tx_hash, current_iso, owner)
-                    )
-                    conn.commit()
-                    log_activity("INFO", "BLOCKCHAIN", "✅ NFT mint transaction sent for new user", 
-                                address=owner[:10], 
-                                tx_hash=new_tx_hash[:16] + "...")
-                else:
-                    error_msg = mint_result
-                    cursor.execute("UPDATE users SET identity_status='failed' WHERE address=?", (owner,))
-                    conn.commit()
-                    log_activity("WARNING", "BLOCKCHAIN", f"NFT minting failed for new user: {error_msg}", address=owner[:10])
+                await storage.users.create(owner, INITIAL_SCORE, current_iso, 'pending')
+                chain_job = await _submit_chain_job("dashboard_login", owner, {"new_user": True})
             
-            elif result:
-                # ===== EXISTING USER: Check for retry =====
-                db_identity_status = result[0]
-                tx_hash = result[1]
-                
-                # RETRY if status is 'minting' without tx_hash OR 'failed'
-                if db_identity_status in ['failed', 'pending'] or (db_identity_status == 'minting' and not tx_hash):
-                    log_activity("INFO", "BLOCKCHAIN", "🔄 Retry: NFT mint for dashboard login", address=owner[:10])
-                    
-                    # Check if user already has NFT on-chain
-                    has_identity = await web3_service.has_identity_nft(owner)
-                    
-                    if not has_identity:
-                        # Attempt NFT mint
-                        success, mint_result = await web3_service.mint_identity_nft(owner)
-                        
-                        if success:
-                            new_tx_hash = mint_result
-                            cursor.execute(
-                                """UPDATE users 
-                                   SET identity_status='minting', identity_mint_tx_hash=?, identity_minted_at=?
-                                   WHERE address=?""",
-                                (new_tx_hash, datetime.now(timezone.utc).isoformat(), owner)
-                            )
-                            conn.commit()
-                            log_activity("INFO", "BLOCKCHAIN", "✅ NFT mint retry successful", 
-                                        address=owner[:10], 
-                                        tx_hash=new_tx_hash[:16] + "...")
-                        else:
-                            error_msg = mint_result
-                            cursor.execute("UPDATE users SET identity_status='failed' WHERE address=?", (owner,))
-                            conn.commit()
-                            log_activity("WARNING", "BLOCKCHAIN", f"NFT retry failed: {error_msg}", address=owner[:10])
-                    else:
-                        # User already has NFT - update status
-                        token_id = await web3_service.get_identity_token_id(owner)
-                        if token_id is not None:
-                            cursor.execute(
-                                """UPDATE users 
-                                   SET identity_nft_token_id=?, identity_status='active'
-                                   WHERE address=?""",
-                                (token_id, owner)
-                            )
-                            conn.commit()
-                            log_activity("INFO", "BLOCKCHAIN", "✓ NFT already minted, status updated", 
-                                        address=owner[:10], token_id=token_id)
+            elif result['identity_status'] in ['failed', 'pending'] or (
+                    result['identity_status'] == 'minting' and not result['identity_mint_tx_hash']):
+                # ===== EXISTING USER: retry NFT mint =====
+                chain_job = await _submit_chain_job("dashboard_login", owner, {"new_user": False})
             
-            conn.close()
         except Exception as e:
             log_activity("WARNING", "BLOCKCHAIN", f"NFT retry check failed: {str(e)}", address=owner[:10])
         # ===== END NFT RETRY LOGIC =====
@@ -1740,7 +1593,8 @@ async def verify_dashboard_signature(data: dict):
         return {
             "success": True,
             "verified": True,
-            "message": "✓ Verified - Dashboard access granted"
+            "message": "✓ Verified - Dashboard access granted",
+            "chain_job": chain_job
         }
     except Exception as e:
         log_activity("ERROR", "AUTH", "Signature verification failed", error=str(e))
@@ -1749,16 +1603,19 @@ async def verify_dashboard_signature(data: dict):
 @app.get("/admin/followers")
 async def get_followers_dashboard(req: Request):
     """
-    Admin Dashboard - Shows all verified followers for an owner
+    Admin Dashboard - Shows verified followers for an owner, one page at a time
     
     Query Parameters:
         owner: Owner wallet address (required)
         token: Optional signature for verification
+        cursor: next_cursor of the previous page (optional)
+        limit: Page size (default PAGE_SIZE_DEFAULT, max PAGE_SIZE_MAX)
     
-    Returns:
+    Returns (owner_score, total_followers and statistics only on the first page):
         {
             "owner": "0x...",
             "total_followers": 42,
+            "next_cursor": "WyIyMDI1LTExLTIxVDEwOjAwOjAwIiw0Ml0",
             "followers": [
                 {
                     "follower_address": "0x...",
@@ -1785,62 +1642,27 @@ async def get_followers_dashboard(req: Request):
         if not owner_wallet.startswith("0x") or len(owner_wallet) != 42:
             return {"error": "Invalid owner wallet format", "success": False}
         
-        log_activity("INFO", "ADMIN", "Dashboard requested", owner=owner_wallet[:10])
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get all followers for this owner
-        cursor.execute("""
-            SELECT 
-                f.id,
-                f.follower_address,
-                f.follower_score,
-                f.follower_display_name,
-                f.verified_at,
-                f.source_platform,
-                f.verified,
-                u.login_count,
-                u.last_login,
-                u.created_at
-            FROM followers f
-            LEFT JOIN users u ON f.follower_address = u.address
-            WHERE f.owner_wallet = ?
-            ORDER BY f.verified_at DESC
-        """, (owner_wallet,))
-        
-        followers = cursor.fetchall()
-        
-        # Calculate statistics
-        if followers:
-            total_verified = len(followers)
-            avg_score = sum(f['follower_score'] if f['follower_score'] else 0 for f in followers) / len(followers)
-            
-            # Group by platform
-            platform_counts = {}
-            for f in followers:
-                platform = f['source_platform'] or 'unknown'
-                platform_counts[platform] = platform_counts.get(platform, 0) + 1
-        else:
-            total_verified = 0
-            avg_score = 0
-            platform_counts = {}
+        cursor_param = req.query_params.get("cursor")
+        size = page_size(req.query_params.get("limit"))
         
-        # Get owner stats
-        cursor.execute("SELECT score, login_count, created_at FROM users WHERE address=?", (owner_wallet,))
-        owner_data = cursor.fetchone()
+        log_activity("INFO", "ADMIN", "Dashboard requested", owner=owner_wallet[:10], cursor=bool(cursor_param))
         
-        conn.close()
+        # Eine Seite Follower (Keyset auf verified_at, id)
+        after = decode_cursor(cursor_param) if cursor_param else None
+        followers = await storage.followers.page(owner_wallet, after, size)
         
-        log_activity("INFO", "ADMIN", "Dashboard returned", 
-                    owner=owner_wallet[:10], 
-                    followers_count=total_verified)
+        # Erste Seite: Owner-Daten + Statistik als Aggregat über den Index (keine Zeilen im Speicher)
+        owner_data = by_platform = None
+        if not cursor_param:
+            owner_data = await storage.users.get(owner_wallet)
+            by_platform = await storage.followers.platform_stats(owner_wallet)
         
-        return {
+        has_more = len(followers) > size
+        followers = followers[:size]
+        
+        response = {
             "success": True,
             "owner": owner_wallet,
-            "owner_score": owner_data['score'] if owner_data else None,
-            "total_followers": total_verified,
             "followers": [
                 {
                     "follower_address": f['follower_address'],
@@ -1854,14 +1676,32 @@ async def get_followers_dashboard(req: Request):
                 }
                 for f in followers
             ],
-            "statistics": {
-                "average_score": round(avg_score, 2),
-                "verified_count": total_verified,
-                "by_platform": platform_counts,
-                "timestamp": int(time.time())
-            }
+            "next_cursor": encode_cursor(followers[-1]['verified_at'], followers[-1]['id']) if has_more else None
         }
         
+        if by_platform is not None:
+            # Calculate statistics
+            total_verified = sum(row[1] for row in by_platform)
+            avg_score = sum(row[2] for row in by_platform) / total_verified if total_verified else 0
+            platform_counts = {row[0]: row[1] for row in by_platform}
+            
+            log_activity("INFO", "ADMIN", "Dashboard returned", 
+                        owner=owner_wallet[:10], 
+                        followers_count=total_verified)
+            
+            response.update({
+                "owner_score": owner_data['score'] if owner_data else None,
+                "total_followers": total_verified,
+                "statistics": {
+                    "average_score": round(avg_score, 2),
+                    "verified_count": total_verified,
+                    "by_platform": platform_counts,
+                    "timestamp": int(time.time())
+                }
+            })
+        
+        return response
+        
     except Exception as e:
         log_activity("ERROR", "ADMIN", f"Dashboard error: {str(e)}")
         return {"error": str(e), "success": False}
@@ -1957,28 +1797,12 @@ async def confirm_follower(req: Request):
         if not follower or not follower.startswith("0x") or len(follower) != 42:
             return {"error": "Invalid follower wallet", "success": False}
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if follower record exists
-        cursor.execute(
-            "SELECT * FROM followers WHERE owner_wallet = ? AND follower_address = ?",
-            (owner, follower)
-        )
-        follower_record = cursor.fetchone()
+        # Update to mark as confirmed (rowcount 0 = kein Follower-Eintrag vorhanden)
+        updated = await storage.followers.confirm(owner, follower, datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
         
-        if not follower_record:
-            conn.close()
+        if not updated:
             return {"error": "Follower record not found", "success": False}
         
-        # Update to mark as confirmed
-        cursor.execute(
-            "UPDATE followers SET follow_confirmed = 1, confirmed_at = datetime('now') WHERE owner_wallet = ? AND follower_address = ?",
-            (owner, follower)
-        )
-        conn.commit()
-        conn.close()
-        
         log_activity("INFO", "ADMIN", "Follow confirmed",
                     owner=owner[:10],
                     follower=follower[:10])
@@ -1995,14 +1819,13 @@ async def confirm_follower(req: Request):
             )
             
             if success:
-                tx_hash = result
-                log_activity("INFO", "BLOCKCHAIN", "✓ Interaction recorded on-chain",
+                log_activity("INFO", "BLOCKCHAIN", "✓ Interaction submitted",
                             initiator=follower[:10],
                             responder=owner[:10],
                             type="FOLLOW",
-                            tx_hash=str(tx_hash)[:20] if tx_hash else "unknown")
+                            tx=result.get("tx_hash") or f"job {result.get('job_id')}")
             else:
-                error_msg = result
+                error_msg = result.get("error")
                 log_activity("WARNING", "BLOCKCHAIN", f"Interaction recording failed: {error_msg}",
                             initiator=follower[:10],
                             responder=owner[:10])
@@ -2047,19 +1870,15 @@ async def get_sync_queue():
 async def trigger_sync(address: str):
     """Debug: Triggert manuellen Sync für User"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT score, blockchain_score FROM users WHERE LOWER(address) = LOWER(?)", (address,))
-        result = cursor.fetchone()
-        conn.close()
+        result = await storage.users.get(address.lower())
         
         if not result:
             return {"error": "User not found", "success": False}
         
-        db_score, blockchain_score = result
+        db_score, blockchain_score = result['score'], result['blockchain_score']
         blockchain_score = blockchain_score or 0
         
-        from blockchain_sync import add_to_sync_queue, should_sync_score
+        from blockchain_sync import add_to_sync_queue
         
         if should_sync_score(db_score, blockchain_score):
             add_to_sync_queue(address, db_score)
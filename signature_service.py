@@ -0,0 +1,169 @@
+"""
+VEra-Resonance — Signature Verification Service
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+Recovers the signer of personal_sign (EIP-191) messages off the event loop:
+- secp256k1 recovery + keccak cost milliseconds of CPU and hold the GIL, so they
+  run in a ProcessPoolExecutor with SIG_WORKERS processes instead of a thread
+- single (recover) and batched (recover_many) requests; a batch is split into one
+  chunk per worker, so the IPC round trip is paid once per chunk, not per signature
+- queue depth (submitted, not finished) and per-call latency for /api/debug
+- a crashed worker pool is recreated once (by the first call that sees it broken;
+  concurrent calls reuse the new pool) and the call is repeated once
+- SIG_WORKERS=0 recovers inline on the event loop (previous behaviour, tests)
+
+Used by /api/verify, /api/verify-token and /admin/verify-signature.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from database import LatencyStats
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SIG_WORKERS = int(os.getenv("SIG_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+# spawn: Worker erben keine Threads/Locks des Servers (DB-Pool, Event Loop)
+SIG_MP_CONTEXT = os.getenv("SIG_MP_CONTEXT", "spawn")
+
+
+def recover_signer(message_text: str, signature: str) -> str:
+    """Adresse (checksum), die message_text per personal_sign signiert hat"""
+    from eth_account import Account
+    from eth_account.messages import encode_defunct
+    return Account.recover_message(encode_defunct(text=message_text), signature=signature)
+
+
+def _recover_chunk(items: Sequence[Tuple[str, str]]) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Läuft im Worker: [(message, signature)] -> [(address, None) | (None, error)]"""
+    results = []
+    for message_text, signature in items:
+        try:
+            results.append((recover_signer(message_text, signature), None))
+        except ImportError:
+            # Fehlendes eth_account betrifft alle - wie bisher an den Aufrufer durchreichen
+            raise
+        except Exception as e:
+            results.append((None, str(e) or type(e).__name__))
+    return results
+
+
+def _warm_up() -> bool:
+    """Startet einen Worker und lädt eth_account vorab (erster Login ohne Import-Latenz)"""
+    try:
+        import eth_account.messages  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class SignatureVerifier:
+    """Signatur-Recovery in einem Prozess-Pool"""
+
+    def __init__(self, workers: int = SIG_WORKERS, mp_context: str = SIG_MP_CONTEXT):
+        self.workers = workers
+        self.mp_context = mp_context
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.max_pending = 0
+        self.signatures = 0
+        self.restarts = 0
+        self.latency = LatencyStats()
+
+    def start(self):
+        """Erzeugt den Pool und wärmt alle Worker vor (beim Server-Start)"""
+        if self.workers <= 0 or self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.mp_context),
+        )
+        for _ in range(self.workers):
+            self._executor.submit(_warm_up)
+        logger.info(f"🔏 Signature verifier started ({self.workers} worker processes, {self.mp_context})")
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """Ersetzt den kaputten Pool - nur wenn noch kein anderer Aufruf das getan hat"""
+        if self._executor is broken:
+            logger.warning("⚠️ Signature worker pool broken - restarting")
+            self.restarts += 1
+            # Ohne cancel_futures: der Pool ist ohnehin tot, neue Aufträge laufen schon im Nachfolger
+            broken.shutdown(wait=False)
+            self._executor = None
+        self.start()
+
+    async def _run_chunk(self, items: List[Tuple[str, str]]) -> List[Tuple[Optional[str], Optional[str]]]:
+        self.start()
+        self.pending += 1
+        self.max_pending = max(self.max_pending, self.pending)
+        started = time.perf_counter()
+        ok = False
+        try:
+            if self._executor is None:
+                results = _recover_chunk(items)
+            else:
+                loop = asyncio.get_running_loop()
+                executor = self._executor
+                try:
+                    results = await loop.run_in_executor(executor, _recover_chunk, items)
+                except BrokenProcessPool:
+                    # Worker abgestürzt (z.B. OOM-Kill): Pool neu erzeugen und einmal wiederholen
+                    self._restart(executor)
+                    results = await loop.run_in_executor(self._executor, _recover_chunk, items)
+            ok = True
+            self.signatures += len(items)
+            return results
+        finally:
+            self.pending -= 1
+            self.latency.record((time.perf_counter() - started) * 1000, ok)
+
+    async def recover(self, message_text: str, signature: str) -> str:
+        """
+        Signer-Adresse (checksum) einer personal_sign-Signatur
+
+        Raises ValueError bei ungültiger Signatur, ImportError ohne eth_account.
+        """
+        ((address, error),) = await self._run_chunk([(message_text, signature)])
+        if error is not None:
+            raise ValueError(error)
+        return address
+
+    async def recover_many(self, items: Sequence[Tuple[str, str]]) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        [(message, signature)] -> [(address, None) | (None, error)] in derselben Reihenfolge
+
+        Ein Chunk pro Worker, die Chunks laufen parallel.
+        """
+        items = list(items)
+        if not items:
+            return []
+        parts = max(1, min(self.workers, len(items)))
+        size = -(-len(items) // parts)
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        results = await asyncio.gather(*[self._run_chunk(chunk) for chunk in chunks])
+        return [result for chunk in results for result in chunk]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.pending,
+            "max_queue_depth": self.max_pending,
+            "signatures": self.signatures,
+            "restarts": self.restarts,
+            "latency": self.latency.snapshot(),
+        }
+
+
+signature_verifier = SignatureVerifier()
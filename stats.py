@@ -0,0 +1,238 @@
+"""
+VEra-Resonance — Statistics Counters
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+Incrementally maintained counters for /api/stats and /api/blockchain/stats:
+- stats_counters table, one row per counter
+- triggers keep the counters in the same transaction as the write
+  (SCHEMA for SQLite, POSTGRES_SCHEMA for the PostgreSQL backend)
+- rebuild_stats() recomputes everything from the base tables
+  (plus the events archived by retention.py into events_daily)
+
+Usage:
+    python stats.py             # show counters
+    python stats.py --rebuild   # recompute counters from scratch
+"""
+
+import sqlite3
+import sys
+from typing import Dict, List
+
+import retention
+
+# Zähler und die Query, mit der sie komplett neu berechnet werden
+COUNTER_QUERIES: Dict[str, str] = {
+    "user_count": "SELECT COUNT(*) FROM users",
+    "score_sum": "SELECT COALESCE(SUM(score), 0) FROM users",
+    "login_count": "SELECT COUNT(*) FROM events WHERE event_type='login'",
+    "active_identities": "SELECT COUNT(*) FROM users WHERE identity_status='active'",
+    "synced_score_total": "SELECT COALESCE(SUM(blockchain_score), 0) FROM users",
+    "users_with_blockchain_score": "SELECT COUNT(*) FROM users WHERE blockchain_score > 0",
+    "confirmed_follows": "SELECT COUNT(*) FROM followers WHERE follow_confirmed=1",
+}
+
+
+# Anteil archivierter Events (retention.py -> events_daily, nur SQLite) an historischen Zählern
+ARCHIVED_COUNTER_QUERIES: Dict[str, str] = {
+    "login_count": "SELECT COALESCE(SUM(count), 0) FROM events_daily WHERE event_type='login'",
+}
+
+
+def _bump(name: str, delta: str, condition: str = "") -> str:
+    where = f"name='{name}'" + (f" AND {condition}" if condition else "")
+    return f"UPDATE stats_counters SET value = value + ({delta}) WHERE {where};"
+
+
+# DDL für Migration 4 - Trigger laufen in derselben Transaktion wie der Schreibzugriff
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS stats_counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_stats_users_insert AFTER INSERT ON users
+    BEGIN
+        {_bump("user_count", "1")}
+        {_bump("score_sum", "COALESCE(NEW.score, 0)")}
+        {_bump("active_identities", "1", "NEW.identity_status IS 'active'")}
+        {_bump("synced_score_total", "COALESCE(NEW.blockchain_score, 0)")}
+        {_bump("users_with_blockchain_score", "1", "NEW.blockchain_score > 0")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_stats_users_update
+    AFTER UPDATE OF score, identity_status, blockchain_score ON users
+    BEGIN
+        {_bump("score_sum", "COALESCE(NEW.score, 0) - COALESCE(OLD.score, 0)", "NEW.score IS NOT OLD.score")}
+        {_bump("active_identities", "(NEW.identity_status IS 'active') - (OLD.identity_status IS 'active')",
+               "NEW.identity_status IS NOT OLD.identity_status")}
+        {_bump("synced_score_total", "COALESCE(NEW.blockchain_score, 0) - COALESCE(OLD.blockchain_score, 0)",
+               "NEW.blockchain_score IS NOT OLD.blockchain_score")}
+        {_bump("users_with_blockchain_score",
+               "(COALESCE(NEW.blockchain_score, 0) > 0) - (COALESCE(OLD.blockchain_score, 0) > 0)",
+               "NEW.blockchain_score IS NOT OLD.blockchain_score")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_stats_users_delete AFTER DELETE ON users
+    BEGIN
+        {_bump("user_count", "-1")}
+        {_bump("score_sum", "-COALESCE(OLD.score, 0)")}
+        {_bump("active_identities", "-1", "OLD.identity_status IS 'active'")}
+        {_bump("synced_score_total", "-COALESCE(OLD.blockchain_score, 0)")}
+        {_bump("users_with_blockchain_score", "-1", "OLD.blockchain_score > 0")}
+    END
+    """,
+    # Login-Zähler ist historisch: gelöschte/archivierte Events zählen weiter
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_stats_events_insert AFTER INSERT ON events
+    WHEN NEW.event_type = 'login'
+    BEGIN
+        {_bump("login_count", "1")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_stats_followers_insert AFTER INSERT ON followers
+    WHEN NEW.follow_confirmed = 1
+    BEGIN
+        {_bump("confirmed_follows", "1")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_stats_followers_update AFTER UPDATE OF follow_confirmed ON followers
+    WHEN (NEW.follow_confirmed = 1) IS NOT (OLD.follow_confirmed = 1)
+    BEGIN
+        {_bump("confirmed_follows", "(NEW.follow_confirmed = 1) - (OLD.follow_confirmed = 1)")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_stats_followers_delete AFTER DELETE ON followers
+    WHEN OLD.follow_confirmed = 1
+    BEGIN
+        {_bump("confirmed_follows", "-1")}
+    END
+    """,
+]
+
+
+def _pg_counter_trigger(table: str, function: str, events: str, counters: Dict[str, str]) -> List[str]:
+    """
+    PL/pgSQL-Trigger: Beitrag der alten Zeile abziehen, Beitrag der neuen addieren
+
+    counters: {zähler: ausdruck über der Zeile "r"} - r wird durch OLD/NEW ersetzt
+    """
+    def contribution(row: str) -> str:
+        return "\n".join(
+            f"        delta_{name} := delta_{name} {'-' if row == 'OLD' else '+'} ({expr.replace('r.', row + '.')});"
+            for name, expr in counters.items()
+        )
+    declare = "\n".join(f"    delta_{name} BIGINT := 0;" for name in counters)
+    bump = "\n".join(
+        f"    UPDATE stats_counters SET value = value + delta_{name} WHERE name = '{name}' AND delta_{name} <> 0;"
+        for name in counters
+    )
+    return [
+        f"""
+CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+DECLARE
+{declare}
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+{contribution("OLD")}
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+{contribution("NEW")}
+    END IF;
+{bump}
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""",
+        f"DROP TRIGGER IF EXISTS {function} ON {table}",
+        f"CREATE TRIGGER {function} AFTER {events} ON {table} FOR EACH ROW EXECUTE FUNCTION {function}()",
+    ]
+
+
+# DDL für das PostgreSQL-Backend (gleiche Zähler, PL/pgSQL statt SQLite-Trigger)
+POSTGRES_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS stats_counters (
+        name TEXT PRIMARY KEY,
+        value BIGINT NOT NULL DEFAULT 0
+    )
+    """,
+    *_pg_counter_trigger("users", "trg_stats_users", "INSERT OR UPDATE OR DELETE", {
+        "user_count": "1",
+        "score_sum": "COALESCE(r.score, 0)",
+        "active_identities": "(r.identity_status IS NOT DISTINCT FROM 'active')::INT",
+        "synced_score_total": "COALESCE(r.blockchain_score, 0)",
+        "users_with_blockchain_score": "(COALESCE(r.blockchain_score, 0) > 0)::INT",
+    }),
+    # Login-Zähler ist historisch: nur INSERT
+    *_pg_counter_trigger("events", "trg_stats_events", "INSERT", {
+        "login_count": "(r.event_type IS NOT DISTINCT FROM 'login')::INT",
+    }),
+    *_pg_counter_trigger("followers", "trg_stats_followers", "INSERT OR UPDATE OR DELETE", {
+        "confirmed_follows": "(COALESCE(r.follow_confirmed, 0) = 1)::INT",
+    }),
+]
+
+# Neuberechnung aus den Basistabellen (SQLite + PostgreSQL)
+REBUILD_SQL = [
+    f"""INSERT INTO stats_counters (name, value) SELECT '{name}', ({query})
+        ON CONFLICT(name) DO UPDATE SET value = excluded.value"""
+    for name, query in COUNTER_QUERIES.items()
+]
+
+# Nach REBUILD_SQL, sobald events_daily existiert (SQLite)
+ARCHIVE_REBUILD_SQL = [
+    f"UPDATE stats_counters SET value = value + ({query}) WHERE name = '{name}'"
+    for name, query in ARCHIVED_COUNTER_QUERIES.items()
+]
+
+READ_SQL = "SELECT name, value FROM stats_counters"
+
+
+def rebuild_stats(conn: sqlite3.Connection) -> Dict[str, int]:
+    """
+    Berechnet alle Zähler aus den Basistabellen neu (O(Tabellengröße))
+
+    Läuft in der Transaktion des Aufrufers, damit parallel keine Trigger-Updates verloren gehen.
+    Archivierte Logins (events_daily) zählen mit.
+    """
+    for sql in REBUILD_SQL:
+        conn.execute(sql)
+    if retention.has_events_daily(conn):
+        for sql in ARCHIVE_REBUILD_SQL:
+            conn.execute(sql)
+    return read_stats(conn)
+
+
+def read_stats(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Liest alle Zähler (O(1) - eine Zeile pro Zähler)"""
+    return counters_from_rows(conn.execute(READ_SQL).fetchall())
+
+
+def counters_from_rows(rows) -> Dict[str, int]:
+    """(name, value)-Zeilen -> Dict mit allen Zählern (fehlende = 0)"""
+    values = {name: 0 for name in COUNTER_QUERIES}
+    for row in rows:
+        values[row[0]] = int(row[1])
+    return values
+
+
+if __name__ == "__main__":
+    from database import db_pool
+
+    with db_pool.writer() as conn:
+        if "--rebuild" in sys.argv:
+            conn.execute("BEGIN IMMEDIATE")
+            counters = rebuild_stats(conn)
+            print("✓ Stats counters rebuilt")
+        else:
+            counters = read_stats(conn)
+    for name, value in counters.items():
+        print(f"   {name}: {value}")
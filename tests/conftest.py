@@ -0,0 +1,49 @@
+"""
+VEra-Resonance — Test Fixtures
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+storage: frisch migrierte Storage-Instanz, einmal je Backend
+- sqlite: eigene Datei im tmp_path (eigener ConnectionPool)
+- postgresql: TEST_DATABASE_URL (z.B. postgresql://postgres@localhost/vera_test),
+  das public-Schema wird vor jedem Test geleert; ohne TEST_DATABASE_URL übersprungen
+
+Run:
+    pip install -r requirements-dev.txt
+    TEST_DATABASE_URL=postgresql://postgres@localhost/vera_test python -m pytest -q
+"""
+
+import os
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+
+
+async def _reset_postgres(dsn: str):
+    import asyncpg
+    conn = await asyncpg.connect(dsn)
+    try:
+        await conn.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public")
+    finally:
+        await conn.close()
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+async def storage(request, tmp_path):
+    from storage import Storage, SQLiteBackend, PostgresBackend
+
+    if request.param == "sqlite":
+        from database import ConnectionPool
+        backend = SQLiteBackend(ConnectionPool(str(tmp_path / "test.db"), readers=2))
+    else:
+        if not TEST_DATABASE_URL:
+            pytest.skip("TEST_DATABASE_URL not set")
+        pytest.importorskip("asyncpg")
+        await _reset_postgres(TEST_DATABASE_URL)
+        backend = PostgresBackend(TEST_DATABASE_URL, min_size=1, max_size=4)
+
+    store = Storage(backend)
+    await store.open()
+    yield store
+    await store.close()
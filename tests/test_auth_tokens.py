@@ -0,0 +1,29 @@
+"""
+Login-Tokens (auth_tokens.TokenSigner): Ausstellen, Prüfen, Ablaufdatum im uint32-Bereich
+"""
+
+import time
+
+import pytest
+
+from auth_tokens import TokenSigner
+
+ADDRESS = "0x" + "ab" * 20
+
+
+def test_issue_and_verify_roundtrip():
+    signer = TokenSigner("secret")
+    expiry = int(time.time()) + 60
+
+    token = signer.issue(ADDRESS, expiry)
+
+    assert signer.verify(token) == (ADDRESS, expiry)
+
+
+@pytest.mark.parametrize("expiry", [-1, 2 ** 32])
+def test_issue_rejects_expiry_outside_uint32(expiry):
+    signer = TokenSigner("secret")
+
+    with pytest.raises(ValueError, match="out of range"):
+        signer.issue(ADDRESS, expiry)
+    assert signer.issued == 0
@@ -0,0 +1,86 @@
+"""
+Chain-Job-Handler aus server.py (_login_chain_job, _dashboard_chain_job) mit gestubbtem Web3Service
+"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("blockchain_sync")
+pytest.importorskip("web3")
+
+import server
+from chain_jobs import ChainJobs
+
+ADDRESS = "0x" + "cc" * 20
+
+
+class ServiceStub:
+    """Web3Service-Ersatz: resolve_identity liefert identity, Schreibaufrufe werden nur gezählt"""
+
+    def __init__(self, identity):
+        self.identity = identity
+        self.mints = []
+        self.score_syncs = []
+
+    async def resolve_identity(self, address, user=None, fresh=False):
+        return dict(self.identity)
+
+    async def mint_identity_nft(self, address, identity=None):
+        self.mints.append(address)
+        return True, {"status": "queued", "job_id": 1}
+
+    async def update_blockchain_score(self, address, score):
+        self.score_syncs.append((address, score))
+        return True, {"status": "queued", "job_id": 2}
+
+
+@pytest.fixture
+async def runner(storage, monkeypatch):
+    """(ChainJobs mit den Handlern aus server.py, Service-Stub) auf dem Test-Storage"""
+    service = ServiceStub({"has_identity": False, "token_id": None, "source": "error"})
+    monkeypatch.setattr(server, "storage", storage)
+    monkeypatch.setattr(server, "web3_service", service)
+    await storage.users.record_login(
+        ADDRESS, "direct", "pytest", "127.0.0.1", "", "", 1000, "2025-01-01T00:00:00+00:00", 0.0, "pending"
+    )
+    jobs = ChainJobs(storage, retry_seconds=60)
+    jobs.register("login", server._login_chain_job)
+    jobs.register("dashboard_login", server._dashboard_chain_job)
+    return jobs, service
+
+
+async def _run(jobs, kind, payload):
+    job_id = await jobs.submit(kind, ADDRESS, payload)
+    assert await jobs.run_once() == 1
+    await asyncio.gather(*jobs._running)
+    return await jobs.job(job_id)
+
+
+@pytest.mark.parametrize("kind, payload", [
+    ("login", {"score": 50, "login_at": "2025-01-01T00:00:00+00:00"}),
+    ("dashboard_login", {"new_user": False}),
+])
+async def test_identity_rpc_error_retries_instead_of_minting(runner, kind, payload):
+    jobs, service = runner
+
+    view = await _run(jobs, kind, payload)
+
+    assert service.mints == []
+    assert view["status"] == "queued"
+    assert "RPC error" in view["error"]
+    assert view["steps"][-1]["step"] == "identity_check"
+    assert view["steps"][-1]["status"] == "failed"
+    assert jobs.retried == 1
+
+
+async def test_identity_check_without_nft_mints(runner):
+    jobs, service = runner
+    service.identity = {"has_identity": False, "token_id": None, "source": "chain"}
+
+    view = await _run(jobs, "login", {"score": 50, "login_at": "2025-01-01T00:00:00+00:00"})
+
+    assert view["status"] == "done"
+    assert service.mints == [ADDRESS]
+    assert [step["step"] for step in view["steps"]][-2:] == ["identity_check", "identity_mint"]
@@ -0,0 +1,49 @@
+"""
+Chain-Job-Runner (chain_jobs.ChainJobs) gegen beide Storage-Backends
+"""
+
+import asyncio
+import json
+
+from chain_jobs import ChainJobs
+
+OWNER = "0x" + "aa" * 20
+
+
+async def test_queued_job_keeps_new_user_flag(storage):
+    jobs = ChainJobs(storage)
+    jobs.register("dashboard_login", lambda job: None)
+
+    first = await jobs.submit("dashboard_login", OWNER, {"new_user": True, "login_at": "a"})
+    # Zweiter Login vor dem Start des Jobs: new_user bleibt gesetzt, neuere Werte gewinnen
+    assert await jobs.submit("dashboard_login", OWNER, {"new_user": False, "login_at": "b"}) == first
+
+    row = await storage.chain_jobs.get(first)
+    assert json.loads(row["payload"]) == {"new_user": True, "login_at": "b"}
+
+
+async def test_maintenance_does_not_requeue_running_jobs(storage):
+    jobs = ChainJobs(storage, stale_seconds=-10)
+    started, release = asyncio.Event(), asyncio.Event()
+    runs = []
+
+    async def slow(job):
+        runs.append(job.id)
+        started.set()
+        await release.wait()
+
+    jobs.register("login", slow)
+    job_id = await jobs.submit("login", OWNER, {"score": 51})
+    assert await jobs.run_once() == 1
+    await started.wait()
+
+    # Läuft ohne Fortschritt "zu lange", wird aber von diesem Runner gehalten
+    await jobs._maintain()
+    assert jobs.requeued_stale == 0
+    assert (await storage.chain_jobs.get(job_id))["status"] == "running"
+    assert await jobs.run_once() == 0
+
+    release.set()
+    await asyncio.gather(*jobs._running)
+    assert (await storage.chain_jobs.get(job_id))["status"] == "done"
+    assert runs == [job_id]
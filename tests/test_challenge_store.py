@@ -0,0 +1,57 @@
+"""
+In-Memory-Challenge-Store (challenge_store.ChallengeStore): einmalige Nutzung, Ablauf, Obergrenze
+"""
+
+import pytest
+
+from challenge_store import ChallengeStore, TAKE_MISMATCH, TAKE_MISSING, TAKE_OK
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+async def test_take_is_single_use_and_checks_nonce():
+    store = ChallengeStore(ttl=60, max_entries=10, clock=Clock())
+    await store.issue("login", "0xa", "n1")
+
+    assert await store.take("login", "0xa", "other") == TAKE_MISMATCH
+    assert await store.take("login", "0xa", "n1") == TAKE_OK
+    assert await store.take("login", "0xa", "n1") == TAKE_MISSING
+    assert len(store) == 0
+
+
+async def test_expired_challenges_are_dropped():
+    clock = Clock()
+    store = ChallengeStore(ttl=5, max_entries=10, tick=1, clock=clock)
+    await store.issue("login", "0xa", "n1")
+    await store.issue("login", "0xb", "n2", ttl=60)  # auf ttl=5 begrenzt
+
+    clock.now += 6
+    assert await store.take("login", "0xa", "n1") == TAKE_MISSING
+    assert len(store) == 0
+    assert store.stats()["expired"] == 2
+
+
+async def test_cap_evicts_entry_closest_to_expiry():
+    clock = Clock()
+    store = ChallengeStore(ttl=30, max_entries=2, tick=1, clock=clock)
+    await store.issue("login", "0xa", "n1")
+    clock.now += 1
+    await store.issue("login", "0xb", "n2")
+    clock.now += 1
+    await store.issue("login", "0xc", "n3")
+
+    assert len(store) == 2
+    assert store.stats()["evicted"] == 1
+    assert await store.take("login", "0xa", "n1") == TAKE_MISSING
+    assert await store.take("login", "0xc", "n3") == TAKE_OK
+
+
+def test_max_entries_must_be_positive():
+    with pytest.raises(ValueError, match="CHALLENGE_MAX_ENTRIES"):
+        ChallengeStore(max_entries=0)
@@ -0,0 +1,184 @@
+"""
+Batch-Reads (multicall.BatchReader) über Web3Service.get_scores / get_identity_status
+
+Ein lokaler JSON-RPC-Stub spielt die Chain: Multicall3.aggregate3 (allowFailure) und
+direkte eth_calls (JSON-RPC-Batch-Fallback) auf einen Identity-NFT- und einen Score-Contract,
+einzelne Calls reverten.
+"""
+
+import pytest
+
+pytest.importorskip("web3")
+
+from aiohttp import web
+from eth_abi import decode, encode
+from web3 import Web3
+
+from multicall import MULTICALL3_ADDRESS
+
+IDENTITY_NFT = "0x" + "11" * 20
+RESONANCE_SCORE = "0x" + "22" * 20
+
+
+def _selector(signature: str) -> bytes:
+    return bytes(Web3.keccak(text=signature)[:4])
+
+
+BALANCE_OF = _selector("balanceOf(address)")
+TOKEN_OF_OWNER = _selector("tokenOfOwnerByIndex(address,uint256)")
+GET_RESONANCE = _selector("getResonance(address)")
+AGGREGATE3 = _selector("aggregate3((address,bool,bytes)[])")
+
+
+def _address(n: int) -> str:
+    return "0x" + f"{n:040x}"
+
+
+class ChainStub:
+    """Contract-Zustand + JSON-RPC-Handler; reverts = {(selector, address)}"""
+
+    def __init__(self):
+        self.balances = {}
+        self.tokens = {}
+        self.scores = {}
+        self.reverts = set()
+        self.multicall_deployed = True
+        self.multicall_broken = False
+        self.calls = {"multicall": 0, "eth_call": 0}
+        self.url = None
+
+    def view(self, target: str, data: bytes):
+        """Ein View-Call -> ABI-kodiertes Ergebnis, None = Revert"""
+        selector, (address, *_) = data[:4], decode(["address"], data[4:36])
+        if (selector, address) in self.reverts:
+            return None
+        if target == IDENTITY_NFT and selector == BALANCE_OF:
+            return encode(["uint256"], [self.balances.get(address, 0)])
+        if target == IDENTITY_NFT and selector == TOKEN_OF_OWNER and address in self.tokens:
+            return encode(["uint256"], [self.tokens[address]])
+        if target == RESONANCE_SCORE and selector == GET_RESONANCE:
+            return encode(["uint256"], [self.scores.get(address, 0)])
+        return None
+
+    def answer(self, request):
+        method, params = request["method"], request.get("params", [])
+        result = error = None
+        if method == "eth_chainId":
+            result = hex(84532)
+        elif method == "eth_getCode":
+            result = "0x6080" if self.multicall_deployed and params[0].lower() == MULTICALL3_ADDRESS.lower() else "0x"
+        elif method == "eth_call":
+            target, data = params[0]["to"].lower(), bytes.fromhex(params[0]["data"][2:])
+            if target == MULTICALL3_ADDRESS.lower() and self.multicall_deployed:
+                self.calls["multicall"] += 1
+                if self.multicall_broken or data[:4] != AGGREGATE3:
+                    error = "execution reverted"
+                else:
+                    (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+                    results = [self.view(call_target.lower(), call_data) for call_target, _, call_data in calls]
+                    result = "0x" + encode(["(bool,bytes)[]"], [[(r is not None, r or b"") for r in results]]).hex()
+            else:
+                self.calls["eth_call"] += 1
+                value = self.view(target, data)
+                if value is None:
+                    error = "execution reverted"
+                else:
+                    result = "0x" + value.hex()
+        else:
+            error = f"method not found: {method}"
+        if error:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": 3, "message": error}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+    async def handle(self, http_request):
+        body = await http_request.json()
+        return web.json_response([self.answer(item) for item in body] if isinstance(body, list) else self.answer(body))
+
+
+@pytest.fixture
+async def chain():
+    stub = ChainStub()
+    app = web.Application()
+    app.router.add_post("/", stub.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    stub.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+    yield stub
+    await runner.cleanup()
+
+
+@pytest.fixture
+async def service(chain, monkeypatch):
+    from web3_service import Web3Service
+
+    monkeypatch.setenv("BASE_SEPOLIA_RPC_URLS", chain.url)
+    monkeypatch.setenv("IDENTITY_NFT_ADDRESS", IDENTITY_NFT)
+    monkeypatch.setenv("RESONANCE_SCORE_ADDRESS", RESONANCE_SCORE)
+    monkeypatch.delenv("RESONANCE_REGISTRY_ADDRESS", raising=False)
+    for name in ("BACKEND_PRIVATE_KEY", "PRIVATE_KEY", "ADMIN_PRIVATE_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    svc = Web3Service()
+    yield svc
+    await svc.close()
+
+
+def _identity_setup(chain):
+    """0: NFT #7, 1: kein NFT, 2: balanceOf revertiert, 3: NFT aber Token-Abfrage revertiert, 4: NFT #9"""
+    addresses = [_address(n) for n in range(1, 6)]
+    for index, token_id in ((0, 7), (3, 8), (4, 9)):
+        chain.balances[addresses[index]] = 1
+        chain.tokens[addresses[index]] = token_id
+    chain.reverts.add((BALANCE_OF, addresses[2]))
+    chain.reverts.add((TOKEN_OF_OWNER, addresses[3]))
+    return addresses, {
+        addresses[0]: {"has_identity": True, "token_id": 7},
+        addresses[1]: {"has_identity": False, "token_id": None},
+        addresses[2]: None,
+        addresses[3]: {"has_identity": True, "token_id": None},
+        addresses[4]: {"has_identity": True, "token_id": 9},
+    }
+
+
+async def test_get_scores_mixed_results_across_chunks(chain, service):
+    addresses = [_address(n) for n in range(1, 6)]
+    chain.scores.update({address: 10 * n for n, address in enumerate(addresses, 1)})
+    chain.reverts.add((GET_RESONANCE, addresses[1]))
+    service.batch.chunk_size = 2
+
+    scores = await service.get_scores(addresses)
+
+    assert scores == {addresses[0]: 10, addresses[1]: None, addresses[2]: 30, addresses[3]: 40, addresses[4]: 50}
+    assert chain.calls == {"multicall": 3, "eth_call": 0}
+    assert service.batch.stats()["failed_calls"] == 1
+
+
+async def test_get_identity_status_maps_token_ids_to_holders(chain, service):
+    addresses, expected = _identity_setup(chain)
+
+    assert await service.get_identity_status(addresses) == expected
+    # balanceOf für alle, tokenOfOwnerByIndex nur für die drei Holder -> zwei aggregate3-Aufrufe
+    assert chain.calls == {"multicall": 2, "eth_call": 0}
+
+
+async def test_json_rpc_batch_fallback_without_multicall(chain, service):
+    chain.multicall_deployed = False
+    addresses, expected = _identity_setup(chain)
+
+    assert await service.get_identity_status(addresses) == expected
+    assert service.batch.stats()["multicall_available"] is False
+    assert chain.calls["multicall"] == 0
+    assert chain.calls["eth_call"] == 5 + 3
+
+
+async def test_failed_multicall_chunk_retried_as_batch(chain, service):
+    chain.multicall_broken = True
+    addresses = [_address(n) for n in range(1, 4)]
+    chain.scores[addresses[0]] = 55
+    chain.reverts.add((GET_RESONANCE, addresses[2]))
+
+    scores = await service.get_scores(addresses)
+
+    assert scores == {addresses[0]: 55, addresses[1]: 0, addresses[2]: None}
+    assert chain.calls == {"multicall": 1, "eth_call": 3}
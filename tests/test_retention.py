@@ -0,0 +1,54 @@
+"""
+Retention (retention.py) gegen die SQLite-Zähler: archivierte Events zählen nach einem Rebuild weiter
+"""
+
+import pytest
+
+import retention
+import rollups
+import stats
+
+DAY = retention.DAY_SECONDS
+ADDRESSES = ["0x" + f"{n:02x}" * 20 for n in range(1, 4)]
+
+
+async def _login(storage, address, timestamp, referrer):
+    await storage.users.record_login(
+        address, referrer, "pytest", "127.0.0.1", "", "", timestamp,
+        "2025-01-01T00:00:00+00:00", 0.0, "pending"
+    )
+
+
+def _snapshot(conn):
+    return stats.read_stats(conn), rollups.referrer_stats(conn)["total_events_by_source"]
+
+
+@pytest.fixture
+async def pool(storage):
+    if storage.backend.name != "sqlite":
+        pytest.skip("retention.py only supports the SQLite backend")
+    # Alte Events (Tag 1-2) und aktuelle (Tag 100), mehrere Referrer
+    for day, address, referrer in [
+        (1, ADDRESSES[0], "twitter"), (1, ADDRESSES[0], "twitter"), (1, ADDRESSES[1], "direct"),
+        (2, ADDRESSES[1], "telegram"), (2, ADDRESSES[2], "twitter"), (100, ADDRESSES[0], "twitter"),
+    ]:
+        await _login(storage, address, day * DAY + 7200, referrer)
+    return storage.backend.pool
+
+
+@pytest.mark.parametrize("rebuild", [stats.rebuild_stats, rollups.rebuild_rollups])
+async def test_rebuild_after_retention_keeps_counters(pool, rebuild):
+    with pool.writer() as conn:
+        before = _snapshot(conn)
+        ids = [row[0] for row in conn.execute("SELECT id FROM events WHERE timestamp < ?", (50 * DAY,))]
+        assert len(ids) == 5
+        assert retention.prune_batch(conn, ids) == 5
+        assert conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 1
+        assert _snapshot(conn) == before
+
+        conn.execute("BEGIN IMMEDIATE")
+        rebuild(conn)
+        conn.commit()
+
+        assert _snapshot(conn) == before
+    assert before[0]["login_count"] == 3
@@ -0,0 +1,127 @@
+"""
+RPC-Endpoint-Pool (rpc_pool.py) gegen lokale Stub-Server: Failover, Auswurf, Wiederaufnahme
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("web3")
+
+import aiohttp
+from web3 import Web3
+
+from rpc_pool import AsyncRPCPool, PooledHTTPProvider, RPCPool, start_stub_server
+
+
+@pytest.fixture
+async def stubs():
+    """start(**kwargs) -> url; alle Stub-Server werden am Testende beendet"""
+    runners = []
+
+    async def start(**kwargs):
+        runner, url = await start_stub_server(**kwargs)
+        runners.append(runner)
+        return url
+
+    yield start
+    for runner in runners:
+        await runner.cleanup()
+
+
+async def _free_url() -> str:
+    """URL eines Ports, auf dem (noch) niemand lauscht"""
+    runner, url = await start_stub_server()
+    await runner.cleanup()
+    return url
+
+
+def _port(url: str) -> int:
+    return int(url.rstrip("/").rsplit(":", 1)[1])
+
+
+@pytest.fixture
+async def session():
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=2)) as session:
+        yield session
+
+
+def _pool(urls, session, **kwargs) -> AsyncRPCPool:
+    pool = AsyncRPCPool(urls, explore_rate=0.0, **kwargs)
+    pool.use_session(session)
+    return pool
+
+
+async def test_failing_endpoint_is_ejected_and_skipped(stubs, session):
+    failing = await stubs(error_rate=1.0)
+    healthy = await stubs(block_number=42)
+    pool = _pool([failing, healthy], session, eject_after=2, eject_seconds=60)
+    bad, good = pool.endpoints
+
+    for i in range(10):
+        assert (await pool.request("eth_blockNumber", [], i))["result"] == hex(42)
+
+    # Zwei HTTP-503 bis zum Auswurf, danach geht nichts mehr an das Endpoint
+    assert bad.requests == bad.failures == 2
+    assert bad.stats()["healthy"] is False
+    assert bad.stats()["last_error"] == "HTTP 503"
+    assert good.requests == 10
+    assert pool.failovers == 2
+
+
+async def test_ejected_endpoint_recovers_after_probation(stubs, session):
+    url = await _free_url()
+    healthy = await stubs()
+    pool = _pool([url, healthy], session, eject_after=1, eject_seconds=0.1)
+    recovering = pool.endpoints[0]
+
+    await pool.request("eth_chainId", [])
+    assert recovering.stats()["healthy"] is False
+    assert recovering.last_error.startswith("Cannot connect")
+
+    # Nach der Sperrzeit noch immer tot: ein Fehler reicht, Sperrzeit verdoppelt sich
+    await asyncio.sleep(0.12)
+    await pool.request("eth_chainId", [])
+    assert recovering.ejections == 2
+    assert recovering.stats()["ejected_for_s"] > 0.1
+
+    # Endpoint kommt zurück -> nach Ablauf der Sperre wieder bevorzugt (unbekannte Latenz zuerst)
+    await stubs(block_number=7, port=_port(url))
+    await asyncio.sleep(0.22)
+    assert (await pool.request("eth_blockNumber", []))["result"] == hex(7)
+    assert recovering.stats()["healthy"] is True
+    assert recovering.consecutive_failures == 0
+    assert recovering.ejections == 0
+
+
+async def test_json_rpc_errors_are_answers_not_failures(stubs, session):
+    url = await stubs()
+    pool = _pool([url], session, eject_after=1)
+
+    response = await pool.request("eth_doesNotExist", [])
+
+    assert response["error"]["message"] == "method not found"
+    assert pool.endpoints[0].failures == 0
+    assert pool.endpoints[0].stats()["healthy"] is True
+
+
+async def test_all_endpoints_down_raises(session):
+    pool = _pool([await _free_url(), await _free_url()], session, eject_after=5)
+
+    with pytest.raises(ConnectionError, match="All RPC endpoints failed"):
+        await pool.request("eth_chainId", [])
+    assert pool.failovers == 1
+
+
+async def test_sync_provider_fails_over(stubs):
+    failing = await stubs(error_rate=1.0)
+    healthy = await stubs()
+    pool = RPCPool([failing, healthy], explore_rate=0.0, eject_after=1, eject_seconds=60, timeout=2)
+    w3 = Web3(PooledHTTPProvider(pool))
+
+    # Synchrones requests im Thread, der Event Loop bedient die Stubs
+    assert await asyncio.to_thread(lambda: w3.eth.chain_id) == 84532
+    assert await asyncio.to_thread(lambda: w3.eth.chain_id) == 84532
+    assert pool.endpoints[0].requests == 1
+    assert pool.endpoints[1].requests == 2
+    assert pool.failovers == 1
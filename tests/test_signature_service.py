@@ -0,0 +1,45 @@
+"""
+Signatur-Recovery im Prozess-Pool (signature_service.SignatureVerifier): Neustart nach Worker-Absturz
+"""
+
+import asyncio
+import os
+import signal
+
+import pytest
+
+pytest.importorskip("eth_account")
+
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+from signature_service import SignatureVerifier
+
+
+@pytest.fixture
+def verifier():
+    verifier = SignatureVerifier(workers=2, mp_context="spawn")
+    verifier.start()
+    yield verifier
+    verifier.close()
+
+
+def _signed(n: int):
+    account = Account.create()
+    message = f"login {n}"
+    return account.address, message, Account.sign_message(encode_defunct(text=message), account.key).signature.hex()
+
+
+async def test_concurrent_calls_share_one_restart(verifier):
+    signed = [_signed(n) for n in range(6)]
+    assert await verifier.recover(signed[0][1], signed[0][2]) == signed[0][0]
+
+    # Alle Worker sterben, während mehrere Anfragen unterwegs sind
+    broken = verifier._executor
+    for process in list(broken._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+    results = await asyncio.gather(*[verifier.recover(message, signature) for _, message, signature in signed])
+
+    assert results == [address for address, _, _ in signed]
+    assert verifier.restarts == 1
+    assert verifier._executor is not broken
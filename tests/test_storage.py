@@ -0,0 +1,128 @@
+"""
+Storage-Repositories gegen beide Backends (SQLite, PostgreSQL via TEST_DATABASE_URL)
+"""
+
+import json
+
+import migrations
+
+OWNER = "0x" + "aa" * 20
+FOLLOWER = "0x" + "bb" * 20
+
+
+async def _login(storage, address, timestamp, owner_wallet=""):
+    return await storage.users.record_login(
+        address, "direct", "pytest", "127.0.0.1", owner_wallet, "", timestamp,
+        f"2025-01-01T00:00:{timestamp % 60:02d}+00:00", 0.0, "pending"
+    )
+
+
+async def _table_exists(storage, table):
+    return await storage.backend.read(lambda tx: tx.fetchall(f"SELECT 1 FROM {table} WHERE 1 = 0")) == []
+
+
+async def test_migrations_are_current_and_idempotent(storage):
+    latest = (migrations.MIGRATIONS if storage.backend.name == "sqlite" else migrations.POSTGRES_MIGRATIONS)[-1][0]
+    # Zweites open() auf derselben Datenbank wendet nichts mehr an
+    await storage.backend.close()
+    assert await storage.open() == latest
+    assert await _table_exists(storage, "chain_jobs")
+    assert await _table_exists(storage, "auth_challenges")
+
+
+async def test_record_login_signup_login_and_follow_bonus(storage):
+    signup = await _login(storage, OWNER, 1000)
+    assert signup["existing"] is False
+    assert signup["new_score"] == 50
+    assert signup["airdrop"]["triggered"] is True
+
+    # Follower-Signup über den Owner-Link -> pending_bonus für den Owner
+    follower = await _login(storage, FOLLOWER, 1001, owner_wallet=OWNER)
+    assert follower["existing"] is False
+    rows = await storage.followers.page(OWNER)
+    assert [row["follower_address"] for row in rows] == [FOLLOWER]
+
+    login = await _login(storage, OWNER, 1002)
+    assert login["existing"] is True
+    assert login["old_score"] == 50
+    assert login["new_score"] == 52  # +1 Login, +1 aktivierter Follow-Bonus
+    assert login["login_count"] == 2
+    assert login["airdrop"] is None
+
+    user = await storage.users.get(OWNER)
+    assert user["score"] == 52
+    assert user["pending_bonus"] == 0
+
+
+async def test_events_page_keyset(storage):
+    for timestamp in range(2000, 2005):
+        await _login(storage, OWNER, timestamp)
+
+    rows, total = await storage.events.page(OWNER, size=2)
+    assert total == 5
+    assert len(rows) == 3  # size + 1 -> weitere Seite vorhanden
+    assert [row["timestamp"] for row in rows[:2]] == [2004, 2003]
+
+    last = rows[1]
+    rows, total = await storage.events.page(OWNER, after=(last["timestamp"], last["id"]), size=2)
+    assert total is None
+    assert [row["timestamp"] for row in rows] == [2002, 2001, 2000]
+    assert rows[-1]["event_type"] == "signup"
+
+
+async def test_chain_jobs_lifecycle(storage):
+    jobs = storage.chain_jobs
+    first = await jobs.enqueue("login", OWNER, json.dumps({"score": 51}), 100)
+    # Wartender Job derselben Art/Adresse wird wiederverwendet
+    assert await jobs.enqueue("login", OWNER, json.dumps({"score": 52}), 101) == first
+    other = await jobs.enqueue("dashboard", OWNER, json.dumps({}), 102)
+    assert other != first
+
+    claimed = await jobs.claim(10, 200)
+    assert [row["id"] for row in claimed] == [first, other]
+    assert all(row["status"] == "running" and row["attempts"] == 1 for row in claimed)
+    assert json.loads(claimed[0]["payload"]) == {"score": 52}
+    assert await jobs.claim(10, 200) == []
+
+    await jobs.progress(first, json.dumps([{"step": "score_sync"}]), 201)
+    assert await jobs.retry(first, "rpc down", 3, 300, 202) == "queued"
+    # Erst ab run_at wieder fällig
+    assert await jobs.claim(10, 299) == []
+    assert [row["id"] for row in await jobs.claim(10, 300)] == [first]
+    assert await jobs.finish(first, 301) == 1
+
+    row = await jobs.get(first)
+    assert row["status"] == "done"
+    assert row["attempts"] == 2
+    assert json.loads(row["steps"]) == [{"step": "score_sync"}]
+
+    # Ohne Fortschritt seit 'before' -> neu eingereiht, außer die Job-id läuft noch
+    assert await jobs.requeue_stale(before=250, now=400, exclude=[other]) == 0
+    assert await jobs.requeue_stale(before=250, now=400) == 1
+    assert (await jobs.get(other))["status"] == "queued"
+    assert await jobs.counts() == {"done": 1, "queued": 1}
+
+    assert await jobs.cleanup(before=1000) == 1
+    assert await jobs.get(first) is None
+
+
+async def test_challenges_take_once_and_sweep(storage):
+    challenges = storage.challenges
+    await challenges.issue("login", OWNER, "n1", 1000)
+    # Neue Challenge ersetzt die offene
+    await challenges.issue("login", OWNER, "n2", 1000)
+    assert await challenges.take("login", OWNER, "n1", 500) is False
+    assert await challenges.take("login", OWNER, "n2", 500) is True
+    assert await challenges.take("login", OWNER, "n2", 500) is None
+
+    # Abgelaufen = keine offene Challenge
+    await challenges.issue("login", FOLLOWER, "n3", 600)
+    assert await challenges.take("login", FOLLOWER, "n3", 600) is None
+
+    for index in range(5):
+        await challenges.issue("dashboard", f"0x{index:040x}", "n", 2000 + index)
+    assert await challenges.count() == 6
+    # 1 abgelaufen, dann auf 3 kappen (bald ablaufende zuerst)
+    assert await challenges.sweep(now=700, max_entries=3) == (1, 2)
+    assert await challenges.take("dashboard", f"0x{0:040x}", "n", 700) is None
+    assert await challenges.take("dashboard", f"0x{4:040x}", "n", 700) is True
@@ -0,0 +1,52 @@
+"""
+Cache-Abgleich der Worker ohne Pipeline (tx_pipeline.TxPipeline.follow_once) gegen beide Backends
+"""
+
+import json
+
+from tx_pipeline import TxPipeline
+from ttl_cache import AsyncTTLCache
+
+MINTED = "0x" + "aa" * 20
+SCORED = "0x" + "bb" * 20
+INTERACTED = "0x" + "cc" * 20
+
+
+class ServiceStub:
+    """Web3Service-Ersatz eines anderen Workers: nur der Read-Cache"""
+
+    def __init__(self):
+        self.cache = AsyncTTLCache()
+
+    def invalidate(self, address):
+        for kind in ("balance", "token_id", "score"):
+            self.cache.invalidate((kind, address.lower()))
+
+
+async def test_follower_drops_cached_reads_after_confirmation(storage):
+    service = ServiceStub()
+    pipeline = TxPipeline(service, storage)
+    outbox = storage.tx_outbox
+    mint = await outbox.enqueue("mint_identity", MINTED, json.dumps({}), "dedupe", 100)
+    score = await outbox.enqueue("score", SCORED, json.dumps({"score": 60}), "coalesce", 100)
+    await outbox.enqueue("interaction", INTERACTED, json.dumps({}), None, 106)
+
+    # Dieser Worker hat den Stand vor dem Mint bzw. Score-Sync gecacht
+    service.cache.set(("balance", MINTED), 0)
+    service.cache.set(("score", SCORED), 50)
+    service.cache.set(("score", INTERACTED), 10)
+    assert await pipeline.follow_once(since=101) == 0
+
+    # Pipeline-Worker: beide gesendet, zuerst der Mint bestätigt
+    await outbox.mark_sent([(mint, 7, "0x" + "01" * 32, "00"), (score, 8, "0x" + "02" * 32, "00")], 100)
+    assert await outbox.finish(mint, "confirmed", 1234, 105) == 1
+    assert await pipeline.follow_once(since=101) == 1
+    assert service.cache.get(("balance", MINTED)) == (False, None)
+    assert service.cache.get(("score", SCORED)) == (True, 50)
+
+    assert await outbox.finish(score, "confirmed", 1235, 106) == 1
+    assert await pipeline.follow_once(since=106) == 1
+    assert service.cache.get(("score", SCORED)) == (False, None)
+    # Interaktionen ändern keine gecachten Reads
+    assert service.cache.get(("score", INTERACTED)) == (True, 10)
+    assert pipeline.stats()["cache_syncs"] == 2
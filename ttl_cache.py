@@ -0,0 +1,133 @@
+"""
+VEra-Resonance — Async TTL/LRU Cache
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+Read-through cache for slow lookups (RPC calls in Web3Service):
+- LRU eviction above max_entries
+- per-entry TTL; "negative" results (e.g. no NFT, score 0) get a shorter TTL
+- concurrent misses for the same key share one loader call (no stampede)
+- loader exceptions are not cached
+- explicit invalidation (e.g. when our own transaction confirms)
+- hit/miss counters for monitoring
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+CACHE_MAX_ENTRIES = int(os.getenv("WEB3_CACHE_MAX_ENTRIES", 10000))
+CACHE_TTL_SECONDS = float(os.getenv("WEB3_CACHE_TTL_SECONDS", 300))
+CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("WEB3_CACHE_NEGATIVE_TTL_SECONDS", 30))
+
+
+def _is_negative(value: Any) -> bool:
+    return value is None or value is False or value == 0
+
+
+class AsyncTTLCache:
+    """LRU-Cache mit TTL und Negative Caching für async Loader"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS,
+                 negative_ttl: float = CACHE_NEGATIVE_TTL_SECONDS,
+                 is_negative: Callable[[Any], bool] = _is_negative):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.is_negative = is_negative
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Nur nachschlagen, ohne Loader -> (gefunden, Wert)"""
+        found, value = self._lookup(key)
+        if found:
+            self.hits += 1
+            if self.is_negative(value):
+                self.negative_hits += 1
+        else:
+            self.misses += 1
+        return found, value
+
+    def set(self, key: Hashable, value: Any):
+        """Trägt einen Wert ein (z.B. aus einem Batch-Read)"""
+        ttl = self.negative_ttl if self.is_negative(value) else self.ttl
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Gecachter Wert oder loader() - parallele Misses auf denselben Key teilen sich einen Aufruf"""
+        found, value = self._lookup(key)
+        if found:
+            self.hits += 1
+            if self.is_negative(value):
+                self.negative_hits += 1
+            return value
+        pending = self._loading.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await loader()
+        except BaseException as e:
+            future.set_exception(e)
+            # Exception gilt als abgeholt, auch wenn niemand wartet
+            future.exception()
+            raise
+        else:
+            # Zwischenzeitliche Invalidierung: Wert nicht cachen, aber zurückgeben
+            if self._loading.get(key) is future:
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            if self._loading.get(key) is future:
+                del self._loading[key]
+
+    def invalidate(self, key: Hashable) -> bool:
+        self._loading.pop(key, None)
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+            return True
+        return False
+
+    def clear(self):
+        self._entries.clear()
+        self._loading.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
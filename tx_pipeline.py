@@ -0,0 +1,402 @@
+"""
+VEra-Resonance — Transaction Pipeline
+© 2025 Karlheinz Beismann — VEra-Resonance Project
+Licensed under the Apache License, Version 2.0
+
+Asynchronous submission of backend wallet transactions (Identity NFT mint,
+score update, interaction recording):
+- callers enqueue a job in the persistent tx_outbox table and get a job id back
+  immediately - HTTP latency no longer depends on RPC latency
+- the sender claims queued jobs in id order, assigns consecutive nonces
+  (NonceManager), signs them, stores the signed transactions and broadcasts up
+  to TX_SEND_CONCURRENCY at once - many transactions per block instead of one per request
+- the receipt poller fetches the receipts of all in-flight jobs with one
+  JSON-RPC batch per poll (Web3Service.get_receipts)
+- transactions without receipt after TX_REBROADCAST_SECONDS are rebroadcast;
+  if their nonce was consumed by another transaction, the job is re-signed with a new nonce
+- confirmation hooks: Web3Service cache invalidation, fee oracle block update,
+  identity status of the minted address
+- every other worker follows the outbox (follow()): mint/score jobs changed since the
+  last poll drop the cached reads of their address, so a confirmation is visible in
+  all workers after at most TX_CACHE_SYNC_SECONDS
+
+Job states: queued -> sent -> confirmed | reverted, failed after TX_MAX_ATTEMPTS send errors.
+Only one process may run the pipeline per backend wallet (TX_PIPELINE_ENABLED).
+"""
+
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from logger import blockchain_logger
+from nonce_manager import is_nonce_error
+
+# ===== KONFIGURATION =====
+TX_PIPELINE_ENABLED = os.getenv("TX_PIPELINE_ENABLED", "true").lower() == "true"
+TX_SEND_BATCH = int(os.getenv("TX_SEND_BATCH", 50))
+TX_SEND_CONCURRENCY = int(os.getenv("TX_SEND_CONCURRENCY", 10))
+TX_SEND_POLL_SECONDS = float(os.getenv("TX_SEND_POLL_SECONDS", 1))
+TX_RECEIPT_POLL_SECONDS = float(os.getenv("TX_RECEIPT_POLL_SECONDS", 2))
+TX_RECEIPT_BATCH = int(os.getenv("TX_RECEIPT_BATCH", 500))
+TX_REBROADCAST_SECONDS = float(os.getenv("TX_REBROADCAST_SECONDS", 60))
+TX_MAX_ATTEMPTS = int(os.getenv("TX_MAX_ATTEMPTS", 5))
+# Worker ohne Pipeline: so oft geänderte Mint-/Score-Jobs lesen und den Web3-Cache abgleichen
+TX_CACHE_SYNC_SECONDS = float(os.getenv("TX_CACHE_SYNC_SECONDS", 2))
+
+# dedupe: offener Job derselben Art/Adresse wird wiederverwendet (kein doppelter Mint)
+# coalesce: noch nicht gesendeter Score-Job bekommt den neuesten Score
+KIND_POLICIES: Dict[str, Optional[str]] = {
+    "mint_identity": "dedupe",
+    "score": "coalesce",
+    "interaction": None,
+}
+
+# Job-Arten, die gecachte Reads (Identity NFT, Score) der Adresse ändern
+CACHED_KINDS = ("mint_identity", "score")
+
+# RPC-Fehler beim (Re-)Broadcast, die bedeuten: der Node kennt die Transaktion schon
+ALREADY_KNOWN_ERRORS = ("already known", "known transaction", "already imported")
+
+_TABLE = """
+    CREATE TABLE IF NOT EXISTS tx_outbox (
+        id {id},
+        kind TEXT NOT NULL,
+        address TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL,
+        nonce {int},
+        tx_hash TEXT,
+        raw_tx TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        block_number {int},
+        created_at {int} NOT NULL,
+        sent_at {int},
+        updated_at {int} NOT NULL
+    )
+"""
+
+_INDEXES = [
+    # Sender/Poller: älteste Jobs eines Status zuerst
+    "CREATE INDEX IF NOT EXISTS idx_tx_outbox_status ON tx_outbox(status, id)",
+    # Dedupe/Coalesce beim Einreihen
+    "CREATE INDEX IF NOT EXISTS idx_tx_outbox_address ON tx_outbox(address, kind, status)",
+]
+
+# DDL für Migration 9 (SQLite) bzw. PostgreSQL-Migration 5
+SCHEMA = [_TABLE.format(id="INTEGER PRIMARY KEY AUTOINCREMENT", int="INTEGER"), *_INDEXES]
+POSTGRES_SCHEMA = [_TABLE.format(id="BIGSERIAL PRIMARY KEY", int="BIGINT"), *_INDEXES]
+
+# DDL für Migration 12 (SQLite) bzw. PostgreSQL-Migration 8: follow() liest nach updated_at
+FOLLOW_SCHEMA = ["CREATE INDEX IF NOT EXISTS idx_tx_outbox_updated ON tx_outbox(updated_at)"]
+
+
+def _is_already_known(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in ALREADY_KNOWN_ERRORS)
+
+
+def _hex_int(value) -> Optional[int]:
+    if value is None:
+        return None
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+def job_view(row) -> Dict[str, Any]:
+    """tx_outbox-Zeile -> API-Antwort (ohne signierte Rohdaten)"""
+    tx_hash = row["tx_hash"]
+    return {
+        "job_id": row["id"],
+        "kind": row["kind"],
+        "address": row["address"],
+        "status": row["status"],
+        "tx_hash": tx_hash,
+        "nonce": row["nonce"],
+        "attempts": row["attempts"],
+        "block_number": row["block_number"],
+        "error": row["error"],
+        "created_at": row["created_at"],
+        "sent_at": row["sent_at"],
+        "basescan_url": f"https://sepolia.basescan.org/tx/{tx_hash}" if tx_hash else None,
+    }
+
+
+class TxPipeline:
+    """Outbox + Sender + Receipt-Poller für die Backend-Wallet"""
+
+    def __init__(self, service, store, send_batch: int = TX_SEND_BATCH,
+                 send_concurrency: int = TX_SEND_CONCURRENCY, max_attempts: int = TX_MAX_ATTEMPTS,
+                 rebroadcast_seconds: float = TX_REBROADCAST_SECONDS):
+        self.service = service
+        self.store = store
+        self.send_batch = send_batch
+        self.send_concurrency = send_concurrency
+        self.max_attempts = max_attempts
+        self.rebroadcast_seconds = rebroadcast_seconds
+        # Weckt den Sender sofort nach submit() statt erst nach TX_SEND_POLL_SECONDS
+        self._wakeup: Optional[asyncio.Event] = None
+        self.submitted = 0
+        self.sent = 0
+        self.confirmed = 0
+        self.reverted = 0
+        self.requeued = 0
+        self.failed = 0
+        self.rebroadcasts = 0
+        self.cache_syncs = 0
+        self.last_error: Optional[str] = None
+
+    def _event(self) -> asyncio.Event:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    # ===== OUTBOX =====
+
+    async def submit(self, kind: str, address: str, payload: Dict[str, Any]) -> int:
+        """Reiht eine Transaktion ein -> job_id (kehrt ohne RPC-Aufruf zurück)"""
+        if kind not in KIND_POLICIES:
+            raise ValueError(f"Unknown transaction kind: {kind}")
+        job_id = await self.store.tx_outbox.enqueue(
+            kind, address.lower(), json.dumps(payload), KIND_POLICIES[kind], int(time.time())
+        )
+        self.submitted += 1
+        self._event().set()
+        return job_id
+
+    async def job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        row = await self.store.tx_outbox.get(job_id)
+        return job_view(row) if row else None
+
+    # ===== SENDER =====
+
+    async def send_once(self) -> int:
+        """Signiert und sendet bis zu send_batch wartende Jobs. Returns: Anzahl gesendeter Transaktionen"""
+        jobs = await self.store.tx_outbox.queued(self.send_batch)
+        if not jobs:
+            return 0
+        await self.service.open()
+        fees = await self.service.fees.fees()
+        now = int(time.time())
+
+        # Nonces in Job-Reihenfolge vergeben und signieren (kein RPC), dann persistieren
+        signed = []
+        for row in jobs:
+            try:
+                call, gas = self.service.write_call(row["kind"], json.loads(row["payload"]))
+            except Exception as e:
+                # Ungültiger Job (z.B. Contract nicht konfiguriert) - wird nie gesendet
+                await self.store.tx_outbox.fail(row["id"], str(e), now)
+                await self._on_failed(row, str(e))
+                continue
+            nonce = await self.service.nonces.allocate()
+            try:
+                raw_tx, tx_hash = await self.service.sign_call(call, gas, nonce, fees)
+            except Exception as e:
+                self.service.nonces.release(nonce, e)
+                await self.store.tx_outbox.fail(row["id"], str(e), now)
+                await self._on_failed(row, str(e))
+                continue
+            signed.append((row, nonce, raw_tx, tx_hash))
+        if not signed:
+            return 0
+        try:
+            await self.store.tx_outbox.mark_sent(
+                [(row["id"], nonce, tx_hash, raw_tx.hex()) for row, nonce, raw_tx, tx_hash in signed], now
+            )
+        except BaseException:
+            for _, nonce, _, _ in reversed(signed):
+                self.service.nonces.release(nonce)
+            raise
+
+        semaphore = asyncio.Semaphore(self.send_concurrency)
+
+        async def broadcast(row, nonce: int, raw_tx: bytes, tx_hash: str) -> bool:
+            async with semaphore:
+                try:
+                    await self.service.send_raw(raw_tx)
+                except Exception as e:
+                    if not _is_already_known(e):
+                        self.service.nonces.release(nonce, e)
+                        await self._requeue(row, e)
+                        return False
+                self.service.nonces.confirm(nonce)
+                await self._on_sent(row, tx_hash)
+                return True
+
+        results = await asyncio.gather(*[broadcast(*item) for item in signed])
+        sent = sum(1 for ok in results if ok)
+        self.sent += sent
+        if sent:
+            blockchain_logger.info(f"📤 {sent} transactions sent (nonces {signed[0][1]}-{signed[-1][1]})")
+        return sent
+
+    async def _requeue(self, row, error: Exception):
+        status = await self.store.tx_outbox.requeue(row["id"], str(error), self.max_attempts, int(time.time()))
+        if status == "failed":
+            await self._on_failed(row, str(error))
+        else:
+            self.requeued += 1
+            blockchain_logger.warning(f"⚠️ Transaction job {row['id']} ({row['kind']}) requeued: {error}")
+
+    # ===== RECEIPT POLLER =====
+
+    async def poll_once(self) -> int:
+        """Receipts aller gesendeten Jobs in einem Batch. Returns: Anzahl abgeschlossener Jobs"""
+        rows = await self.store.tx_outbox.in_flight(TX_RECEIPT_BATCH)
+        if not rows:
+            return 0
+        receipts = await self.service.get_receipts([row["tx_hash"] for row in rows])
+        now = int(time.time())
+        finished = 0
+        latest_block = None
+        for row in rows:
+            if row["tx_hash"] not in receipts:
+                continue  # Abfrage fehlgeschlagen, nächster Poll
+            receipt = receipts[row["tx_hash"]]
+            if receipt is None:
+                if now - (row["sent_at"] or 0) >= self.rebroadcast_seconds:
+                    await self._rebroadcast(row, now)
+                continue
+            block_number = _hex_int(receipt.get("blockNumber"))
+            success = _hex_int(receipt.get("status")) == 1
+            await self.store.tx_outbox.finish(row["id"], "confirmed" if success else "reverted", block_number, now)
+            self.service.on_transaction_confirmed(row["tx_hash"])
+            if block_number is not None:
+                latest_block = max(latest_block or 0, block_number)
+            if success:
+                self.confirmed += 1
+                await self._on_confirmed(row)
+            else:
+                self.reverted += 1
+                await self._on_failed(row, "reverted")
+            finished += 1
+        if latest_block is not None:
+            # Neuer Block -> gecachte Fee-Vorschläge sind veraltet
+            self.service.fees.observe_block(latest_block)
+        return finished
+
+    async def _rebroadcast(self, row, now: int):
+        """Keine Receipt nach rebroadcast_seconds: erneut senden oder mit neuer Nonce einreihen"""
+        try:
+            await self.service.send_raw(bytes.fromhex(row["raw_tx"]))
+        except Exception as e:
+            if not _is_already_known(e):
+                if is_nonce_error(e):
+                    # Nonce bereits verbraucht - war es doch unsere Transaktion?
+                    receipts = await self.service.get_receipts([row["tx_hash"]])
+                    if receipts.get(row["tx_hash"]) is not None:
+                        return
+                    self.service.nonces.release(row["nonce"], e)
+                    await self._requeue(row, e)
+                    return
+                blockchain_logger.warning(f"⚠️ Rebroadcast of job {row['id']} failed: {e}")
+        self.rebroadcasts += 1
+        await self.store.tx_outbox.touch(row["id"], now)
+
+    # ===== HOOKS =====
+
+    async def _on_sent(self, row, tx_hash: str):
+        self.service.on_transaction_sent(row["kind"], tx_hash, row["address"])
+        if row["kind"] == "mint_identity":
+            # Wie bisher: 'minting' + tx_hash für den NFT Confirmation Checker
+            await self.store.users.set_identity_minting(
+                row["address"], tx_hash, datetime.now(timezone.utc).isoformat()
+            )
+
+    async def _on_confirmed(self, row):
+        if row["kind"] == "mint_identity":
+            token_id = await self.service.get_identity_token_id(row["address"])
+            if token_id is not None:
+                await self.store.users.set_identity_active(row["address"], token_id)
+                blockchain_logger.info(f"✅ Identity NFT #{token_id} confirmed for {row['address']}")
+
+    async def _on_failed(self, row, error: str):
+        self.failed += 1
+        self.last_error = error
+        blockchain_logger.error(f"❌ Transaction job {row['id']} ({row['kind']}) failed: {error}")
+        if row["kind"] == "mint_identity":
+            await self.store.users.set_identity_failed(row["address"])
+
+    # ===== LOOPS =====
+
+    async def _send_loop(self):
+        while True:
+            wakeup = self._event()
+            wakeup.clear()
+            try:
+                sent = await self.send_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                blockchain_logger.warning(f"⚠️ Transaction sender error: {e}")
+                sent = 0
+            if sent < self.send_batch:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), TX_SEND_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _receipt_loop(self):
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                blockchain_logger.warning(f"⚠️ Receipt poller error: {e}")
+            await asyncio.sleep(TX_RECEIPT_POLL_SECONDS)
+
+    async def run(self):
+        """Sender + Receipt-Poller (asyncio.create_task beim Server-Start)"""
+        blockchain_logger.info(
+            f"📮 Transaction pipeline started (batch={self.send_batch}, concurrency={self.send_concurrency})"
+        )
+        await asyncio.gather(self._send_loop(), self._receipt_loop())
+
+    # ===== CACHE-ABGLEICH (andere Worker) =====
+
+    async def follow_once(self, since: int) -> int:
+        """Verwirft gecachte Reads aller Adressen mit Mint-/Score-Jobs, die seit since geändert wurden"""
+        addresses = await self.store.tx_outbox.changed_addresses(CACHED_KINDS, since)
+        for address in addresses:
+            self.service.invalidate(address)
+        self.cache_syncs += len(addresses)
+        return len(addresses)
+
+    async def follow(self):
+        """
+        Cache-Abgleich für Worker ohne Pipeline (asyncio.create_task beim Server-Start)
+
+        Senden und Bestätigen passieren im Pipeline-Prozess; beides setzt updated_at des Jobs.
+        Eine Sekunde Überlappung, weil updated_at sekundengenau ist.
+        """
+        since = int(time.time())
+        while True:
+            await asyncio.sleep(TX_CACHE_SYNC_SECONDS)
+            started = int(time.time())
+            try:
+                await self.follow_once(since - 1)
+                since = started
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                blockchain_logger.warning(f"⚠️ Transaction cache sync error: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "submitted": self.submitted,
+            "sent": self.sent,
+            "confirmed": self.confirmed,
+            "reverted": self.reverted,
+            "requeued": self.requeued,
+            "failed": self.failed,
+            "rebroadcasts": self.rebroadcasts,
+            "cache_syncs": self.cache_syncs,
+            "last_error": self.last_error,
+        }
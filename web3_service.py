@@ -8,18 +8,204 @@ Handles all blockchain interactions with BASE Sepolia smart contracts:
 - Resonance Score updates
 - Interaction recording
 - Token ID lookups
+
+Writes (mint, score update, interaction) go through the transaction outbox
+(tx_pipeline.py) when one is attached: the caller gets a job id immediately,
+signing, sending and receipt tracking happen in the background.
+Identity/score reads are cached per process; the pipeline worker drops them on
+send and confirmation, every other uvicorn worker via TxPipeline.follow()
+(stale for at most TX_CACHE_SYNC_SECONDS, without outbox up to WEB3_CACHE_TTL_SECONDS).
+
+All RPC calls go through AsyncWeb3 on one shared aiohttp session (keep-alive
+connection pool), so awaiting a method no longer blocks the FastAPI event loop
+and independent calls run concurrently. With several BASE_SEPOLIA_RPC_URLS the
+requests are spread over an endpoint pool with health scoring and failover
+(rpc_pool.py).
 """
 
 import os
 import asyncio
-from typing import Dict, Any, Optional, Tuple, List
-from web3 import Web3
+from typing import Dict, Any, Optional, Tuple, List, Callable, Awaitable
+import aiohttp
+from web3 import AsyncWeb3, Web3
 from web3.exceptions import ContractLogicError
 from eth_account import Account
 from logger import setup_logger
+from fee_oracle import AsyncFeeOracle
+from multicall import BatchReader, RPC_BATCH_SIZE, chunked, encode_call
+from nonce_manager import NonceManager
+from rpc_pool import AsyncRPCPool, PooledAsyncHTTPProvider, rpc_urls
+from ttl_cache import AsyncTTLCache
 
 logger = setup_logger(__name__)
 
+# HTTP Keep-Alive Pool für den RPC-Endpoint
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", 20))
+RPC_KEEPALIVE_SECONDS = float(os.getenv("RPC_KEEPALIVE_SECONDS", 60))
+RPC_TIMEOUT_SECONDS = float(os.getenv("RPC_TIMEOUT_SECONDS", 15))
+
+# Adaptiver Log-Scanner (eth_getLogs über große Blockbereiche)
+LOG_SCAN_INITIAL_BLOCKS = int(os.getenv("LOG_SCAN_INITIAL_BLOCKS", 2000))
+LOG_SCAN_MAX_BLOCKS = int(os.getenv("LOG_SCAN_MAX_BLOCKS", 50000))
+LOG_SCAN_CONCURRENCY = int(os.getenv("LOG_SCAN_CONCURRENCY", 4))
+# Weniger Logs als das pro Chunk -> Chunk-Größe verdoppeln
+LOG_SCAN_SPARSE_RESULTS = int(os.getenv("LOG_SCAN_SPARSE_RESULTS", 100))
+LOG_SCAN_RETRIES = int(os.getenv("LOG_SCAN_RETRIES", 3))
+# Untergrenze für den Transfer-Event-Fallback (statt nur der letzten 10k Blöcke)
+IDENTITY_NFT_DEPLOY_BLOCK = int(os.getenv("IDENTITY_NFT_DEPLOY_BLOCK", 0))
+
+# RPC-Fehler, die "Bereich/Ergebnis zu groß" bedeuten -> Chunk teilen statt wiederholen
+LOG_RANGE_ERRORS = (
+    "too many",
+    "query returned more than",
+    "limit exceeded",
+    "block range",
+    "range is too large",
+    "exceed",
+    "response size",
+    "-32005",
+)
+
+
+def is_log_range_error(error: BaseException) -> bool:
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in LOG_RANGE_ERRORS)
+
+
+class LogScanner:
+    """
+    Scannt einen Blockbereich in Chunks mit eth_getLogs
+
+    - Chunk-Größe passt sich an: halbieren bei "too many results", verdoppeln bei wenigen Treffern
+    - bis zu `concurrency` Chunks parallel
+    - Fortschritt als Cursor (letzter lückenlos gescannter Block) über on_progress -> fortsetzbar
+    - reverse=True scannt vom Ende rückwärts (neueste zuerst), stop() beendet vorzeitig
+    """
+
+    def __init__(self, initial_blocks: int = LOG_SCAN_INITIAL_BLOCKS, max_blocks: int = LOG_SCAN_MAX_BLOCKS,
+                 concurrency: int = LOG_SCAN_CONCURRENCY, sparse_results: int = LOG_SCAN_SPARSE_RESULTS,
+                 retries: int = LOG_SCAN_RETRIES):
+        self.chunk_blocks = initial_blocks
+        self.max_blocks = max_blocks
+        self.concurrency = concurrency
+        self.sparse_results = sparse_results
+        self.retries = retries
+        self.requests = 0
+        self.splits = 0
+        # Kleinste Chunk-Größe, die schon einmal "too many results" geliefert hat
+        self._ceiling = max_blocks + 1
+
+    def _adapt(self, blocks: int, results: int):
+        if results < self.sparse_results:
+            self.chunk_blocks = min(max(self.chunk_blocks, blocks) * 2, self.max_blocks, self._ceiling - 1)
+
+    async def scan(
+        self,
+        fetch: Callable[[int, int], Awaitable[List[Any]]],
+        from_block: int,
+        to_block: int,
+        cursor: Optional[int] = None,
+        reverse: bool = False,
+        on_progress: Optional[Callable[[int, List[Any]], Awaitable[None]]] = None,
+        stop: Optional[Callable[[List[Any]], bool]] = None,
+        collect: bool = True,
+    ) -> List[Any]:
+        """
+        fetch(from, to) liefert die Logs eines Chunks (roh oder dekodiert)
+
+        cursor: zuletzt gescannter Block eines früheren Laufs (vorwärts: weiter ab cursor+1,
+                rückwärts: weiter ab cursor-1)
+        on_progress(cursor, logs): nach jedem lückenlosen Fortschritt, logs = neu abgedeckte Logs
+        collect=False: Logs nur an on_progress übergeben, nicht im Speicher sammeln
+        Returns: alle Logs in Scan-Reihenfolge (vorwärts aufsteigend, rückwärts absteigend)
+        """
+        if cursor is not None:
+            if reverse:
+                to_block = min(to_block, cursor - 1)
+            else:
+                from_block = max(from_block, cursor + 1)
+        if from_block > to_block:
+            return []
+
+        step = -1 if reverse else 1
+        # frontier: letzter lückenlos gescannter Block; completed: Chunk-Anfang (in Scan-Richtung) -> (Ende, Logs)
+        frontier = to_block + 1 if reverse else from_block - 1
+        next_block = to_block if reverse else from_block
+        completed: Dict[int, Tuple[int, List[Any]]] = {}
+        retry: List[Tuple[int, int, int]] = []
+        running: Dict[asyncio.Task, Tuple[int, int, int]] = {}
+        collected: List[Any] = []
+
+        def next_range() -> Optional[Tuple[int, int, int]]:
+            nonlocal next_block
+            if retry:
+                return retry.pop()
+            if (reverse and next_block < from_block) or (not reverse and next_block > to_block):
+                return None
+            if reverse:
+                lo, hi = max(from_block, next_block - self.chunk_blocks + 1), next_block
+                next_block = lo - 1
+            else:
+                lo, hi = next_block, min(to_block, next_block + self.chunk_blocks - 1)
+                next_block = hi + 1
+            return lo, hi, 0
+
+        try:
+            while True:
+                while len(running) < self.concurrency:
+                    chunk = next_range()
+                    if chunk is None:
+                        break
+                    self.requests += 1
+                    running[asyncio.ensure_future(fetch(chunk[0], chunk[1]))] = chunk
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    lo, hi, attempt = running.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        logs = list(task.result())
+                        self._adapt(hi - lo + 1, len(logs))
+                        completed[hi if reverse else lo] = (lo if reverse else hi, logs)
+                    elif is_log_range_error(error) and hi > lo:
+                        # Chunk halbieren, beide Hälften zuerst wieder einplanen
+                        mid = (lo + hi) // 2
+                        self._ceiling = min(self._ceiling, hi - lo + 1)
+                        self.chunk_blocks = max(1, (hi - lo + 1) // 2)
+                        self.splits += 1
+                        first, second = ((mid + 1, hi), (lo, mid)) if reverse else ((lo, mid), (mid + 1, hi))
+                        retry.extend([(*second, 0), (*first, 0)])
+                    elif attempt < self.retries:
+                        await asyncio.sleep(0.5 * 2 ** attempt)
+                        retry.append((lo, hi, attempt + 1))
+                    else:
+                        raise error
+
+                # Cursor über lückenlos fertige Chunks vorrücken
+                previous, advanced = frontier, []
+                while frontier + step in completed:
+                    end, logs = completed.pop(frontier + step)
+                    logs.sort(key=lambda log: (log["blockNumber"], log["logIndex"]), reverse=reverse)
+                    advanced.extend(logs)
+                    frontier = end
+                if frontier != previous:
+                    if collect:
+                        collected.extend(advanced)
+                    if on_progress is not None:
+                        await on_progress(frontier, advanced)
+                    if stop is not None and stop(collected):
+                        break
+        finally:
+            for task in running:
+                task.cancel()
+        return collected
+
+    def stats(self) -> Dict[str, Any]:
+        return {"chunk_blocks": self.chunk_blocks, "requests": self.requests, "splits": self.splits}
+
 
 class Web3Service:
     """Service for interacting with BASE Sepolia blockchain"""
@@ -27,7 +213,9 @@ class Web3Service:
     def __init__(self):
         """Initialize Web3 connection and contract instances"""
         # Load environment variables (will be loaded by server.py before import)
-        self.rpc_url = os.getenv("BASE_SEPOLIA_RPC_URL", "https://sepolia.base.org")
+        # Mehrere Endpoints: BASE_SEPOLIA_RPC_URLS=url1,url2 (Fallback: BASE_SEPOLIA_RPC_URL)
+        self.rpc_urls = rpc_urls("BASE_SEPOLIA_RPC_URLS", "BASE_SEPOLIA_RPC_URL", "https://sepolia.base.org")
+        self.rpc_url = self.rpc_urls[0]
         # Try BACKEND_PRIVATE_KEY first (has funds!), then fallback to others
         self.private_key = os.getenv("BACKEND_PRIVATE_KEY") or os.getenv("PRIVATE_KEY") or os.getenv("ADMIN_PRIVATE_KEY")
         
@@ -36,20 +224,146 @@ class Web3Service:
         self.resonance_score_address = os.getenv("RESONANCE_SCORE_ADDRESS")
         self.resonance_registry_address = os.getenv("RESONANCE_REGISTRY_ADDRESS")
         
-        # Initialize Web3 (read-only mode if no PRIVATE_KEY)
-        self.w3 = Web3(Web3.HTTPProvider(self.rpc_url))
+        # Initialize AsyncWeb3 (read-only mode if no PRIVATE_KEY)
+        # Die aiohttp-Session wird beim ersten Aufruf im laufenden Event Loop erzeugt (open())
+        # Reads -> schnellster gesunder Endpoint, Writes bleiben auf einem Endpoint
+        self.rpc = AsyncRPCPool(self.rpc_urls)
+        self.provider = PooledAsyncHTTPProvider(self.rpc)
+        self.w3 = AsyncWeb3(self.provider)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock: Optional[asyncio.Lock] = None
+        # EIP-1559 Fees aus eth_feeHistory, gecacht für ~1 Block
+        self.fees = AsyncFeeOracle(self.w3)
+        # Batch-Reads (Multicall3 / JSON-RPC Batch) über dieselbe Session
+        self.batch = BatchReader(self.w3, self.rpc.batch)
+        # Read-Through-Cache für balanceOf / tokenOfOwnerByIndex / getResonance
+        # (ändern sich nur durch unsere eigenen Transaktionen -> Invalidierung bei Bestätigung;
+        # andere Worker gleichen über die Outbox ab, siehe TxPipeline.follow)
+        self.cache = AsyncTTLCache()
+        self._pending_writes: Dict[str, str] = {}
+        # Transaktions-Outbox (tx_pipeline.TxPipeline), None = direkt senden
+        self.outbox = None
+        # Gemeinsamer Scanner -> gelernte Chunk-Größe gilt für alle Fallback-Suchen
+        self.log_scanner = LogScanner()
         
         if not self.private_key:
             logger.warning("⚠️ PRIVATE_KEY not found - Web3Service in READ-ONLY mode")
             logger.warning("⚠️ Blockchain queries work, but minting/transactions disabled")
             self.account = None
+            self.nonces = None
         else:
             self.account = Account.from_key(self.private_key)
+            # Lokale Nonce-Vergabe statt get_transaction_count pro Transaktion
+            self.nonces = NonceManager(self.w3, self.account.address)
             logger.info(f"🌐 Connected to BASE Sepolia: {self.rpc_url}")
             logger.info(f"💳 Backend Wallet: {self.account.address}")
         
         # Load contract ABIs and initialize contracts
         self._load_contracts()
+
+    async def open(self):
+        """Erzeugt die gemeinsame aiohttp-Session (Keep-Alive) und hängt sie an den Provider"""
+        if self._session is not None and not self._session.closed:
+            return
+        if self._session_lock is None:
+            self._session_lock = asyncio.Lock()
+        async with self._session_lock:
+            if self._session is not None and not self._session.closed:
+                return
+            connector = aiohttp.TCPConnector(
+                limit=RPC_POOL_SIZE,
+                keepalive_timeout=RPC_KEEPALIVE_SECONDS,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=RPC_TIMEOUT_SECONDS),
+            )
+            self.rpc.use_session(self._session)
+            logger.info(
+                f"🔌 RPC session opened: {', '.join(self.rpc_urls)} "
+                f"(pool={RPC_POOL_SIZE}, keep-alive={RPC_KEEPALIVE_SECONDS:.0f}s)"
+            )
+        if self.nonces is not None:
+            try:
+                await self.nonces.sync()
+            except Exception as e:
+                # Kein Abbruch: die erste allocate() synchronisiert erneut
+                logger.warning(f"⚠️ Nonce sync failed, retrying on first transaction: {e}")
+
+    async def close(self):
+        """Schließt die aiohttp-Session (beim Shutdown)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _transact(self, call, gas: int) -> str:
+        """
+        Baut, signiert und sendet einen Contract-Call -> tx_hash (hex)
+
+        Die Nonce kommt vom NonceManager; schlägt der Send fehl, wird sie freigegeben
+        (bzw. ein Resync ausgelöst), parallele Sends bekommen trotzdem eindeutige Nonces.
+        """
+        if self.nonces is None:
+            raise RuntimeError("Web3Service is in READ-ONLY mode (no PRIVATE_KEY)")
+        fees = await self.fees.fees()
+        async with self.nonces.reserve() as nonce:
+            raw_tx, _ = await self.sign_call(call, gas, nonce, fees)
+            return await self.send_raw(raw_tx)
+
+    async def sign_call(self, call, gas: int, nonce: int, fees: Dict[str, int]) -> Tuple[bytes, str]:
+        """Baut und signiert einen Contract-Call mit vorgegebener Nonce -> (raw_tx, tx_hash hex)"""
+        tx = await call.build_transaction({
+            'from': self.account.address,
+            'nonce': nonce,
+            'gas': gas,
+            **fees,
+            'chainId': 84532  # BASE Sepolia
+        })
+        signed_tx = self.w3.eth.account.sign_transaction(tx, self.private_key)
+        # Handle both .rawTransaction (older) and .raw_transaction (newer) Web3.py versions
+        raw_tx = getattr(signed_tx, 'rawTransaction', getattr(signed_tx, 'raw_transaction', None))
+        if raw_tx is None:
+            raise ValueError("Could not get raw transaction from signed transaction")
+        return bytes(raw_tx), Web3.to_hex(Web3.keccak(raw_tx))
+
+    async def send_raw(self, raw_tx: bytes) -> str:
+        """Sendet eine signierte Transaktion -> tx_hash (hex)"""
+        tx_hash = await self.w3.eth.send_raw_transaction(raw_tx)
+        return tx_hash.hex()
+
+    async def get_receipts(self, tx_hashes: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Receipts für viele Transaktionen (JSON-RPC Batch, RPC_BATCH_SIZE pro Request)
+
+        Returns: {tx_hash: receipt (rohes JSON, Zahlen als Hex) oder None = noch nicht gemined}
+        Fehlt ein Eintrag, ist die Abfrage fehlgeschlagen (nächster Poll versucht es erneut).
+        """
+        await self.open()
+        receipts: Dict[str, Optional[Dict[str, Any]]] = {}
+        for part in chunked(list(tx_hashes), RPC_BATCH_SIZE):
+            requests = [
+                {"jsonrpc": "2.0", "id": i, "method": "eth_getTransactionReceipt", "params": [tx_hash]}
+                for i, tx_hash in enumerate(part)
+            ]
+            try:
+                results = await self.rpc.batch(requests)
+            except Exception as e:
+                # Node ohne Batch-Support: einzeln abfragen
+                logger.warning(f"⚠️ Receipt batch failed ({len(part)} tx), querying one by one: {e}")
+                results = {}
+                for i, tx_hash in enumerate(part):
+                    try:
+                        response = await self.provider.make_request("eth_getTransactionReceipt", [tx_hash])
+                    except Exception as single_error:
+                        logger.warning(f"⚠️ Receipt query failed for {tx_hash}: {single_error}")
+                        continue
+                    if "result" in response:
+                        results[i] = response["result"]
+            for i, tx_hash in enumerate(part):
+                if i in results:
+                    receipts[tx_hash] = results[i]
+        return receipts
         
     def _load_contracts(self):
         """Load smart contract instances"""
@@ -189,40 +503,158 @@ class Web3Service:
             logger.warning("⚠️ RESONANCE_REGISTRY_ADDRESS not set")
             self.resonance_registry = None
     
-    async def has_identity_nft(self, address: str) -> bool:
-        """Check if address has an Identity NFT"""
+    # ===== TRANSAKTIONEN =====
+
+    def write_call(self, kind: str, payload: Dict[str, Any]) -> Tuple[Any, int]:
+        """Outbox-Job -> (Contract-Call, Gas-Limit)"""
+        if kind == "mint_identity":
+            return self.identity_nft.functions.mintIdentity(Web3.to_checksum_address(payload["address"])), 200000
+        if kind == "score":
+            return self.resonance_score.functions.adminAdjust(
+                Web3.to_checksum_address(payload["address"]), int(payload["score"])
+            ), 100000
+        if kind == "interaction":
+            metadata = payload.get("metadata") or ""
+            initiator, responder = payload["initiator"], payload["responder"]
+            interaction_type = int(payload["interaction_type"])
+            # Generate linkId from metadata (hash it to bytes32)
+            link_id = Web3.keccak(text=metadata) if metadata else Web3.keccak(text=f"{initiator}:{responder}:{interaction_type}")
+            # Weights auf 1 setzen (Minimum) - Contract validiert weight > 0
+            # Scores werden durch Milestone-System + Follow-Bonus verwaltet
+            # Minimale Weights (1) vermeiden Double-Minting aber erfüllen Contract-Validierung
+            return self.resonance_registry.functions.recordInteraction(
+                Web3.to_checksum_address(initiator),   # follower
+                Web3.to_checksum_address(responder),   # creator
+                link_id,                               # linkId (bytes32)
+                interaction_type,                      # actionType (uint8)
+                1,                                     # weightFollower (uint256)
+                1                                      # weightCreator (uint256)
+            ), 500000  # Erhöht von 300000 → 500000 (out of gas fix #2)
+        raise ValueError(f"Unknown transaction kind: {kind}")
+
+    async def _submit(self, kind: str, address: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Reiht eine Transaktion in die Outbox ein (-> job_id) oder sendet sie direkt,
+        wenn keine Outbox angehängt ist (z.B. CLI-Skripte)
+        """
+        if self.nonces is None:
+            raise RuntimeError("Web3Service is in READ-ONLY mode (no PRIVATE_KEY)")
+        if self.outbox is not None:
+            job_id = await self.outbox.submit(kind, address, payload)
+            return {"job_id": job_id, "status": "queued"}
+        await self.open()
+        call, gas = self.write_call(kind, payload)
+        tx_hash_hex = await self._transact(call, gas)
+        self.on_transaction_sent(kind, tx_hash_hex, address)
+        return {
+            "tx_hash": tx_hash_hex,
+            "status": "pending",
+            "basescan_url": f"https://sepolia.basescan.org/tx/{tx_hash_hex}"
+        }
+
+    # ===== CACHE =====
+
+    def invalidate(self, address: str):
+        """Verwirft alle gecachten Reads einer Adresse"""
+        address = address.lower()
+        for kind in ("balance", "token_id", "score"):
+            self.cache.invalidate((kind, address))
+
+    def _track_write(self, tx_hash: str, address: str):
+        """Eigene Transaktion gesendet: Cache jetzt und bei Bestätigung erneut verwerfen"""
+        self.invalidate(address)
+        self._pending_writes[tx_hash] = address.lower()
+        if len(self._pending_writes) > self.cache.max_entries:
+            self._pending_writes.pop(next(iter(self._pending_writes)))
+
+    def on_transaction_sent(self, kind: str, tx_hash: str, address: str):
+        """Hook nach dem Senden: Mint und Score ändern gecachte Reads, Interaktionen nicht"""
+        if kind in ("mint_identity", "score"):
+            self._track_write(tx_hash, address)
+
+    def on_transaction_confirmed(self, tx_hash: str) -> bool:
+        """
+        Hook für Mint-/Score-Bestätigung (NFT Confirmation Checker, Sync Queue)
+
+        Returns: True wenn die Transaktion von uns stammte und der Cache verworfen wurde
+        """
+        address = self._pending_writes.pop(tx_hash, None)
+        if address is None:
+            return False
+        self.invalidate(address)
+        return True
+
+    def _cached(self, kind: str, address: str, loader):
+        return self.cache.get_or_load((kind, address.lower()), loader)
+
+    async def _score_of(self, address: str) -> int:
+        await self.open()
+        return int(await self.resonance_score.functions.getResonance(Web3.to_checksum_address(address)).call())
+
+    # ===== READS =====
+    
+    async def resolve_identity(self, address: str, user=None, fresh: bool = False) -> Dict[str, Any]:
+        """
+        Identity NFT einer Adresse mit höchstens einem RPC-Request
+
+        1. users-Zeile (falls übergeben) mit identity_status='active' und Token-ID -> kein RPC
+        2. gecachte balance (+ token_id)
+        3. ein Multicall: balanceOf + tokenOfOwnerByIndex(address, 0)
+           (tokenOfOwnerByIndex revertiert bei Balance 0 -> None)
+
+        fresh=True ignoriert den Cache (z.B. direkt vor einem Mint).
+        Returns: {"has_identity": bool, "token_id": int|None, "source": "db"|"cache"|"chain"|"error"}
+        """
+        if user is not None and user["identity_status"] == "active" and user["identity_nft_token_id"] is not None:
+            return {"has_identity": True, "token_id": user["identity_nft_token_id"], "source": "db"}
+        if not self.identity_nft:
+            logger.warning("Identity NFT contract not initialized")
+            return {"has_identity": False, "token_id": None, "source": "error"}
+        key = address.lower()
+        if fresh:
+            self.cache.invalidate(("balance", key))
+            self.cache.invalidate(("token_id", key))
+        else:
+            found, balance = self.cache.get(("balance", key))
+            if found and balance == 0:
+                return {"has_identity": False, "token_id": None, "source": "cache"}
+            if found:
+                found, token_id = self.cache.get(("token_id", key))
+                if found:
+                    return {"has_identity": True, "token_id": token_id, "source": "cache"}
         try:
-            if not self.identity_nft:
-                logger.warning("Identity NFT contract not initialized")
-                return False
-                
+            await self.open()
             checksum_address = Web3.to_checksum_address(address)
-            balance = self.identity_nft.functions.balanceOf(checksum_address).call()
-            return balance > 0
+            balance, token = await self.batch.call([
+                encode_call(self.identity_nft, "balanceOf", [checksum_address], ("uint256",)),
+                encode_call(self.identity_nft, "tokenOfOwnerByIndex", [checksum_address, 0], ("uint256",)),
+            ])
+            if balance is None:
+                raise ValueError("balanceOf failed")
         except Exception as e:
-            logger.error(f"Error checking NFT balance for {address}: {e}")
-            return False
+            logger.error(f"Error resolving identity for {address}: {e}")
+            return {"has_identity": False, "token_id": None, "source": "error"}
+        balance = int(balance[0])
+        self.cache.set(("balance", key), balance)
+        token_id = int(token[0]) if balance > 0 and token else None
+        if balance > 0 and token_id is None:
+            # Fallback: Try to get from Transfer events
+            token_id = await self._get_token_id_from_events(address)
+        if token_id is not None:
+            self.cache.set(("token_id", key), token_id)
+        return {"has_identity": balance > 0, "token_id": token_id, "source": "chain"}
+
+    async def has_identity_nft(self, address: str) -> bool:
+        """Check if address has an Identity NFT"""
+        return (await self.resolve_identity(address))["has_identity"]
     
     async def get_identity_token_id(self, address: str) -> Optional[int]:
         """Get Identity NFT token ID for address"""
-        try:
-            if not self.identity_nft:
-                return None
-                
-            checksum_address = Web3.to_checksum_address(address)
-            balance = self.identity_nft.functions.balanceOf(checksum_address).call()
-            
-            if balance == 0:
-                return None
-            
-            # Get first token (index 0)
-            token_id = self.identity_nft.functions.tokenOfOwnerByIndex(checksum_address, 0).call()
-            return int(token_id)
-            
-        except Exception as e:
-            logger.error(f"Error getting token ID for {address}: {e}")
+        identity = await self.resolve_identity(address)
+        if identity["source"] == "error" and self.identity_nft:
             # Fallback: Try to get from Transfer events
             return await self._get_token_id_from_events(address)
+        return identity["token_id"]
     
     async def _get_token_id_from_events(self, address: str) -> Optional[int]:
         """Fallback: Get token ID from Transfer events"""
@@ -230,27 +662,32 @@ class Web3Service:
             if not self.identity_nft:
                 return None
                 
+            await self.open()
             checksum_address = Web3.to_checksum_address(address)
+            topics = [
+                Web3.keccak(text='Transfer(address,address,uint256)').hex(),
+                None,  # from (any)
+                '0x' + checksum_address[2:].lower().zfill(64)  # to (our address)
+            ]
+            
+            async def fetch(from_block: int, to_block: int):
+                return await self.w3.eth.get_logs({
+                    'fromBlock': from_block,
+                    'toBlock': to_block,
+                    'address': self.identity_nft.address,
+                    'topics': topics
+                })
             
-            # Get current block
-            current_block = self.w3.eth.block_number
-            from_block = max(0, current_block - 10000)  # Search last 10k blocks
-            
-            # Get Transfer events where 'to' is our address
-            logs = self.w3.eth.get_logs({
-                'fromBlock': from_block,
-                'toBlock': 'latest',
-                'address': self.identity_nft.address,
-                'topics': [
-                    self.w3.keccak(text='Transfer(address,address,uint256)').hex(),
-                    None,  # from (any)
-                    '0x' + checksum_address[2:].lower().zfill(64)  # to (our address)
-                ]
-            })
+            # Rückwärts vom aktuellen Block bis zum Deploy-Block, Abbruch beim ersten Treffer
+            current_block = await self.w3.eth.block_number
+            logs = await self.log_scanner.scan(
+                fetch, IDENTITY_NFT_DEPLOY_BLOCK, current_block,
+                reverse=True, stop=lambda found: bool(found)
+            )
             
             if logs:
-                # Get tokenId from last Transfer event
-                token_id = int(logs[-1]['topics'][3].hex(), 16)
+                # Neuestes Transfer-Event (rückwärts gescannt -> steht vorne)
+                token_id = int(logs[0]['topics'][3].hex(), 16)
                 logger.info(f"✅ Found token ID {token_id} from events for {address}")
                 return token_id
             
@@ -260,55 +697,76 @@ class Web3Service:
             logger.error(f"Error getting token ID from events for {address}: {e}")
             return None
     
-    async def mint_identity_nft(self, address: str) -> Tuple[bool, Dict[str, Any]]:
-        """Mint Identity NFT for address"""
+    async def get_identity_status(self, addresses: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Identity NFT Status für viele Adressen (Multicall: balanceOf, dann tokenOfOwnerByIndex)
+
+        Returns: {address: {"has_identity": bool, "token_id": int|None}}, None = Abfrage fehlgeschlagen
+        """
+        if not self.identity_nft or not addresses:
+            return {address: None for address in addresses}
+        try:
+            await self.open()
+            checksums = [Web3.to_checksum_address(a) for a in addresses]
+            balances = await self.batch.call([
+                encode_call(self.identity_nft, "balanceOf", [a], ("uint256",)) for a in checksums
+            ])
+            holders = [i for i, r in enumerate(balances) if r and r[0] > 0]
+            token_ids = await self.batch.call([
+                encode_call(self.identity_nft, "tokenOfOwnerByIndex", [checksums[i], 0], ("uint256",))
+                for i in holders
+            ])
+            token_by_index = {i: int(r[0]) if r else None for i, r in zip(holders, token_ids)}
+            for i, (address, balance) in enumerate(zip(addresses, balances)):
+                if balance is not None:
+                    self.cache.set(("balance", address.lower()), int(balance[0]))
+                if token_by_index.get(i) is not None:
+                    self.cache.set(("token_id", address.lower()), token_by_index[i])
+            return {
+                address: None if balance is None else {
+                    "has_identity": balance[0] > 0,
+                    "token_id": token_by_index.get(i),
+                }
+                for i, (address, balance) in enumerate(zip(addresses, balances))
+            }
+        except Exception as e:
+            logger.error(f"Error getting identity status for {len(addresses)} addresses: {e}")
+            return {address: None for address in addresses}
+    
+    async def mint_identity_nft(self, address: str, identity: Optional[Dict[str, Any]] = None) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Mint Identity NFT for address
+
+        identity: Ergebnis eines gerade erfolgten resolve_identity() - stammt es von der
+        Chain, entfällt der erneute Check
+        """
         try:
             if not self.identity_nft:
                 return False, {"error": "Identity NFT contract not initialized"}
             
             checksum_address = Web3.to_checksum_address(address)
             
-            # Check if already has NFT
-            if await self.has_identity_nft(address):
+            # Check if already has NFT (frisch von der Chain, nicht aus dem Cache - ein Multicall)
+            if identity is None or identity["source"] != "chain":
+                identity = await self.resolve_identity(address, fresh=True)
+            if identity["source"] == "error":
+                # Ohne gesicherten Status kein Mint (kein doppelter Mint bei RPC-Ausfall)
+                return False, {"error": "Could not check existing Identity NFT"}
+            if identity["has_identity"]:
                 logger.info(f"⚠️ Address {address} already has Identity NFT")
-                token_id = await self.get_identity_token_id(address)
                 return True, {
                     "message": "Already has Identity NFT",
-                    "token_id": token_id,
+                    "token_id": identity["token_id"],
                     "address": address
                 }
             
-            # Build transaction
-            nonce = self.w3.eth.get_transaction_count(self.account.address)
+            # Outbox-Job (oder direkt senden)
+            result = await self._submit("mint_identity", address, {"address": checksum_address})
             
-            mint_tx = self.identity_nft.functions.mintIdentity(checksum_address).build_transaction({
-                'from': self.account.address,
-                'nonce': nonce,
-                'gas': 200000,
-                'maxFeePerGas': self.w3.eth.gas_price * 2,
-                'maxPriorityFeePerGas': self.w3.eth.gas_price,
-                'chainId': 84532  # BASE Sepolia
-            })
-            
-            # Sign and send transaction
-            signed_tx = self.w3.eth.account.sign_transaction(mint_tx, self.private_key)
-            # Handle both .rawTransaction (older) and .raw_transaction (newer) Web3.py versions
-            raw_tx = getattr(signed_tx, 'rawTransaction', getattr(signed_tx, 'raw_transaction', None))
-            if raw_tx is None:
-                raise ValueError("Could not get raw transaction from signed transaction")
-            tx_hash = self.w3.eth.send_raw_transaction(raw_tx)
-            tx_hash_hex = tx_hash.hex()
-            
-            logger.info(f"🎨 NFT mint transaction sent: {tx_hash_hex}")
+            logger.info(f"🎨 NFT mint {result['status']}: {result.get('job_id') or result.get('tx_hash')}")
             logger.info(f"   → For: {address}")
-            logger.info(f"   → Status: pending confirmation...")
             
-            return True, {
-                "tx_hash": tx_hash_hex,
-                "status": "pending",
-                "address": address,
-                "basescan_url": f"https://sepolia.basescan.org/tx/{tx_hash_hex}"
-            }
+            return True, {**result, "address": address}
             
         except ContractLogicError as e:
             logger.error(f"Contract error minting NFT for {address}: {e}")
@@ -324,14 +782,36 @@ class Web3Service:
                 logger.warning("Resonance Score contract not initialized")
                 return 0
             
-            checksum_address = Web3.to_checksum_address(address)
-            score = self.resonance_score.functions.getResonance(checksum_address).call()
-            return int(score)
+            return await self._cached("score", address, lambda: self._score_of(address))
             
         except Exception as e:
             logger.error(f"Error getting blockchain score for {address}: {e}")
             return 0
     
+    async def get_scores(self, addresses: List[str]) -> Dict[str, Optional[int]]:
+        """
+        Resonance Scores für viele Adressen (Multicall, wenige Round Trips pro 1000 Adressen)
+
+        Returns: {address: score}, None = Abfrage für diese Adresse fehlgeschlagen
+        """
+        if not self.resonance_score or not addresses:
+            return {address: None for address in addresses}
+        try:
+            await self.open()
+            calls = [
+                encode_call(self.resonance_score, "getResonance", [Web3.to_checksum_address(a)], ("uint256",))
+                for a in addresses
+            ]
+            results = await self.batch.call(calls)
+            scores = {address: int(r[0]) if r else None for address, r in zip(addresses, results)}
+            for address, score in scores.items():
+                if score is not None:
+                    self.cache.set(("score", address.lower()), score)
+            return scores
+        except Exception as e:
+            logger.error(f"Error getting blockchain scores for {len(addresses)} addresses: {e}")
+            return {address: None for address in addresses}
+    
     async def update_blockchain_score(self, address: str, score: int) -> Tuple[bool, Dict[str, Any]]:
         """Update Resonance Score on blockchain"""
         try:
@@ -340,39 +820,14 @@ class Web3Service:
             
             checksum_address = Web3.to_checksum_address(address)
             
-            # Build transaction
-            nonce = self.w3.eth.get_transaction_count(self.account.address)
-            
-            update_tx = self.resonance_score.functions.adminAdjust(
-                checksum_address, 
-                score
-            ).build_transaction({
-                'from': self.account.address,
-                'nonce': nonce,
-                'gas': 100000,
-                'maxFeePerGas': self.w3.eth.gas_price * 2,
-                'maxPriorityFeePerGas': self.w3.eth.gas_price,
-                'chainId': 84532
-            })
-            
-            # Sign and send
-            signed_tx = self.w3.eth.account.sign_transaction(update_tx, self.private_key)
-            raw_tx = getattr(signed_tx, 'rawTransaction', getattr(signed_tx, 'raw_transaction', None))
-            if raw_tx is None:
-                raise ValueError("Could not get raw transaction from signed transaction")
-            tx_hash = self.w3.eth.send_raw_transaction(raw_tx)
-            tx_hash_hex = tx_hash.hex()
+            # Outbox-Job (oder direkt senden)
+            result = await self._submit("score", address, {"address": checksum_address, "score": score})
             
-            logger.info(f"📊 Score update transaction sent: {tx_hash_hex}")
+            logger.info(f"📊 Score update {result['status']}: {result.get('job_id') or result.get('tx_hash')}")
             logger.info(f"   → Address: {address}")
             logger.info(f"   → Score: {score}")
             
-            return True, {
-                "tx_hash": tx_hash_hex,
-                "status": "pending",
-                "score": score,
-                "basescan_url": f"https://sepolia.basescan.org/tx/{tx_hash_hex}"
-            }
+            return True, {**result, "score": score}
             
         except Exception as e:
             logger.error(f"Error updating score for {address}: {e}")
@@ -402,52 +857,20 @@ class Web3Service:
             initiator_addr = Web3.to_checksum_address(initiator)
             responder_addr = Web3.to_checksum_address(responder)
             
-            # Generate linkId from metadata (hash it to bytes32)
-            link_id = Web3.keccak(text=metadata) if metadata else Web3.keccak(text=f"{initiator}:{responder}:{interaction_type}")
-            
-            # Weights auf 1 setzen (Minimum) - Contract validiert weight > 0
-            # Scores werden durch Milestone-System + Follow-Bonus verwaltet
-            # Minimale Weights (1) vermeiden Double-Minting aber erfüllen Contract-Validierung
-            weight_initiator = 1
-            weight_responder = 1
-            
-            # Build transaction with all 6 parameters
-            nonce = self.w3.eth.get_transaction_count(self.account.address)
-            
-            record_tx = self.resonance_registry.functions.recordInteraction(
-                initiator_addr,          # follower
-                responder_addr,          # creator
-                link_id,                 # linkId (bytes32)
-                interaction_type,        # actionType (uint8)
-                weight_initiator,        # weightFollower (uint256)
-                weight_responder         # weightCreator (uint256)
-            ).build_transaction({
-                'from': self.account.address,
-                'nonce': nonce,
-                'gas': 500000,  # Erhöht von 300000 → 500000 (out of gas fix #2)
-                'maxFeePerGas': self.w3.eth.gas_price * 2,
-                'maxPriorityFeePerGas': self.w3.eth.gas_price,
-                'chainId': 84532
+            # Outbox-Job (oder direkt senden), Calldata baut write_call()
+            result = await self._submit("interaction", initiator, {
+                "initiator": initiator_addr,
+                "responder": responder_addr,
+                "interaction_type": interaction_type,
+                "metadata": metadata,
             })
             
-            # Sign and send
-            signed_tx = self.w3.eth.account.sign_transaction(record_tx, self.private_key)
-            raw_tx = getattr(signed_tx, 'rawTransaction', getattr(signed_tx, 'raw_transaction', None))
-            if raw_tx is None:
-                raise ValueError("Could not get raw transaction from signed transaction")
-            tx_hash = self.w3.eth.send_raw_transaction(raw_tx)
-            tx_hash_hex = tx_hash.hex()
-            
-            logger.info(f"⛓️ Interaction recorded: {tx_hash_hex}")
+            logger.info(f"⛓️ Interaction {result['status']}: {result.get('job_id') or result.get('tx_hash')}")
             logger.info(f"   → Initiator: {initiator}")
             logger.info(f"   → Responder: {responder}")
             logger.info(f"   → Type: {interaction_type}")
             
-            return True, {
-                "tx_hash": tx_hash_hex,
-                "status": "pending",
-                "basescan_url": f"https://sepolia.basescan.org/tx/{tx_hash_hex}"
-            }
+            return True, result
             
         except Exception as e:
             logger.error(f"Error recording interaction: {e}")
@@ -465,6 +888,7 @@ class Web3Service:
                 logger.warning("Resonance Registry contract not initialized")
                 return []
             
+            await self.open()
             checksum_address = Web3.to_checksum_address(address)
             
             # Get InteractionRecorded events for this user
@@ -473,32 +897,31 @@ class Web3Service:
             # Create event filter for events where user is initiator OR responder
             # Note: BASE Sepolia RPC limits queries to 100k blocks max
             # Query last 50k blocks (roughly last few days at 2 sec/block = ~27 hours)
-            current_block = self.w3.eth.block_number
+            current_block = await self.w3.eth.block_number
             from_block = max(0, current_block - 50000)
             to_block = 'latest'
             
             logger.info(f"🔍 Querying interactions from block {from_block:,} to {to_block} ({current_block - from_block:,} blocks)")
             
-            # Get events where user is initiator (follower) (using get_logs instead of create_filter)
-            try:
-                initiator_events = self.resonance_registry.events.InteractionRecorded.get_logs(
+            # Events where user is initiator (follower) and responder (creator), both queries in parallel
+            initiator_events, responder_events = await asyncio.gather(
+                self.resonance_registry.events.InteractionRecorded.get_logs(
                     fromBlock=from_block,
                     toBlock=to_block,
                     argument_filters={'follower': checksum_address}
-                )
-            except Exception as e:
-                logger.warning(f"Could not get initiator events: {e}")
-                initiator_events = []
-            
-            # Get events where user is responder (creator)
-            try:
-                responder_events = self.resonance_registry.events.InteractionRecorded.get_logs(
+                ),
+                self.resonance_registry.events.InteractionRecorded.get_logs(
                     fromBlock=from_block,
                     toBlock=to_block,
                     argument_filters={'creator': checksum_address}
-                )
-            except Exception as e:
-                logger.warning(f"Could not get responder events: {e}")
+                ),
+                return_exceptions=True,
+            )
+            if isinstance(initiator_events, Exception):
+                logger.warning(f"Could not get initiator events: {initiator_events}")
+                initiator_events = []
+            if isinstance(responder_events, Exception):
+                logger.warning(f"Could not get responder events: {responder_events}")
                 responder_events = []
             
             # Combine and deduplicate events
@@ -544,8 +967,8 @@ class Web3Service:
         """Get blockchain connection health status"""
         try:
             # Test connection
-            block_number = self.w3.eth.block_number
-            gas_price = self.w3.eth.gas_price
+            await self.open()
+            block_number, gas_price = await asyncio.gather(self.w3.eth.block_number, self.w3.eth.gas_price)
             
             result = {
                 "status": "connected",
@@ -557,12 +980,18 @@ class Web3Service:
             
             # Add backend wallet info if available
             if self.account:
-                balance = self.w3.eth.get_balance(self.account.address)
+                balance = await self.w3.eth.get_balance(self.account.address)
                 balance_eth = Web3.from_wei(balance, 'ether')
                 result["backend_balance_eth"] = float(balance_eth)
                 result["backend_address"] = self.account.address
+                result["nonce"] = self.nonces.stats()
             else:
                 result["mode"] = "read-only"
+            result["fee_oracle"] = self.fees.stats()
+            result["batch_reads"] = self.batch.stats()
+            result["cache"] = self.cache.stats()
+            result["log_scanner"] = self.log_scanner.stats()
+            result["rpc_pool"] = self.rpc.stats()
             
             return result
             